@@ -344,17 +344,36 @@ def init_logging():
 
 # Local imports
 from mt5_client import (
-    conectar, 
+    sesion,
+    ejecutor,
+    cursor_ticks,
+    registro_simbolos,
+    indice_posiciones,
     cerrar, 
     abrir_orden, 
-    cerrar_orden, 
-    mover_sl_be
+    motivo_niveles_invalidos,
+    posiciones_con_comentario,
+    cerrar_ordenes,
+    mover_sl_be_varios,
+    modificar_posiciones,
+    colocar_pendiente,
+    cancelar_pendiente,
+    estado_pendientes
 )
 from utils.filters import (
+    cargar_perfiles,
+    configurar_simbolos,
     parse_senal,
     detectar_accion_mensaje,
+    cache_parseo,
     encontrar_senal_original
 )
+from utils.metricas import Cronometro, metricas, salud_monitor
+from utils.monitor import DiccionarioObservado, LibrosTriggers, TriggersVectorizados, PlanificadorSondeo, np
+from utils.bus_ticks import BusTicks
+from utils.grabador_ticks import GrabadorTicks
+from utils.proteccion import MotorProteccion
+from monitor_procesos import MonitorProcesos, comentario_orden
 
 # =============================================================================
 # Configuración y Constantes
@@ -369,6 +388,67 @@ UPDATE_DATE = "2024-01-01"  # Actualizar al hacer modificaciones
 API_ID = 123
 API_HASH = ''
 
+# Símbolos aceptados en las señales; una señal con otro símbolo se descarta
+SIMBOLOS_SENALES = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+
+# Formato de señales de cada canal (ver PERFIL_POR_DEFECTO en
+# utils/filters.py); los canales sin perfil usan "por_defecto"
+PERFILES_PARSER = os.path.join("config", "perfiles_parser.json")
+
+# Cadencia del monitor de precios: cada símbolo se relee entre estos límites
+# (segundos) según su distancia al trigger más cercano y su volatilidad
+MONITOR_INTERVALO_MIN = 0.05
+MONITOR_INTERVALO_MAX = 5.0
+
+# Segundos sin volver a disparar una orden cuya apertura falló (sin esto se
+# reintentaría con cada tick, cada MONITOR_INTERVALO_MIN)
+DISPARO_ESPERA_REINTENTO = 5.0
+
+# El cursor de ticks vuelve al precio actual solo si un símbolo pasó varios
+# intervalos máximos sin leerse: los símbolos más lentos no pierden ticks
+cursor_ticks.max_retraso_ms = 3 * MONITOR_INTERVALO_MAX * 1000
+
+# Cada cuántos segundos se mide el lag del event loop y la edad de los ticks
+# (umbrales de alarma en utils/metricas.py, UMBRALES_SALUD_MS)
+SALUD_INTERVALO = 1.0
+
+# Repartir los símbolos vigilados entre MONITOR_PROCESOS procesos, cada uno
+# con su propia sesión de MT5 (ver monitor_procesos.py); 0 vigila todo desde
+# este proceso. MONITOR_TERMINALES: ruta de terminal64.exe de cada proceso,
+# vacío usa el terminal por defecto
+MONITOR_PROCESOS = 0
+MONITOR_TERMINALES = []
+
+# Grabar cada tick leído en TICKS_DIR/<símbolo>/<día>.ticks (registros de
+# 24 bytes, ver utils/grabador_ticks.py) para auditoría y replay
+GRABAR_TICKS = True
+TICKS_DIR = os.path.join(DATA_DIR, "ticks")
+
+# Colocar cada entrada como orden LIMIT en el broker en lugar de vigilarla
+# localmente; el monitor solo reconcilia las ejecuciones cada
+# RECONCILIACION_INTERVALO segundos
+MODO_PENDIENTES_BROKER = False
+RECONCILIACION_INTERVALO = 1.0
+
+# Break-even y trailing automáticos sobre las señales activas (en puntos,
+# ver utils/proteccion.py); con PROTECCION_AUTOMATICA = False el SL solo se
+# mueve con los mensajes del canal
+PROTECCION_AUTOMATICA = False
+REGLAS_PROTECCION = {
+    'be_puntos': 300,
+    'be_margen_puntos': 10,
+    'trailing_inicio_puntos': 500,
+    'trailing_distancia_puntos': 200,
+    'trailing_paso_puntos': 20,
+}
+
+configurar_simbolos(SIMBOLOS_SENALES)
+if os.path.exists(PERFILES_PARSER):
+    try:
+        cargar_perfiles(PERFILES_PARSER)
+    except (ValueError, OSError) as e:
+        logger.error(f"Error cargando perfiles de parser, se usa el formato por defecto: {e}")
+
 def get_timestamp():
     """
     Obtiene el timestamp actual en formato Buenos Aires.
@@ -436,10 +516,39 @@ CANAL_VIP = None
 SESSION_NAME = 'trading_session'
 
 # Estado de órdenes
-ordenes_pendientes = {}
-senales_activas = {}
+ordenes_pendientes = DiccionarioObservado()
+senales_activas = DiccionarioObservado()
 mensajes_senales = {}
 senales_canceladas = {}
+# Señales con una orden a mercado en curso (monitor o acción manual)
+senales_en_vuelo = set()
+
+# Triggers de entrada por símbolo, sincronizados con ordenes_pendientes
+# (vectorizados con numpy si está instalado)
+libros_triggers = TriggersVectorizados() if np is not None else LibrosTriggers()
+
+def _agregar_trigger(msg_id, datos):
+    """Las entradas con orden en el broker no se vigilan localmente"""
+    if not datos.get('orden_broker'):
+        libros_triggers.agregar(msg_id, datos)
+
+ordenes_pendientes.observar(_agregar_trigger, libros_triggers.quitar)
+
+# Break-even y trailing de las posiciones, sincronizado con senales_activas
+motor_proteccion = MotorProteccion(REGLAS_PROTECCION)
+senales_activas.observar(motor_proteccion.agregar, motor_proteccion.quitar)
+
+# Bus de ticks: una sola lectura de MT5 compartida por todos los consumidores
+# Con MONITOR_PROCESOS los ticks del monitor los graba cada proceso
+grabador_ticks = GrabadorTicks(TICKS_DIR) if GRABAR_TICKS else None
+bus_ticks = BusTicks(
+    leer=lambda symbol: ejecutor.ejecutar(cursor_ticks.leer, symbol),
+    preparar=lambda: ejecutor.ejecutar(sesion.asegurar),
+    planificador=PlanificadorSondeo(MONITOR_INTERVALO_MIN, MONITOR_INTERVALO_MAX),
+    grabar=grabador_ticks.grabar if grabador_ticks and not MONITOR_PROCESOS else None,
+    # Lectura + publicación, igual que el ciclo de los procesos de monitoreo
+    medir_ciclo=lambda ms: salud_monitor.registrar('ciclo', ms)
+)
 
 # =============================================================================
 # Sistema de Logging
@@ -454,6 +563,7 @@ def get_log_paths():
             - procesados: Log de mensajes procesados
             - diario: Log de operaciones diarias
             - acciones: Log de acciones ejecutadas
+            - latencias: Histogramas de latencia por etapa
             - backup: Directorio para backups
     """
     fecha_actual = datetime.now(timezone).strftime("%Y%m")
@@ -462,6 +572,7 @@ def get_log_paths():
         'procesados': os.path.join(LOGS_DIR, f'procesados_{fecha_actual}.json'),
         'diario': os.path.join(LOGS_DIR, f'diario_{fecha_actual}.json'),
         'acciones': os.path.join(LOGS_DIR, f'acciones_{fecha_actual}.jsonl'),
+        'latencias': os.path.join(LOGS_DIR, f'latencias_{fecha_actual}.json'),
         'backup': os.path.join(LOGS_DIR, 'backup'),
         'errores': os.path.join(LOGS_DIR, 'errors.log'),
         'trading': os.path.join(LOGS_DIR, 'trading_assistant.log')
@@ -659,6 +770,7 @@ def guardar_logs():
         paths = {
             'diario': os.path.join(LOGS_DIR, f'diario_{fecha_actual}.json'),
             'procesados': os.path.join(LOGS_DIR, f'procesados_{fecha_actual}.json'),
+            'latencias': os.path.join(LOGS_DIR, f'latencias_{fecha_actual}.json'),
             'backup': os.path.join(LOGS_DIR, 'backup')
         }
         
@@ -710,6 +822,14 @@ def guardar_logs():
         }
         guardar_archivo_seguro(paths['procesados'], datos_operaciones)
         
+        # Guardar histogramas de latencia por etapa
+        guardar_archivo_seguro(paths['latencias'], {
+            **metricas.exportar(),
+            'salud_monitor': salud_monitor.exportar(),
+            'bus_ticks': bus_ticks.estadisticas(),
+            'cache_parseo': cache_parseo.estadisticas()
+        })
+        
         # Limpiar logs antiguos (más de 30 días)
         try:
             for archivo in os.listdir(LOGS_DIR):
@@ -725,7 +845,7 @@ def guardar_logs():
     except Exception as e:
         log_mensaje(f"Error crítico guardando logs: {e}", nivel='critical', exc_info=True)
 
-def log_accion(tipo, accion, senal_original, detalles=None):
+def log_accion(tipo, accion, senal_original, detalles=None, latencias=None):
     """
     Registra una acción en el log con manejo de errores mejorado y formato optimizado.
     
@@ -734,6 +854,7 @@ def log_accion(tipo, accion, senal_original, detalles=None):
         accion (str): Acción específica ('hit_entry', 'be', 'cerrar', etc.)
         senal_original (str): Texto de la señal original que generó la acción
         detalles (dict, optional): Información adicional sobre la acción
+        latencias (dict, optional): Resumen del Cronometro del mensaje
     
     Returns:
         dict: Datos de la acción registrada
@@ -750,6 +871,9 @@ def log_accion(tipo, accion, senal_original, detalles=None):
             "detalles": detalles or {}
         }
         
+        if latencias:
+            data["latencias"] = latencias
+        
         # Añadir información de mercado si está disponible
         if detalles and "simbolo" in detalles:
             data["mercado"] = {
@@ -913,7 +1037,7 @@ log_diario = init_log_diario()
 # Operaciones de Trading
 # =============================================================================
 
-async def ejecutar_orden_mercado(datos_senal, senal_original):
+async def ejecutar_orden_mercado(datos_senal, senal_original, cronometro=None):
     """
     Ejecuta una orden a mercado en MT5.
     
@@ -925,31 +1049,38 @@ async def ejecutar_orden_mercado(datos_senal, senal_original):
             - tp: Take profit
             - entrada: Precio de entrada original
         senal_original (str): Texto de la señal que generó la orden
+        cronometro (Cronometro, optional): Cronómetro de etapas del mensaje
     
     Returns:
         int: Ticket de la orden si fue exitosa, None en caso contrario
     """
     try:
-        conectar()
+        await ejecutor.ejecutar(sesion.asegurar)
+        if cronometro:
+            cronometro.marcar('conexion')
         
         # Execute order at current market price with original SL/TP distances
-        ticket = abrir_orden(
+        ticket = await ejecutor.ejecutar(
+            abrir_orden,
             symbol=datos_senal['simbolo'],
             order_type=datos_senal['tipo'],
             lotes=0.1,
             sl=datos_senal['sl'],
             tp=datos_senal['tp'],
-            entrada=datos_senal['entrada']  # Pass original entry price
+            entrada=datos_senal['entrada'],  # Pass original entry price
+            cronometro=cronometro
         )
         
         if ticket:
+            if cronometro:
+                cronometro.marcar_fill()
             mensaje = f"✅ Orden ejecutada a mercado: {ticket}"
             logger.info(mensaje)
             print(mensaje)
             log_accion("entrada", "hit_entry", senal_original, {
                 "ticket": ticket,
                 "detalles": datos_senal
-            })
+            }, latencias=cronometro.resumen() if cronometro else None)
             return ticket
         else:
             mensaje = "❌ Error ejecutando orden a mercado"
@@ -962,51 +1093,200 @@ async def ejecutar_orden_mercado(datos_senal, senal_original):
         logger.error(mensaje)
         print(mensaje)
         return None
-    finally:
-        cerrar()
 
-async def cerrar_orden_con_reintentos(ticket, max_intentos=3):
+async def colocar_orden_broker(datos_senal):
+    """
+    Coloca la entrada de una señal como orden LIMIT en el broker.
+    
+    Si tiene éxito guarda el ticket en datos_senal['orden_broker']; si no
+    (entrada ya alcanzada, demasiado cerca del mercado o rechazo del broker)
+    la señal queda vigilada por MonitorTask como siempre.
+    
+    Args:
+        datos_senal (dict): Datos de la señal (simbolo, tipo, entrada, sl, tp)
+    
+    Returns:
+        int: Ticket de la orden pendiente, None si no se colocó
+    """
+    try:
+        await ejecutor.ejecutar(sesion.asegurar)
+        orden = await ejecutor.ejecutar(
+            colocar_pendiente,
+            symbol=datos_senal['simbolo'],
+            order_type=datos_senal['tipo'],
+            lotes=0.1,
+            entrada=datos_senal['entrada'],
+            sl=datos_senal.get('sl'),
+            tp=datos_senal.get('tp')
+        )
+        if orden:
+            datos_senal['orden_broker'] = orden
+            log_mensaje(f"📌 Orden pendiente {orden} colocada en el broker: {datos_senal['tipo']} {datos_senal['simbolo']} @ {datos_senal['entrada']}")
+        return orden
+    except Exception as e:
+        log_mensaje(f"❌ Error colocando orden pendiente: {e}", nivel='error')
+        return None
+
+async def retirar_orden_broker(datos_senal):
+    """
+    Elimina la orden pendiente del broker asociada a una señal.
+    
+    Returns:
+        bool: True si la orden se eliminó; False si no se pudo (por ejemplo,
+        porque el broker ya la ejecutó)
+    """
+    orden = datos_senal.get('orden_broker')
+    try:
+        exito = await ejecutor.ejecutar(cancelar_pendiente, orden)
+    except Exception as e:
+        log_mensaje(f"❌ Error eliminando orden pendiente {orden}: {e}", nivel='error')
+        exito = False
+    if exito:
+        del datos_senal['orden_broker']
+        log_mensaje(f"🗑️ Orden pendiente {orden} eliminada del broker")
+    return exito
+
+async def reconciliar_ordenes_broker():
+    """
+    Sincroniza las entradas colocadas en el broker con su estado en MT5.
+    
+    Las ejecutadas pasan a senales_activas con el ticket de la posición; las
+    que desaparecieron (canceladas o expiradas fuera del bot) pasan a
+    senales_canceladas.
+    """
+    colocadas = {msg_id: datos['orden_broker']
+                 for msg_id, datos in ordenes_pendientes.items() if datos.get('orden_broker')}
+    if not colocadas:
+        return
+    estados = await ejecutor.ejecutar(estado_pendientes, list(colocadas.values()))
+
+    for msg_id, orden in colocadas.items():
+        datos = ordenes_pendientes.get(msg_id)
+        if not datos or datos.get('orden_broker') != orden:
+            continue  # Cambió mientras se consultaba MT5
+        estado = estados.get(orden)
+        if estado == 'pendiente':
+            continue
+        detalles = {k: v for k, v in datos.items() if k != 'orden_broker'}
+        del ordenes_pendientes[msg_id]
+        if estado == 'ejecutada':
+            senales_activas[msg_id] = {**detalles, 'ticket': orden}
+            log_mensaje(f"✅ Orden pendiente {orden} ejecutada por el broker en {datos['entrada']}")
+            log_accion("entrada", "pendiente_broker", mensajes_senales.get(msg_id, ""), {
+                "ticket": orden,
+                "detalles": detalles,
+                "tipo_ejecucion": "pendiente_broker"
+            })
+        else:
+            senales_canceladas[msg_id] = detalles
+            log_mensaje(f"⚠️ Orden pendiente {orden} ya no existe en el broker, señal {msg_id} cancelada", nivel='warning')
+
+def _leer_posiciones_proteccion(tickets):
+    """
+    Datos de MT5 para el motor de protección (corre en el hilo de MT5).
+    
+    Returns:
+        tuple: ({ticket: posición o None}, {simbolo: (point, distancia mínima)})
+        con a lo sumo un barrido de posiciones
+    """
+    indice_posiciones.asegurar_fresco()
+    posiciones = {ticket: indice_posiciones.obtener(ticket) for ticket in tickets}
+    simbolos = {}
+    for posicion in posiciones.values():
+        if posicion and posicion.symbol not in simbolos:
+            info = registro_simbolos.obtener(posicion.symbol)
+            simbolos[posicion.symbol] = (info.point, info.distancia_minima)
+    return posiciones, simbolos
+
+async def cerrar_ordenes_con_reintentos(tickets):
+    """
+    Cierra varias órdenes en lote.
+    
+    Los reintentos los decide mt5_client según el retcode de cada rechazo
+    (reintento inmediato, espera o fallo definitivo) dentro de un
+    presupuesto de latencia por operación.
+    
+    Args:
+        tickets (list): Tickets de las órdenes a cerrar
+    
+    Returns:
+        dict: {ticket: True si se cerró, False en caso contrario}
+    """
+    resultados = {ticket: False for ticket in tickets}
+    try:
+        await ejecutor.ejecutar(sesion.asegurar)
+        resultados.update(await ejecutor.ejecutar(cerrar_ordenes, list(tickets)))
+        for ticket, exito in resultados.items():
+            if exito:
+                logger.info(f"✅ Orden {ticket} cerrada correctamente")
+            else:
+                logger.error(f"❌ Error al cerrar orden {ticket}")
+    except Exception as e:
+        logger.error(f"❌ Error cerrando órdenes {list(tickets)}: {e}")
+    return resultados
+
+async def cerrar_orden_con_reintentos(ticket):
     """
-    Intenta cerrar una orden varias veces si falla.
+    Cierra una orden reintentando los rechazos transitorios del broker.
     
     Args:
         ticket (int): Ticket de la orden a cerrar
-        max_intentos (int): Número máximo de intentos de cierre (default: 3)
     
     Returns:
         bool: True si la orden se cerró exitosamente, False en caso contrario
     """
-    for intento in range(max_intentos):
-        try:
-            conectar()
-            if cerrar_orden(ticket):
-                logger.info(f"✅ Orden {ticket} cerrada correctamente en intento {intento + 1}")
-                return True
-            else:
-                logger.error(f"❌ Intento {intento + 1}/{max_intentos}: Error al cerrar orden {ticket}")
-                if intento < max_intentos - 1:
-                    await asyncio.sleep(0.1)
-        except Exception as e:
-            logger.error(f"❌ Intento {intento + 1}/{max_intentos}: Error cerrando orden {ticket}: {e}")
-            if intento < max_intentos - 1:
-                await asyncio.sleep(0.1)
-        finally:
-            cerrar()
-    return False
+    resultados = await cerrar_ordenes_con_reintentos([ticket])
+    return resultados[ticket]
+
+async def cerrar_senales(senal_ids):
+    """
+    Cierra en un solo lote las posiciones de varias señales activas.
+    
+    Las señales cerradas se eliminan de senales_activas.
+    
+    Args:
+        senal_ids (list): IDs de mensaje de las señales activas
+    
+    Returns:
+        dict: {senal_id: True si se cerró, False en caso contrario}
+    """
+    tickets = {senal_id: senales_activas[senal_id].get("ticket") for senal_id in senal_ids}
+    resultados = await cerrar_ordenes_con_reintentos([t for t in tickets.values() if t])
+    
+    exitos = {}
+    for senal_id, ticket in tickets.items():
+        exitos[senal_id] = bool(ticket) and resultados.get(ticket, False)
+        if exitos[senal_id]:
+            del senales_activas[senal_id]
+    return exitos
+
+async def mover_be_senales(senal_ids):
+    """
+    Mueve a break even en un solo lote las posiciones de varias señales activas.
+    
+    Args:
+        senal_ids (list): IDs de mensaje de las señales activas
+    
+    Returns:
+        dict: {senal_id: True si se movió el SL, False en caso contrario}
+    """
+    tickets = {senal_id: senales_activas[senal_id].get("ticket") for senal_id in senal_ids}
+    await ejecutor.ejecutar(sesion.asegurar)
+    resultados = await ejecutor.ejecutar(mover_sl_be_varios, [t for t in tickets.values() if t])
+    return {senal_id: bool(ticket) and resultados.get(ticket, False) for senal_id, ticket in tickets.items()}
 
-def test_mt5():
+async def test_mt5():
     """
     Prueba la conexión con MetaTrader 5.
     
-    Intenta establecer y cerrar una conexión con MT5 para verificar
-    que el sistema está disponible y funcionando correctamente.
+    Establece la sesión compartida con MT5 para verificar que el sistema
+    está disponible. La sesión queda abierta para el resto de operaciones.
     
     Returns:
         bool: True si la conexión fue exitosa, False en caso contrario
     """
     try:
-        conectar()
-        cerrar()
+        await ejecutor.ejecutar(sesion.asegurar)
         log_mensaje("✅ Conexión a MT5 exitosa.")
         return True
     except Exception as e:
@@ -1051,22 +1331,36 @@ async def procesar_mensaje(event):
     3. Ejecutar las acciones correspondientes
     4. Manejar señales canceladas para re-entrada
     
+    Cada etapa se cronometra y se acumula en los histogramas de latencia.
+    
     Args:
         event (events.NewMessage.Event): Evento de mensaje a procesar
     """
+    cronometro = Cronometro(origen=getattr(event.message, 'date', None))
+    try:
+        await _procesar_mensaje(event, cronometro)
+    finally:
+        if cronometro.etapas:
+            metricas.registrar(cronometro)
+
+async def _procesar_mensaje(event, cronometro):
+    """Cuerpo de procesar_mensaje, marca cada etapa en `cronometro`."""
     msg = event.message
     texto = getattr(msg, 'text', None) or getattr(msg, 'message', None) or getattr(msg, 'caption', None)
     if not texto:
         return
 
     texto = texto.strip()
-    resultado = parse_senal(texto)
+    resultado = parse_senal(texto, chat_id=getattr(event, 'chat_id', None))
+    cronometro.marcar('parse')
 
     if resultado:
         mensaje = f"\n══════════════════════════════════════\n📡 [SEÑAL DETECTADA] ➤ {resultado}\n══════════════════════════════════════"
         logger.info(mensaje)
         print(mensaje)
         
+        if MODO_PENDIENTES_BROKER:
+            await colocar_orden_broker(resultado)
         ordenes_pendientes[event.id] = resultado
         mensajes_senales[event.id] = texto
         
@@ -1086,7 +1380,8 @@ async def procesar_mensaje(event):
             "accion": "nueva_senal",
             "timestamp": get_timestamp(),
             "senal_original": texto,
-            "detalles": data
+            "detalles": data,
+            "latencias": cronometro.resumen()
         })
         
         # Guardar logs
@@ -1094,6 +1389,7 @@ async def procesar_mensaje(event):
         return
 
     accion = detectar_accion_mensaje(texto)
+    cronometro.marcar('deteccion_accion')
     if not accion:
         return
 
@@ -1105,6 +1401,7 @@ async def procesar_mensaje(event):
     senal_id, estado, senal_original = await encontrar_senal_original(
         msg, client, mensajes_senales, ordenes_pendientes, senales_activas, senales_canceladas
     )
+    cronometro.marcar('busqueda_senal')
     
     if not senal_id:
         mensaje = "\n❌ No se encontró la señal original\n"
@@ -1124,22 +1421,40 @@ async def procesar_mensaje(event):
         elif estado == "cancelada":
             datos_senal = senales_canceladas[senal_id]
         
-        if datos_senal:
+        if datos_senal and senal_id in senales_en_vuelo:
+            mensaje = f"\n⚠️ La señal ya se está ejecutando, no se ejecuta {accion.upper()}\n"
+            logger.warning(mensaje)
+            print(mensaje)
+        elif datos_senal:
             # Si es BUY NOW o SELL NOW, forzar el tipo de orden
+            if estado == "pendiente" and datos_senal.get('orden_broker'):
+                if not await retirar_orden_broker(datos_senal):
+                    # El broker ya la ejecutó: la reconciliación la pasa a activa
+                    await reconciliar_ordenes_broker()
+                    mensaje = f"\n⚠️ La orden pendiente ya no se pudo retirar del broker, no se ejecuta {accion.upper()}\n"
+                    logger.warning(mensaje)
+                    print(mensaje)
+                    return
+            if estado == "pendiente":
+                # Fuera de los libros de triggers mientras se ejecuta, para
+                # que el monitor no la dispare también
+                ordenes_pendientes.pop(senal_id, None)
             if accion == "buy_now":
                 datos_senal['tipo'] = 'BUY'
             elif accion == "sell_now":
                 datos_senal['tipo'] = 'SELL'
                 
             # Ejecutar orden inmediatamente a mercado
-            ticket = await ejecutar_orden_mercado(datos_senal, senal_original)
+            senales_en_vuelo.add(senal_id)
+            try:
+                ticket = await ejecutar_orden_mercado(datos_senal, senal_original, cronometro)
+            finally:
+                senales_en_vuelo.discard(senal_id)
             if ticket:
                 senales_activas[senal_id] = {**datos_senal, 'ticket': ticket}
                 
                 # Remove from appropriate dictionary
-                if estado == "pendiente":
-                    del ordenes_pendientes[senal_id]
-                elif estado == "cancelada":
+                if estado == "cancelada":
                     del senales_canceladas[senal_id]
                     
                 mensaje = f"\n✅ Orden ejecutada inmediatamente a mercado (acción: {accion})\n"
@@ -1151,8 +1466,11 @@ async def procesar_mensaje(event):
                     "ticket": ticket,
                     "detalles": datos_senal,
                     "tipo_ejecucion": "mercado"
-                })
+                }, latencias=cronometro.resumen())
             else:
+                if estado == "pendiente":
+                    # Vuelve a vigilarse localmente (ya sin orden en el broker)
+                    ordenes_pendientes[senal_id] = datos_senal
                 mensaje = f"\n❌ Error al ejecutar la orden a mercado (acción: {accion})\n"
                 logger.error(mensaje)
                 print(mensaje)
@@ -1209,7 +1527,10 @@ async def procesar_mensaje(event):
             logger.info(mensaje)
             print(mensaje)
             
-            # Mover la señal a ordenes_pendientes
+            # Mover la señal a ordenes_pendientes (con orden en el broker si
+            # corresponde y no la tiene ya)
+            if MODO_PENDIENTES_BROKER and not datos_senal.get('orden_broker'):
+                await colocar_orden_broker(datos_senal)
             ordenes_pendientes[senal_id] = datos_senal
             
             # Eliminar de su estado anterior
@@ -1227,7 +1548,7 @@ async def procesar_mensaje(event):
                 "senal_id": senal_id,
                 "estado_anterior": estado_senal,
                 "detalles": datos_senal
-            })
+            }, latencias=cronometro.resumen())
             
             await listar_senales()
         else:
@@ -1251,6 +1572,16 @@ async def procesar_mensaje(event):
                 senal_id = senal_id_original
                 break
         
+        if senal_id in ordenes_pendientes and ordenes_pendientes[senal_id].get('orden_broker'):
+            if not await retirar_orden_broker(ordenes_pendientes[senal_id]):
+                # Ya ejecutada en el broker: pasa a activa y se cierra abajo
+                await reconciliar_ordenes_broker()
+                if senal_id in ordenes_pendientes:
+                    mensaje = f"\n❌ No se pudo retirar la orden pendiente de {senal_id} del broker\n"
+                    logger.error(mensaje)
+                    print(mensaje)
+                    return
+
         if senal_id in ordenes_pendientes:
             # Guardar la señal cancelada antes de eliminarla
             senales_canceladas[senal_id] = ordenes_pendientes[senal_id]
@@ -1261,7 +1592,7 @@ async def procesar_mensaje(event):
             log_accion("cancelacion", accion, senal_original, {
                 "referencia": senal_id,
                 "motivo": accion
-            })
+            }, latencias=cronometro.resumen())
             return
 
         if senal_id in senales_activas:
@@ -1279,7 +1610,7 @@ async def procesar_mensaje(event):
                 "referencia": senal_id,
                 "motivo": accion,
                 "detalles_orden": original
-            })
+            }, latencias=cronometro.resumen())
             await listar_senales()
             return
 
@@ -1289,7 +1620,7 @@ async def procesar_mensaje(event):
         print(mensaje)
         log_accion("tp", accion, senal_original, {
             "mensaje": texto
-        })
+        }, latencias=cronometro.resumen())
         return
 
     # Manejar acciones de cerrar y break even
@@ -1318,16 +1649,13 @@ async def procesar_mensaje(event):
                 
             try:
                 if accion == "cerrar":
-                    exito = await cerrar_orden_con_reintentos(ticket)
+                    exito = (await cerrar_senales([senal_id]))[senal_id]
                     if exito:
                         mensaje = "\n✅ Orden cerrada exitosamente\n"
                         logger.info(mensaje)
                         print(mensaje)
-                        del senales_activas[senal_id]
                 else:  # be
-                    conectar()
-                    exito = mover_sl_be(ticket)
-                    cerrar()
+                    exito = (await mover_be_senales([senal_id]))[senal_id]
                     if exito:
                         mensaje = "✅ Break even ejecutado exitosamente"
                         logger.info(mensaje)
@@ -1346,7 +1674,7 @@ async def procesar_mensaje(event):
             log_accion("actualizacion", accion, senal_original, {
                 "referencia": senal_id,
                 "detalles_orden": original
-            })
+            }, latencias=cronometro.resumen())
             await listar_senales()
             return
 
@@ -1357,7 +1685,7 @@ async def procesar_mensaje(event):
     if accion == "perdida":
         log_accion("perdida", accion, senal_original, {
             "mensaje": texto
-        })
+        }, latencias=cronometro.resumen())
         await listar_senales()
         return
 
@@ -1484,6 +1812,14 @@ class MonitorTask:
         task (asyncio.Task): Tarea asíncrona del monitor
         interval (int): Intervalo en segundos entre mensajes de estado
         last_check (float): Timestamp del último chequeo
+        suscripcion (Suscripcion): Suscripción al bus de ticks
+        task_reconciliacion (asyncio.Task): Reconciliación de órdenes del
+            broker (solo con MODO_PENDIENTES_BROKER)
+        task_proteccion (asyncio.Task): Break-even y trailing automáticos
+            (solo con PROTECCION_AUTOMATICA)
+        task_salud (asyncio.Task): Medición de lag del loop y edad de ticks
+        procesos (MonitorProcesos): Procesos de monitoreo (solo con
+            MONITOR_PROCESOS); reemplazan a la suscripción al bus
     """
     
     def __init__(self, interval=300):  # Changed from 20 to 300 seconds (5 minutes)
@@ -1498,13 +1834,78 @@ class MonitorTask:
         self.interval = interval
         self.last_check = 0
         self.silent_mode = False  # New flag to control message visibility
+        self.suscripcion = None
+        self.task_reconciliacion = None
+        self.task_proteccion = None
+        self.task_salud = None
+        self.procesos = None
+        self._edades_procesos = {}  # proceso -> edades de ticks informadas
+        self._reintentos = {}  # msg_id -> time.monotonic() desde el que puede volver a dispararse
+        self._cierres = set()  # Tareas que cierran posiciones duplicadas
+        ordenes_pendientes.observar(self._orden_agregada, self._orden_quitada)
+
+    def _orden_agregada(self, msg_id, datos):
+        """Una orden nueva o modificada se evalúa con el próximo tick"""
+        self._reintentos.pop(msg_id, None)
+        bus_ticks.despertar(datos.get('simbolo'))
+
+    def _orden_quitada(self, msg_id, datos):
+        self._reintentos.pop(msg_id, None)
+
+    def en_espera(self, msg_id, ahora=None):
+        """Si la orden falló hace menos de DISPARO_ESPERA_REINTENTO segundos"""
+        hasta = self._reintentos.get(msg_id)
+        return hasta is not None and hasta > (time.monotonic() if ahora is None else ahora)
+
+    def distancia_trigger(self, symbol, bid, ask):
+        """Distancia al trigger más cercano; 0 si quedó una orden alcanzada sin ejecutar"""
+        ahora = time.monotonic()
+        for msg_id in libros_triggers.disparados(symbol, bid, ask):
+            if msg_id in ordenes_pendientes and not self.en_espera(msg_id, ahora):
+                return 0
+        return libros_triggers.distancia(symbol, bid, ask)
+
+    def descartar_orden(self, msg_id, motivo):
+        """Cancela una orden pendiente cuyos niveles ya no pueden enviarse"""
+        datos = ordenes_pendientes.pop(msg_id, None)
+        if datos is None:
+            return
+        senales_canceladas[msg_id] = {**datos, 'rechazo': motivo}
+        log_mensaje(f"⚠️ Orden {msg_id} cancelada, sus niveles ya no pueden enviarse: {motivo}", nivel='warning')
+
+    def _enviar_a_procesos(self, msg_id, datos):
+        """Las órdenes colocadas en el broker no se vigilan"""
+        if not datos.get('orden_broker'):
+            self.procesos.agregar(msg_id, datos)
 
     async def start(self):
         """
         Inicia la tarea de monitoreo.
-        Crea una nueva tarea asíncrona para ejecutar el monitor.
+        Se suscribe al bus de ticks por los símbolos con órdenes pendientes
+        (o, con MONITOR_PROCESOS, lanza los procesos de monitoreo y les
+        reenvía las órdenes) y crea una nueva tarea asíncrona para ejecutar
+        el monitor.
         """
+        if MONITOR_PROCESOS:
+            self.procesos = MonitorProcesos(
+                MONITOR_PROCESOS, MONITOR_TERMINALES,
+                intervalo_min=MONITOR_INTERVALO_MIN, intervalo_max=MONITOR_INTERVALO_MAX,
+                espera_reintento=DISPARO_ESPERA_REINTENTO,
+                directorio_ticks=TICKS_DIR if GRABAR_TICKS else None
+            )
+            self.procesos.iniciar()
+            ordenes_pendientes.observar(self._enviar_a_procesos, self.procesos.quitar)
+        else:
+            self.suscripcion = bus_ticks.suscribir(
+                'monitor', libros_triggers.simbolos, distancia=self.distancia_trigger
+            )
+        await bus_ticks.iniciar()
         self.task = asyncio.create_task(self.run())
+        if MODO_PENDIENTES_BROKER:
+            self.task_reconciliacion = asyncio.create_task(self.reconciliar())
+        if PROTECCION_AUTOMATICA:
+            self.task_proteccion = asyncio.create_task(self.proteger())
+        self.task_salud = asyncio.create_task(self.vigilar_salud())
         mensaje = "\n✅ Monitor de precios iniciado\n"
         logger.info(mensaje)
         print(mensaje)
@@ -1514,6 +1915,14 @@ class MonitorTask:
         Detiene la tarea de monitoreo.
         Cancela la tarea asíncrona y espera a que termine.
         """
+        if self.suscripcion:
+            bus_ticks.desuscribir(self.suscripcion)
+        if self.task_reconciliacion:
+            self.task_reconciliacion.cancel()
+        if self.task_proteccion:
+            self.task_proteccion.cancel()
+        if self.task_salud:
+            self.task_salud.cancel()
         if self.task:
             self.running = False
             self.task.cancel()
@@ -1523,78 +1932,330 @@ class MonitorTask:
                 mensaje = "✅ Monitor de precios detenido"
                 logger.info(mensaje)
                 print(mensaje)
+        if self.procesos:
+            await asyncio.get_running_loop().run_in_executor(None, self.procesos.detener)
+            self.procesos = None
 
-    async def check_prices(self):
+    async def check_prices(self, actualizaciones):
         """
-        Verifica los precios actuales y ejecuta órdenes pendientes.
+        Evalúa los ticks recibidos del bus y ejecuta órdenes pendientes.
         
-        Verifica cada orden pendiente y la ejecuta si se alcanza el precio objetivo.
-        Maneja la conexión a MT5 y el logging de eventos.
+        Todas las actualizaciones disponibles se evalúan juntas contra los
+        triggers: el bid máximo y el ask mínimo de cada símbolo (acumulados
+        por el bus aunque se hayan descartado ticks) activan toda orden
+        tocada entre dos chequeos. Maneja el logging de eventos.
+        
+        Args:
+            actualizaciones (list): ActualizacionTicks recibidas del bus
         """
+        self.reportar_estado()
+
+        if ordenes_pendientes and actualizaciones:
+            try:
+                # SELL se activa con el bid, BUY con el ask
+                extremos = {a.simbolo: (a.bid_maximo, a.ask_minimo) for a in actualizaciones}
+                disparados = libros_triggers.disparados_lote(extremos)
+                detectado = time.perf_counter()
+                ahora = time.monotonic()
+                for msg_id in disparados:
+                    datos = ordenes_pendientes.get(msg_id)
+                    if not datos or self.en_espera(msg_id, ahora):
+                        continue
+                    bid_maximo, ask_minimo = extremos[datos['simbolo']]
+                    precio_actual = bid_maximo if datos['tipo'] == 'SELL' else ask_minimo
+                    await self.ejecutar_disparo(msg_id, datos, precio_actual, detectado)
+            except Exception as e:
+                log_mensaje(f"Error en MT5: {e}", nivel='error')
+
+    def reportar_estado(self):
+        """Mensaje de estado periódico (cada `interval` segundos)"""
         current_time = time.time()
         if current_time - self.last_check >= self.interval and not self.silent_mode:
-            mensaje = f"\n{'=' * 50}\n⏰ {get_timestamp()}\nMonitor activo, verificando {len(ordenes_pendientes)} órdenes pendientes...\n{'=' * 50}"
+            mensaje = f"\n{'=' * 50}\n⏰ {get_timestamp()}\nMonitor activo, verificando {len(ordenes_pendientes)} órdenes pendientes...\n🩺 {salud_monitor.resumen()}\n{'=' * 50}"
             logger.info(mensaje)
             print(mensaje)
             self.last_check = current_time
 
-        if ordenes_pendientes:
+    async def ejecutar_disparo(self, msg_id, datos, precio_actual, detectado=None):
+        """
+        Ejecuta a mercado una orden pendiente cuyo precio fue alcanzado.
+        
+        Si la apertura falla, la orden no se vuelve a disparar hasta pasados
+        DISPARO_ESPERA_REINTENTO segundos; si falla porque su SL/TP quedó del
+        lado equivocado del precio, se cancela.
+        
+        Args:
+            msg_id (int): ID del mensaje de la señal
+            datos (dict): Datos de la orden pendiente
+            precio_actual (float): Precio que activó la orden
+            detectado (float): time.perf_counter() al detectar el trigger
+        """
+        if msg_id in senales_en_vuelo:
+            return  # Ya se está ejecutando (acción manual o disparo anterior)
+        senales_en_vuelo.add(msg_id)
+        try:
+            comparacion = ">=" if datos['tipo'] == 'SELL' else "<="
+            log_mensaje(f"🎯 Precio alcanzado para {datos['tipo']}: {precio_actual} {comparacion} {datos['entrada']}")
+            ticket = await ejecutor.ejecutar(
+                abrir_orden,
+                symbol=datos['simbolo'],
+                order_type=datos['tipo'],
+                lotes=0.1,
+                sl=datos.get('sl'),
+                tp=datos.get('tp')
+            )
+            if detectado is not None:
+                salud_monitor.registrar('disparo_a_envio', (time.perf_counter() - detectado) * 1000)
+            if ticket:
+                log_mensaje(f"✅ Orden ejecutada en precio objetivo: {datos['entrada']}")
+                senales_activas[msg_id] = {**datos, 'ticket': ticket}
+                ordenes_pendientes.pop(msg_id, None)  # Pudo cancelarse mientras se enviaba
+                return
+            # Niveles del lado equivocado del precio: reintentar no sirve
+            motivo = await ejecutor.ejecutar(
+                motivo_niveles_invalidos, datos['simbolo'], datos['tipo'], datos.get('sl'), datos.get('tp')
+            )
+            if motivo:
+                self.descartar_orden(msg_id, motivo)
+                return
+        except Exception as e:
+            log_mensaje(f"Error procesando orden {msg_id}: {e}", nivel='error')
+        finally:
+            senales_en_vuelo.discard(msg_id)
+        if msg_id in ordenes_pendientes:
+            self._reintentos[msg_id] = time.monotonic() + DISPARO_ESPERA_REINTENTO
+
+    async def vigilar_salud(self):
+        """
+        Mide el lag del event loop y la edad de los ticks de cada símbolo.
+        
+        El lag es cuánto tarda en despertar un sleep de SALUD_INTERVALO
+        segundos más allá de lo pedido: si el loop está bloqueado (o el
+        monitor atrasado) crece y salud_monitor emite una alarma.
+        """
+        loop = asyncio.get_running_loop()
+        while self.running:
             try:
-                conectar()
-                for msg_id, datos in list(ordenes_pendientes.items()):
-                    try:
-                        symbol = datos['simbolo']
-                        # En modo mock, simulamos el precio actual
-                        precio_actual = datos['entrada']  # Para testing
-
-                        if datos['tipo'] == 'SELL' and precio_actual >= datos['entrada']:
-                            log_mensaje(f"🎯 Precio alcanzado para SELL: {precio_actual} >= {datos['entrada']}")
-                            ticket = abrir_orden(
-                                symbol=datos['simbolo'],
-                                order_type='SELL',
-                                lotes=0.1,
-                                sl=datos.get('sl'),
-                                tp=datos.get('tp')
-                            )
-                            if ticket:
-                                log_mensaje(f"✅ Orden ejecutada en precio objetivo: {datos['entrada']}")
-                                senales_activas[msg_id] = {**datos, 'ticket': ticket}
-                                del ordenes_pendientes[msg_id]
-
-                        elif datos['tipo'] == 'BUY' and precio_actual <= datos['entrada']:
-                            log_mensaje(f"🎯 Precio alcanzado para BUY: {precio_actual} <= {datos['entrada']}")
-                            ticket = abrir_orden(
-                                symbol=datos['simbolo'],
-                                order_type='BUY',
-                                lotes=0.1,
-                                sl=datos.get('sl'),
-                                tp=datos.get('tp')
-                            )
-                            if ticket:
-                                mensaje = f"✅ Orden ejecutada en precio objetivo: {datos['entrada']}"
-                                logger.info(mensaje)
-                                print(mensaje)
-                                senales_activas[msg_id] = {**datos, 'ticket': ticket}
-                                del ordenes_pendientes[msg_id]
-
-                    except Exception as e:
-                        log_mensaje(f"Error procesando orden {msg_id}: {e}", nivel='error')
+                inicio = loop.time()
+                await asyncio.sleep(SALUD_INTERVALO)
+                lag_ms = max(loop.time() - inicio - SALUD_INTERVALO, 0) * 1000
+                salud_monitor.registrar('lag_loop', lag_ms)
+                edades = bus_ticks.edades_ms()
+                for edades_proceso in self._edades_procesos.values():
+                    edades.update(edades_proceso)
+                salud_monitor.revisar_ticks(edades)
+            except asyncio.CancelledError:
+                break
             except Exception as e:
-                log_mensaje(f"Error en MT5: {e}", nivel='error')
-            finally:
-                cerrar()
+                log_mensaje(f"Error midiendo salud del monitor: {e}", nivel='error')
+
+    async def reconciliar(self):
+        """
+        Detecta las entradas que el broker ya ejecutó.
+        
+        Las órdenes pendientes del broker no necesitan ticks: solo se consulta
+        su estado cada RECONCILIACION_INTERVALO segundos.
+        """
+        while self.running:
+            try:
+                await reconciliar_ordenes_broker()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log_mensaje(f"Error reconciliando órdenes del broker: {e}", nivel='error')
+            await asyncio.sleep(RECONCILIACION_INTERVALO)
+
+    async def proteger(self):
+        """
+        Aplica break-even y trailing a todas las señales activas.
+        
+        Por cada lote de ticks del bus: un barrido de posiciones (como mucho
+        uno cada POSICIONES_MAX_EDAD_MS), evaluación de las reglas de todos
+        los símbolos recibidos y un único modificar_posiciones con todos los
+        SL que avanzan.
+        """
+        suscripcion = bus_ticks.suscribir(
+            'proteccion', motor_proteccion.simbolos, distancia=motor_proteccion.distancia
+        )
+        try:
+            while self.running:
+                try:
+                    primera = await suscripcion.obtener()
+                    actualizaciones = [primera] + suscripcion.obtener_pendientes()
+                    posiciones, simbolos = await ejecutor.ejecutar(
+                        _leer_posiciones_proteccion, motor_proteccion.tickets()
+                    )
+                    motor_proteccion.sincronizar(posiciones, simbolos)
+
+                    cambios = {}
+                    for actualizacion in actualizaciones:
+                        ultimo = actualizacion.ultimo
+                        cambios.update(motor_proteccion.evaluar(actualizacion.simbolo, ultimo.bid, ultimo.ask))
+                    if not cambios:
+                        continue
+
+                    resultados = await ejecutor.ejecutar(modificar_posiciones, cambios)
+                    motor_proteccion.confirmar(resultados)
+                    for ticket, exito in resultados.items():
+                        if exito:
+                            log_mensaje(f"🛡️ SL de la posición {ticket} movido a {cambios[ticket]['sl']}")
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    log_mensaje(f"Error en protección automática: {e}", nivel='error')
+                    await asyncio.sleep(5)  # Esperar antes de reintentar
+        finally:
+            bus_ticks.desuscribir(suscripcion)
+
+    def procesar_evento(self, evento):
+        """
+        Aplica un evento de los procesos de monitoreo (ver monitor_procesos.py).
+        
+        Args:
+            evento (tuple): (tipo, proceso, ...)
+        """
+        tipo, proceso = evento[0], evento[1]
+        if tipo == 'disparo':
+            _, _, msg_id, precio_actual = evento
+            senales_en_vuelo.add(msg_id)  # Hasta su 'ejecutada' o 'fallida'
+            datos = ordenes_pendientes.get(msg_id)
+            if datos:
+                comparacion = ">=" if datos['tipo'] == 'SELL' else "<="
+                log_mensaje(f"🎯 Precio alcanzado para {datos['tipo']}: {precio_actual} {comparacion} {datos['entrada']} (proceso {proceso})")
+        elif tipo == 'ejecutada':
+            _, _, msg_id, ticket, ms, datos = evento
+            senales_en_vuelo.discard(msg_id)
+            salud_monitor.registrar('disparo_a_envio', ms)
+            self.registrar_ejecutada(msg_id, ticket, datos, proceso)
+        elif tipo == 'fallida':
+            senales_en_vuelo.discard(evento[2])
+            salud_monitor.registrar('disparo_a_envio', evento[3])
+            log_mensaje(f"Error ejecutando orden {evento[2]} en el proceso {proceso}", nivel='error')
+        elif tipo == 'rechazada':
+            _, _, msg_id, motivo, ms = evento
+            senales_en_vuelo.discard(msg_id)
+            salud_monitor.registrar('disparo_a_envio', ms)
+            self.descartar_orden(msg_id, motivo)
+        elif tipo == 'salud':
+            if evento[2]['ciclo_ms'] is not None:
+                salud_monitor.registrar('ciclo', evento[2]['ciclo_ms'])
+            self._edades_procesos[proceso] = evento[2]['edades_ms']
+        elif tipo == 'error':
+            log_mensaje(f"Proceso de monitoreo {proceso}: {evento[2]}", nivel='error')
+
+    def registrar_ejecutada(self, msg_id, ticket, datos, proceso):
+        """
+        Pasa a senales_activas una orden que abrió un proceso de monitoreo.
+        
+        Args:
+            msg_id (int): ID del mensaje de la señal
+            ticket (int): Ticket de la posición abierta
+            datos (dict): Datos de la orden según el proceso
+            proceso (int): Índice del proceso que la abrió
+        """
+        if msg_id in ordenes_pendientes:
+            datos = ordenes_pendientes[msg_id]
+            log_mensaje(f"✅ Orden ejecutada en precio objetivo: {datos['entrada']}")
+            senales_activas[msg_id] = {**datos, 'ticket': ticket}
+            del ordenes_pendientes[msg_id]
+        elif msg_id in senales_activas and senales_activas[msg_id].get('ticket') != ticket:
+            # Una entrada manual (hit_entry, buy_now...) ya abrió la señal:
+            # pisarla dejaría su posición sin seguimiento
+            anterior = senales_activas[msg_id]['ticket']
+            log_mensaje(f"⚠️ Orden {msg_id} ejecutada por el proceso {proceso} (ticket {ticket}) pero la señal ya "
+                        f"tiene la posición {anterior}: se cierra la duplicada", nivel='warning')
+            tarea = asyncio.create_task(self.cerrar_duplicada(msg_id, ticket))
+            self._cierres.add(tarea)
+            tarea.add_done_callback(self._cierres.discard)
+        elif msg_id not in senales_activas:
+            # Cancelada mientras el proceso la ejecutaba: la posición existe igual
+            log_mensaje(f"⚠️ Orden {msg_id} ejecutada (ticket {ticket}) después de salir de pendientes", nivel='warning')
+            senales_activas[msg_id] = {**datos, 'ticket': ticket}
+
+    async def relanzar_procesos(self, caidos):
+        """
+        Relanza los procesos de monitoreo caídos sin disparar dos veces sus órdenes.
+        
+        Primero se atienden los eventos que quedaron en la cola. Las órdenes
+        del shard que siguen pendientes dejan de estar en vuelo (su resultado
+        ya no llegará) y se buscan en MT5 por su comentario_orden: las que
+        el proceso caído llegó a abrir pasan a senales_activas y no se
+        reenvían. Si MT5 no responde no se relanza nada y se reintenta en la
+        próxima vuelta.
+        
+        Args:
+            caidos (list): Índices de los procesos que terminaron
+        """
+        for evento in self.procesos.eventos_pendientes():
+            self.procesar_evento(evento)
+        ordenes = {}
+        for indice in caidos:
+            ordenes.update({msg_id: (indice, datos) for msg_id, datos in self.procesos.ordenes_shard(indice).items()})
+        if ordenes:
+            comentarios = {comentario_orden(msg_id, datos['tipo']): msg_id for msg_id, (_, datos) in ordenes.items()}
+            abiertas = await ejecutor.ejecutar(posiciones_con_comentario, list(comentarios))
+            for msg_id in ordenes:
+                senales_en_vuelo.discard(msg_id)
+            for comentario, ticket in abiertas.items():
+                msg_id = comentarios[comentario]
+                indice, datos = ordenes[msg_id]
+                log_mensaje(f"⚠️ El proceso {indice} abrió la orden {msg_id} (ticket {ticket}) antes de caer", nivel='warning')
+                self.registrar_ejecutada(msg_id, ticket, datos, indice)
+        for indice in caidos:
+            self.procesos.relanzar(indice)
+            self._edades_procesos.pop(indice, None)
+
+    async def cerrar_duplicada(self, msg_id, ticket):
+        """Cierra una segunda posición abierta para la misma señal"""
+        if await cerrar_orden_con_reintentos(ticket):
+            log_mensaje(f"🗑️ Posición duplicada {ticket} de la señal {msg_id} cerrada")
+        else:
+            log_mensaje(f"❌ No se pudo cerrar la posición duplicada {ticket} de la señal {msg_id}, cerrarla a mano", nivel='error')
+
+    async def atender_procesos(self):
+        """
+        Bucle principal con MONITOR_PROCESOS: recibe los eventos de los
+        procesos de monitoreo, relanza los caídos y emite el mensaje de estado.
+        """
+        loop = asyncio.get_running_loop()
+        while self.running:
+            try:
+                evento = await loop.run_in_executor(None, self.procesos.proximo_evento, 1.0)
+                if evento is not None:
+                    self.procesar_evento(evento)
+                    for evento in self.procesos.eventos_pendientes():
+                        self.procesar_evento(evento)
+                caidos = self.procesos.caidos()
+                if caidos:
+                    await self.relanzar_procesos(caidos)
+                self.reportar_estado()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                if self.running:
+                    log_mensaje(f"❌ Error atendiendo procesos de monitoreo: {e}", nivel='error')
+                    await asyncio.sleep(5)  # Esperar antes de reintentar
 
     async def run(self):
         """
         Ejecuta el bucle principal de monitoreo.
         
-        Ejecuta check_prices() continuamente mientras el monitor esté activo.
-        Maneja errores y reintentos automáticamente.
+        Espera actualizaciones del bus de ticks y ejecuta check_prices() con
+        todas las disponibles. Sin ticks, despierta cada `interval` segundos
+        para el mensaje de estado. Maneja errores y reintentos automáticamente.
+        Con MONITOR_PROCESOS delega en atender_procesos().
         """
+        if self.procesos:
+            await self.atender_procesos()
+            return
         while self.running:
             try:
-                await self.check_prices()
-                await asyncio.sleep(1)  # Esperar 1 segundo entre verificaciones
+                try:
+                    primera = await asyncio.wait_for(self.suscripcion.obtener(), timeout=self.interval)
+                    actualizaciones = [primera] + self.suscripcion.obtener_pendientes()
+                except asyncio.TimeoutError:
+                    actualizaciones = []
+                await self.check_prices(actualizaciones)
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -1637,12 +2298,16 @@ async def cleanup(monitor=None):
     if monitor:
         try:
             await monitor.stop()
+            await bus_ticks.detener()
+            if grabador_ticks:
+                grabador_ticks.cerrar()
             log_mensaje("\n✅ Monitor detenido correctamente\n")
         except Exception as e:
             log_mensaje(f"❌ Error deteniendo monitor: {e}", nivel='error')
     try:
-        # Cerrar MT5
-        cerrar()
+        # Cerrar MT5 desde su hilo y detener el hilo
+        await ejecutor.ejecutar(cerrar)
+        ejecutor.cerrar()
         log_mensaje("✅ Conexión MT5 cerrada")
     except Exception as e:
         log_mensaje(f"❌ Error cerrando MT5: {e}", nivel='error')
@@ -1684,7 +2349,7 @@ async def main():
     # Crear monitor de precios
     monitor = MonitorTask()
     
-    if not test_mt5():
+    if not await test_mt5():
         log_mensaje("🚫 Terminando por error de MT5.", nivel='error')
         await cleanup(monitor)
         return
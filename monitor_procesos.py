@@ -0,0 +1,340 @@
+"""
+Monitoreo de Precios Multi-Proceso
+=================================
+
+Reparte los símbolos con órdenes pendientes entre varios procesos, cada uno
+con su propia sesión de MetaTrader 5 (el paquete permite un solo terminal
+por proceso). Así el ciclo de monitoreo escala con núcleos y terminales en
+lugar de depender de un único event loop.
+
+Componentes
+----------
+1. MonitorProcesos (proceso principal)
+   Lanza los procesos, les reenvía las altas y bajas de ordenes_pendientes
+   y recibe sus eventos.
+
+   ```python
+   procesos = MonitorProcesos(4, terminales=[r"C:\\MT5-1\\terminal64.exe", ...])
+   procesos.iniciar()
+   ordenes_pendientes.observar(procesos.agregar, procesos.quitar)
+
+   evento = procesos.proximo_evento(timeout=1.0)
+   # ('ejecutada', proceso, msg_id, ticket, disparo_a_envio_ms, datos)
+   eventos = procesos.eventos_pendientes()      # El resto, sin esperar
+
+   for indice in procesos.caidos():
+       # Antes: atender los eventos pendientes y quitar las órdenes de
+       # ordenes_shard(indice) que el proceso caído ya abrió
+       procesos.relanzar(indice)
+   ```
+
+2. Procesos de trabajo (_trabajador)
+   Cada uno mantiene sus propios libros de triggers, cursor de ticks y
+   planificador de sondeo, lee solo los símbolos de su shard y ejecuta las
+   órdenes alcanzadas con su propia sesión. Con `directorio_ticks` graba
+   los ticks que lee (utils/grabador_ticks.py).
+
+Eventos (proceso de trabajo -> principal)
+---------------------------------------
+```python
+('disparo', proceso, msg_id, precio)                # Trigger detectado
+('ejecutada', proceso, msg_id, ticket, ms, datos)   # Orden abierta; ms desde el disparo
+('fallida', proceso, msg_id, ms)                    # abrir_orden falló, sigue pendiente
+('rechazada', proceso, msg_id, motivo, ms)          # Niveles inválidos, ya no se vigila
+('salud', proceso, {'ciclo_ms': ..., 'edades_ms': {...}})
+('error', proceso, descripcion)
+```
+
+Notas Importantes
+---------------
+- El shard de un símbolo es crc32(símbolo) % procesos: estable entre
+  ejecuciones (hash() de Python cambia en cada proceso)
+- Con varios terminales todos deben estar logueados en la misma cuenta,
+  para que el proceso principal vea las posiciones que abren los demás
+- Con el simulador (MT5_BACKEND=simulador) cada proceso tiene su propio
+  estado: sirve para medir el reparto, no para compartir posiciones
+- Un proceso caído se relanza con las órdenes de su shard. Cada posición
+  lleva el comentario comentario_orden(msg_id, tipo): antes de relanzar, el
+  proceso principal busca en MT5 las que el caído ya abrió y las saca de
+  pendientes para no dispararlas dos veces
+- Una orden que falló no se vuelve a disparar hasta pasados
+  `espera_reintento` segundos
+"""
+
+import logging
+import multiprocessing
+import queue
+import time
+import zlib
+
+import mt5_client
+from utils.grabador_ticks import GrabadorTicks
+from utils.monitor import LibrosTriggers, PlanificadorSondeo, TriggersVectorizados, np
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántos segundos un proceso de trabajo informa su salud
+SALUD_INTERVALO = 5.0
+
+# Lotes por orden, igual que MonitorTask
+LOTES = 0.1
+
+
+def asignar_shard(simbolo, procesos):
+    """Índice del proceso que vigila `simbolo`"""
+    return zlib.crc32(simbolo.encode()) % procesos
+
+
+def comentario_orden(msg_id, tipo):
+    """Comentario de la posición que abre la orden `msg_id` (único por señal)"""
+    return f"{tipo} senal {msg_id}"
+
+
+class MonitorProcesos:
+    """
+    Lado principal del monitoreo multi-proceso.
+
+    `agregar` y `quitar` tienen la firma de observador de DiccionarioObservado.
+
+    Attributes:
+        procesos (int): Cantidad de procesos de trabajo
+        terminales (list): Ruta del terminal de cada proceso (se reparten en
+            ronda; vacío usa el terminal por defecto en todos)
+    """
+
+    def __init__(self, procesos, terminales=None, intervalo_min=0.05, intervalo_max=5.0, directorio_ticks=None,
+                 espera_reintento=5.0):
+        self.procesos = procesos
+        self.espera_reintento = espera_reintento
+        self.directorio_ticks = directorio_ticks
+        self.terminales = list(terminales or [])
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self._contexto = multiprocessing.get_context('spawn')
+        self._trabajadores = []
+        self._comandos = []
+        self.eventos = None
+        self._ordenes = {}  # msg_id -> datos, para relanzar un proceso caído
+
+    def shard(self, simbolo):
+        return asignar_shard(simbolo, self.procesos)
+
+    def _terminal(self, indice):
+        return self.terminales[indice % len(self.terminales)] if self.terminales else None
+
+    def _lanzar(self, indice):
+        proceso = self._contexto.Process(
+            target=_trabajador,
+            args=(indice, self._terminal(indice), self._comandos[indice], self.eventos,
+                  self.intervalo_min, self.intervalo_max, self.directorio_ticks, self.espera_reintento),
+            name=f"monitor-{indice}",
+            daemon=True
+        )
+        proceso.start()
+        return proceso
+
+    def iniciar(self):
+        """Lanza los procesos de trabajo"""
+        self.eventos = self._contexto.Queue()
+        self._comandos = [self._contexto.Queue() for _ in range(self.procesos)]
+        self._trabajadores = [self._lanzar(i) for i in range(self.procesos)]
+        logger.info(f"Monitor multi-proceso iniciado con {self.procesos} procesos")
+
+    def agregar(self, msg_id, datos):
+        simbolo = datos.get('simbolo')
+        if not simbolo:
+            return
+        self._ordenes[msg_id] = dict(datos)
+        self._comandos[self.shard(simbolo)].put(('agregar', msg_id, dict(datos)))
+
+    def quitar(self, msg_id, datos=None):
+        anterior = self._ordenes.pop(msg_id, None)
+        if anterior is not None:
+            self._comandos[self.shard(anterior['simbolo'])].put(('quitar', msg_id))
+
+    def proximo_evento(self, timeout=1.0):
+        """Próximo evento de cualquier proceso, o None si no llegó ninguno (bloqueante)"""
+        try:
+            return self.eventos.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def eventos_pendientes(self):
+        """Todos los eventos ya recibidos, sin esperar"""
+        eventos = []
+        while True:
+            try:
+                eventos.append(self.eventos.get_nowait())
+            except queue.Empty:
+                return eventos
+
+    def caidos(self):
+        """Índices de los procesos que terminaron"""
+        return [i for i, proceso in enumerate(self._trabajadores) if not proceso.is_alive()]
+
+    def ordenes_shard(self, indice):
+        """Órdenes vigiladas por el proceso `indice`: {msg_id: datos}"""
+        return {msg_id: datos for msg_id, datos in self._ordenes.items()
+                if self.shard(datos['simbolo']) == indice}
+
+    def relanzar(self, indice):
+        """
+        Relanza el proceso `indice` y le reenvía las órdenes de su shard.
+
+        Antes, quien llama debe atender los eventos que quedaron en la cola y
+        quitar las órdenes que el proceso caído ya abrió (ver
+        comentario_orden): las que sigan aquí se vuelven a vigilar.
+        """
+        proceso = self._trabajadores[indice]
+        logger.error(f"Proceso de monitoreo {indice} terminó (código {proceso.exitcode}), relanzando")
+        self._trabajadores[indice] = self._lanzar(indice)
+        for msg_id, datos in self.ordenes_shard(indice).items():
+            self._comandos[indice].put(('agregar', msg_id, dict(datos)))
+
+    def detener(self, timeout=5.0):
+        """Pide a cada proceso que cierre su sesión y espera que termine"""
+        for cola in self._comandos:
+            cola.put(('detener',))
+        for proceso in self._trabajadores:
+            proceso.join(timeout)
+            if proceso.is_alive():
+                proceso.terminate()
+        self._trabajadores = []
+
+
+def _trabajador(indice, terminal, comandos, eventos, intervalo_min, intervalo_max, directorio_ticks=None,
+                espera_reintento=5.0):
+    """
+    Bucle de un proceso de trabajo.
+
+    Espera comandos hasta el próximo sondeo vencido, lee incrementalmente los
+    ticks de los símbolos vencidos de su shard, ejecuta las órdenes alcanzadas
+    y reprograma cada símbolo según su distancia al trigger más cercano.
+    """
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s [monitor-{indice}] %(levelname)s: %(message)s')
+    mt5_client.sesion.terminal = terminal
+    mt5_client.cursor_ticks.max_retraso_ms = 3 * intervalo_max * 1000
+    libros = TriggersVectorizados() if np is not None else LibrosTriggers()
+    pendientes = {}
+    planificador = PlanificadorSondeo(intervalo_min, intervalo_max)
+    grabador = GrabadorTicks(directorio_ticks) if directorio_ticks else None
+    recibidos = {}  # simbolo -> monotonic del último tick nuevo
+    reintentos = {}  # msg_id -> monotonic desde el que puede volver a dispararse
+    ultimo_reporte = time.monotonic()
+    duracion_ms = None
+    espera = 0
+
+    while True:
+        # Los comandos se atienden mientras se espera el próximo sondeo
+        try:
+            comando = comandos.get(timeout=espera) if espera > 0 else comandos.get_nowait()
+        except queue.Empty:
+            comando = None
+        while comando is not None:
+            if comando[0] == 'detener':
+                if grabador is not None:
+                    grabador.cerrar()
+                mt5_client.cerrar()
+                return
+            msg_id = comando[1]
+            libros.quitar(msg_id)
+            pendientes.pop(msg_id, None)
+            reintentos.pop(msg_id, None)
+            if comando[0] == 'agregar':
+                datos = comando[2]
+                pendientes[msg_id] = datos
+                libros.agregar(msg_id, datos)
+                planificador.adelantar(datos['simbolo'])
+            try:
+                comando = comandos.get_nowait()
+            except queue.Empty:
+                comando = None
+
+        simbolos = libros.simbolos()
+        if not simbolos:
+            espera = intervalo_max
+            continue
+
+        try:
+            inicio = time.perf_counter()
+            mt5_client.sesion.asegurar()
+            lecturas = {}
+            for simbolo in planificador.vencidos(simbolos):
+                try:
+                    ticks = mt5_client.cursor_ticks.leer(simbolo)
+                except Exception as e:
+                    eventos.put(('error', indice, f"Error obteniendo precio de {simbolo}: {e}"))
+                    planificador.reprogramar(simbolo)
+                    continue
+                if ticks:
+                    lecturas[simbolo] = ticks
+                    recibidos[simbolo] = time.monotonic()
+                    if grabador is not None:
+                        grabador.grabar(simbolo, ticks)
+                else:
+                    planificador.reprogramar(simbolo)
+
+            # SELL se activa con el bid, BUY con el ask
+            extremos = {s: (max(t.bid for t in ticks), min(t.ask for t in ticks)) for s, ticks in lecturas.items()}
+            disparados = libros.disparados_lote(extremos)
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            ahora = time.monotonic()
+            for msg_id in disparados:
+                datos = pendientes.get(msg_id)
+                if not datos or reintentos.get(msg_id, 0) > ahora:
+                    continue
+                detectado = time.perf_counter()
+                bid_maximo, ask_minimo = extremos[datos['simbolo']]
+                eventos.put(('disparo', indice, msg_id, bid_maximo if datos['tipo'] == 'SELL' else ask_minimo))
+                ticket = mt5_client.abrir_orden(
+                    symbol=datos['simbolo'],
+                    order_type=datos['tipo'],
+                    lotes=LOTES,
+                    sl=datos.get('sl'),
+                    tp=datos.get('tp'),
+                    comentario=comentario_orden(msg_id, datos['tipo'])
+                )
+                ms = (time.perf_counter() - detectado) * 1000
+                if ticket:
+                    del pendientes[msg_id]
+                    libros.quitar(msg_id)
+                    reintentos.pop(msg_id, None)
+                    eventos.put(('ejecutada', indice, msg_id, ticket, ms, datos))
+                    continue
+                try:
+                    motivo = mt5_client.motivo_niveles_invalidos(
+                        datos['simbolo'], datos['tipo'], datos.get('sl'), datos.get('tp')
+                    )
+                except Exception:
+                    motivo = None
+                if motivo:
+                    # Reintentar no sirve: el proceso principal la cancela
+                    del pendientes[msg_id]
+                    libros.quitar(msg_id)
+                    reintentos.pop(msg_id, None)
+                    eventos.put(('rechazada', indice, msg_id, motivo, ms))
+                else:
+                    reintentos[msg_id] = time.monotonic() + espera_reintento
+                    eventos.put(('fallida', indice, msg_id, ms))
+
+            ahora = time.monotonic()
+            for simbolo, ticks in lecturas.items():
+                ultimo = ticks[-1]
+                alcanzadas = libros.disparados(simbolo, ultimo.bid, ultimo.ask)
+                if any(m in pendientes and reintentos.get(m, 0) <= ahora for m in alcanzadas):
+                    distancia = 0  # Quedó una orden alcanzada sin ejecutar
+                else:
+                    distancia = libros.distancia(simbolo, ultimo.bid, ultimo.ask)
+                planificador.programar(simbolo, ticks, distancia)
+            espera = planificador.espera(simbolos)
+        except Exception as e:
+            eventos.put(('error', indice, f"Error en MT5: {e}"))
+            espera = 5  # Esperar antes de reintentar
+
+        ahora = time.monotonic()
+        if ahora - ultimo_reporte >= SALUD_INTERVALO:
+            ultimo_reporte = ahora
+            eventos.put(('salud', indice, {
+                'ciclo_ms': duracion_ms,
+                'edades_ms': {s: (ahora - recibidos[s]) * 1000 if s in recibidos else None for s in simbolos}
+            }))
@@ -15,10 +15,10 @@ Características Principales
 Componentes del Sistema
 ---------------------
 
-1. Conexión a MT5 (conectar)
-   Establece la conexión con MetaTrader 5 y configura los símbolos de trading.
+1. Conexión a MT5 (SesionMT5 / conectar)
+   Mantiene una única sesión con MetaTrader 5 compartida por todo el sistema.
 
-   Proceso de Conexión:
+   Proceso de Conexión (solo la primera vez o tras una caída):
    ```python
    1. Cierra cualquier instancia existente
    2. Inicializa MT5
@@ -26,15 +26,26 @@ Componentes del Sistema
    4. Selecciona símbolos de trading
    ```
 
+   Antes de cada operación `sesion.asegurar()` verifica la salud del enlace
+   con `mt5.last_error()` y `mt5.terminal_info()`, sin repetir el login.
+
    Ejemplo de Uso:
    ```python
    try:
-       conectar()
+       sesion.asegurar()  # Conecta solo si hace falta
        print("Conectado a MT5")
    except Exception as e:
        print(f"Error de conexión: {e}")
-   finally:
-       cerrar()  # Siempre cerrar la conexión
+
+   # Al finalizar el programa
+   cerrar()
+   ```
+
+   Desde código asíncrono todas las llamadas pasan por `ejecutor`, un único
+   hilo dueño de la API de MT5 (que no es thread-safe):
+   ```python
+   await ejecutor.ejecutar(sesion.asegurar)
+   ticket = await ejecutor.ejecutar(abrir_orden, "EURUSD", "BUY", 0.1, timeout=5)
    ```
 
 2. Apertura de Órdenes (abrir_orden)
@@ -70,6 +81,10 @@ Componentes del Sistema
 
    Características Especiales:
    - Ajuste automático de SL/TP basado en distancias
+   - Validación local antes de enviar (validar_niveles): precios normalizados
+     a los dígitos del símbolo, SL/TP llevados a la distancia mínima del
+     stops level y volumen redondeado al paso del símbolo
+   - Opcionalmente `mt5.order_check` (VALIDAR_CON_ORDER_CHECK)
    - Manejo de desviaciones de precio
    - Comentarios personalizados en órdenes
 
@@ -111,6 +126,31 @@ Componentes del Sistema
        print("Error moviendo Stop Loss")
    ```
 
+5. Operaciones en Lote (cerrar_ordenes / modificar_posiciones / mover_sl_be_varios)
+   Construyen todas las solicitudes de antemano (un barrido de posiciones y
+   un tick por símbolo) y las envían seguidas sobre la misma sesión.
+
+   Ejemplo de Uso:
+   ```python
+   resultados = cerrar_ordenes([1001, 1002, 1003])
+   # {1001: True, 1002: True, 1003: False}
+
+   mover_sl_be_varios(tickets)
+   modificar_posiciones({1001: {"sl": 1.0480, "tp": None}})
+   ```
+
+6. Órdenes Pendientes en el Broker (colocar_pendiente / cancelar_pendientes / estado_pendientes)
+   Dejan la entrada de una señal como orden LIMIT en el servidor, que la
+   ejecuta sin depender del sondeo de precios local.
+
+   Ejemplo de Uso:
+   ```python
+   orden = colocar_pendiente("XAUUSD", "BUY", 0.1, entrada=1995.0, sl=1990.0, tp=2010.0)
+   estado_pendientes([orden])   # {orden: 'pendiente' | 'ejecutada' | 'desaparecida'}
+   cancelar_pendientes([orden])  # {orden: True}
+   ```
+   Al ejecutarse, la posición conserva el ticket de la orden.
+
 Escenarios de Uso Común
 ---------------------
 
@@ -150,9 +190,8 @@ Escenarios de Uso Común
            if ticket:
                tickets.append(ticket)
                
-       # Cerrar todas las órdenes
-       for ticket in tickets:
-           cerrar_orden(ticket)
+       # Cerrar todas las órdenes en un solo lote
+       cerrar_ordenes(tickets)
            
    finally:
        cerrar()
@@ -181,12 +220,18 @@ Escenarios de Uso Común
        cerrar()
    ```
 
+Backend de MT5
+------------
+El paquete `MetaTrader5` solo funciona en Windows con un terminal abierto.
+Con `MT5_BACKEND=simulador` se usa `mt5_simulador`, que expone la misma API
+con latencia y fallos configurables para pruebas y mediciones en Linux.
+
 Notas Importantes
 ---------------
 1. Gestión de Conexión:
-   - Siempre usar try/finally para cerrar conexión
-   - Verificar estado de conexión antes de operaciones
-   - Manejar reconexiones automáticas
+   - Reutilizar la sesión compartida (`sesion`), no cerrar tras cada operación
+   - Verificar estado de conexión antes de operaciones (`sesion.asegurar()`)
+   - Cerrar la sesión solo al finalizar el programa
 
 2. Gestión de Órdenes:
    - Verificar resultados de operaciones
@@ -207,11 +252,26 @@ Versión: 1.0.0
 Autor: Fran
 Última actualización: 2024-01-01
 """
-import MetaTrader5 as mt5
+import asyncio
+import functools
+import math
+import os
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 import logging
 
+# MT5 backend: "terminal" (MetaTrader5 package, Windows only) or "simulador"
+# (in-process simulator for Linux, tests and load runs)
+MT5_BACKEND = os.environ.get("MT5_BACKEND", "terminal")
+
+if MT5_BACKEND == "simulador":
+    import mt5_simulador as mt5
+else:
+    import MetaTrader5 as mt5
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -223,46 +283,643 @@ logger = logging.getLogger(__name__)
 MT5_LOGIN = 123
 MT5_PASSWORD = ""
 MT5_SERVER = "MetaQuotes-Demo"
+# Path to terminal64.exe, None lets MetaTrader5 pick the installed terminal
+MT5_TERMINAL = None
 
-def conectar():
-    """Initialize and connect to MT5"""
-    try:
-        # Shutdown any existing instance
+# Default timeout (seconds) for calls routed through the MT5 worker thread
+MT5_TIMEOUT = 10.0
+
+# Maximum age (ms) of a cached tick before it is fetched again
+TICK_MAX_EDAD_MS = 100
+
+# Maximum ticks fetched per symbol in one copy_ticks_from call
+TICKS_POR_LECTURA = 1000
+
+# A tick cursor older than this (ms) restarts from the current tick instead of
+# replaying history that predates the orders now waiting on it. Must stay well
+# above the slowest poll interval, or every slow read drops its ticks
+TICKS_MAX_RETRASO_MS = 15000
+
+# Maximum age (ms) of the position index before a new positions_get() sweep
+POSICIONES_MAX_EDAD_MS = 500
+
+# Magic number identifying the orders opened by this bot
+MAGIC_NUMBER = 234000
+
+# Latency budget (ms) for one order operation, retries included
+PRESUPUESTO_ORDEN_MS = 1500
+
+# Also run mt5.order_check before opening (one extra round-trip, catches margin issues)
+VALIDAR_CON_ORDER_CHECK = False
+
+# IPC error codes reported by mt5.last_error() when the link to the terminal is gone
+_ERRORES_IPC = {-10001, -10002, -10003, -10004, -10005}
+
+
+class SesionMT5:
+    """
+    Long-lived MT5 session shared by every caller.
+
+    Connects once and checks health cheaply through last_error() and
+    terminal_info(); the full shutdown/initialize/login cycle only runs
+    again when the link to the terminal has dropped.
+    """
+
+    def __init__(self, login=MT5_LOGIN, password=MT5_PASSWORD, server=MT5_SERVER, symbols=None, terminal=MT5_TERMINAL):
+        self.login = login
+        self.password = password
+        self.server = server
+        self.terminal = terminal  # One terminal per process: each worker may use its own
+        self.symbols = symbols or ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
+        self.conectada = False
+        self.reconexiones = 0
+
+    def esta_sana(self) -> bool:
+        """Cheap health check, no login round-trip"""
+        if not self.conectada:
+            return False
+
+        codigo, _ = mt5.last_error()
+        if codigo in _ERRORES_IPC:
+            return False
+
+        info = mt5.terminal_info()
+        return info is not None and info.connected
+
+    def asegurar(self) -> bool:
+        """Make sure the session is usable, reconnecting only if the link dropped"""
+        if self.esta_sana():
+            return True
+
+        if self.conectada:
+            logger.warning(f"MT5 link lost ({mt5.last_error()}), reconnecting")
+            self.reconexiones += 1
+
+        return self.conectar()
+
+    def conectar(self) -> bool:
+        """Initialize and connect to MT5"""
+        try:
+            # Shutdown any existing instance
+            self.conectada = False
+            mt5.shutdown()
+
+            # Initialize MT5
+            iniciado = mt5.initialize(self.terminal) if self.terminal else mt5.initialize()
+            if not iniciado:
+                raise Exception(f"Failed to initialize MT5: {mt5.last_error()}")
+
+            # Login to MT5
+            authorized = mt5.login(
+                login=self.login,
+                password=self.password,
+                server=self.server
+            )
+
+            if not authorized:
+                raise Exception(f"Failed to login to MT5: {mt5.last_error()}")
+
+            self.conectada = True
+
+            # Symbol metadata may have changed while we were disconnected:
+            # reload it, which also selects the symbols we'll be trading
+            registro_simbolos.invalidar()
+            cache_ticks.invalidar()
+            indice_posiciones.invalidar()
+            for symbol in self.symbols:
+                try:
+                    registro_simbolos.obtener(symbol)
+                except Exception as e:
+                    logger.warning(f"Failed to select symbol {symbol}: {e}")
+
+            logger.info("MT5 connected successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error connecting to MT5: {e}")
+            mt5.shutdown()
+            raise
+
+    def cerrar(self):
+        """Shutdown MT5 connection"""
+        self.conectada = False
         mt5.shutdown()
-        
-        # Initialize MT5
-        if not mt5.initialize():
-            raise Exception(f"Failed to initialize MT5: {mt5.last_error()}")
-        
-        # Login to MT5
-        authorized = mt5.login(
-            login=MT5_LOGIN,
-            password=MT5_PASSWORD,
-            server=MT5_SERVER
-        )
-        
-        if not authorized:
-            raise Exception(f"Failed to login to MT5: {mt5.last_error()}")
-            
-        # Initialize symbols we'll be trading
-        symbols = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY"]
-        for symbol in symbols:
+
+
+@dataclass(frozen=True)
+class InfoSimbolo:
+    """Trading constraints of a symbol, loaded once from mt5.symbol_info"""
+    nombre: str
+    point: float
+    digits: int
+    volume_min: float
+    volume_max: float
+    volume_step: float
+    stops_level: int
+    filling_mode: int
+
+    @property
+    def distancia_minima(self) -> float:
+        """Minimum SL/TP distance from the current price, in price units"""
+        return self.stops_level * self.point
+
+    @property
+    def tipo_filling(self) -> int:
+        """Preferred filling policy supported by the symbol (IOC, then FOK)"""
+        if self.filling_mode & mt5.SYMBOL_FILLING_IOC:
+            return mt5.ORDER_FILLING_IOC
+        if self.filling_mode & mt5.SYMBOL_FILLING_FOK:
+            return mt5.ORDER_FILLING_FOK
+        return mt5.ORDER_FILLING_RETURN
+
+    def normalizar_precio(self, precio: float) -> float:
+        """Round a price to the symbol digits"""
+        return round(precio, self.digits)
+
+    def normalizar_volumen(self, volumen: float) -> float:
+        """Round a volume down to the volume step, clamped to min/max"""
+        # Epsilon so 0.3 / 0.1 = 2.9999999999999996 still counts as 3 steps
+        pasos = math.floor(volumen / self.volume_step + 1e-9)
+        volumen = round(pasos * self.volume_step, 8)
+        return min(max(volumen, self.volume_min), self.volume_max)
+
+
+class RegistroSimbolos:
+    """
+    Cache of InfoSimbolo per symbol.
+
+    symbol_info is only queried the first time a symbol is used, after a
+    session reconnect, or after an explicit invalidar().
+    """
+
+    def __init__(self):
+        self._simbolos = {}
+
+    def obtener(self, symbol: str) -> InfoSimbolo:
+        """Return cached metadata for symbol, loading it on first use"""
+        info = self._simbolos.get(symbol)
+        if info is None:
+            info = self._cargar(symbol)
+            self._simbolos[symbol] = info
+        return info
+
+    def invalidar(self, symbol: str = None):
+        """Drop one symbol (or all of them) so it is reloaded on next use"""
+        if symbol is None:
+            self._simbolos.clear()
+        else:
+            self._simbolos.pop(symbol, None)
+
+    def _cargar(self, symbol: str) -> InfoSimbolo:
+        raw = mt5.symbol_info(symbol)
+        if raw is None or not raw.visible:
             if not mt5.symbol_select(symbol, True):
-                logger.warning(f"Failed to select symbol {symbol}")
-        
-        logger.info("MT5 connected successfully")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error connecting to MT5: {e}")
-        mt5.shutdown()
-        raise
+                raise Exception(f"Failed to select symbol {symbol}: {mt5.last_error()}")
+            raw = mt5.symbol_info(symbol)
+        if raw is None:
+            raise Exception(f"Symbol {symbol} not available: {mt5.last_error()}")
+
+        return InfoSimbolo(
+            nombre=symbol,
+            point=raw.point,
+            digits=raw.digits,
+            volume_min=raw.volume_min,
+            volume_max=raw.volume_max,
+            volume_step=raw.volume_step,
+            stops_level=raw.trade_stops_level,
+            filling_mode=raw.filling_mode
+        )
+
+
+class CacheTicks:
+    """
+    Latest tick per symbol with a freshness bound in milliseconds.
+
+    Every reader (monitor, market executions, closes) goes through it, so one
+    order works on one consistent snapshot and operations on the same symbol
+    within the freshness window share a single symbol_info_tick round-trip.
+    """
+
+    def __init__(self, max_edad_ms=TICK_MAX_EDAD_MS):
+        self.max_edad_ms = max_edad_ms
+        self._ticks = {}  # symbol -> (monotonic time of the read, tick)
+
+    def obtener(self, symbol: str, max_edad_ms: float = None):
+        """Return a tick no older than max_edad_ms, fetching it if needed"""
+        limite = self.max_edad_ms if max_edad_ms is None else max_edad_ms
+        entrada = self._ticks.get(symbol)
+        if entrada and (time.monotonic() - entrada[0]) * 1000 <= limite:
+            return entrada[1]
+        return self.refrescar(symbol)
+
+    def refrescar(self, symbol: str):
+        """Fetch a new tick from the terminal and cache it"""
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is None:
+            raise Exception(f"No tick for {symbol}: {mt5.last_error()}")
+        self.actualizar(symbol, tick)
+        return tick
+
+    def actualizar(self, symbol: str, tick):
+        """Store a tick obtained elsewhere as the latest one for symbol"""
+        self._ticks[symbol] = (time.monotonic(), tick)
+
+    def invalidar(self, symbol: str = None):
+        """Forget one symbol (or all of them)"""
+        if symbol is None:
+            self._ticks.clear()
+        else:
+            self._ticks.pop(symbol, None)
+
+
+class IndicePosiciones:
+    """
+    Our open positions (magic MAGIC_NUMBER) indexed by ticket and by symbol.
+
+    One positions_get() sweep refreshes the whole index, so looking up many
+    tickets in the same cycle costs a single terminal query.
+    """
+
+    def __init__(self, max_edad_ms=POSICIONES_MAX_EDAD_MS):
+        self.max_edad_ms = max_edad_ms
+        self._por_ticket = {}
+        self._por_simbolo = {}
+        self._actualizado = None  # monotonic time of the last sweep
+
+    def refrescar(self):
+        """Rebuild the index with one positions_get() call"""
+        posiciones = mt5.positions_get()
+        if posiciones is None:
+            raise Exception(f"Failed to get positions: {mt5.last_error()}")
+
+        por_ticket = {}
+        por_simbolo = {}
+        for posicion in posiciones:
+            if posicion.magic != MAGIC_NUMBER:
+                continue
+            por_ticket[posicion.ticket] = posicion
+            por_simbolo.setdefault(posicion.symbol, []).append(posicion)
+
+        self._por_ticket = por_ticket
+        self._por_simbolo = por_simbolo
+        self._actualizado = time.monotonic()
+
+    def esta_fresco(self) -> bool:
+        return (self._actualizado is not None and
+                (time.monotonic() - self._actualizado) * 1000 <= self.max_edad_ms)
+
+    def asegurar_fresco(self):
+        """Refresh the index only if it is older than max_edad_ms"""
+        if not self.esta_fresco():
+            self.refrescar()
+
+    def obtener(self, ticket: int):
+        """Position for ticket, or None if it is not open"""
+        self.asegurar_fresco()
+        return self._por_ticket.get(ticket)
+
+    def por_simbolo(self, symbol: str) -> list:
+        """Open positions for symbol"""
+        self.asegurar_fresco()
+        return list(self._por_simbolo.get(symbol, ()))
+
+    def descartar(self, ticket: int):
+        """Drop a ticket we just closed without waiting for the next sweep"""
+        posicion = self._por_ticket.pop(ticket, None)
+        if posicion is not None:
+            restantes = [p for p in self._por_simbolo.get(posicion.symbol, ()) if p.ticket != ticket]
+            self._por_simbolo[posicion.symbol] = restantes
+
+    def invalidar(self):
+        """Force a new sweep on next lookup"""
+        self._actualizado = None
+
+
+class PoliticaReintentos:
+    """
+    Retcode-aware retries for order_send within a latency budget.
+
+    Retcodes fall into three groups:
+    - reintentar: price moved (requote, price changed...), resend at once
+      with a fresh tick
+    - esperar: broker/terminal busy (timeout, connection, too many
+      requests...), back off exponentially before resending
+    - fatal: the request itself is wrong (stops, volume, money, market
+      closed...), fail at once; unknown retcodes are fatal too
+
+    Timeout, lost connection and no reply at all are ambiguous: the broker
+    may have filled the request anyway. Requests that must not be doubled
+    (market opens, pending orders, closes) pass ya_enviada to enviar,
+    checked before resending.
+    """
+
+    REINTENTAR = "reintentar"
+    ESPERAR = "esperar"
+    FATAL = "fatal"
+
+    def __init__(self, presupuesto_ms=PRESUPUESTO_ORDEN_MS, espera_inicial_ms=25, espera_maxima_ms=400):
+        self.presupuesto_ms = presupuesto_ms
+        self.espera_inicial_ms = espera_inicial_ms
+        self.espera_maxima_ms = espera_maxima_ms
+        self.exito = {
+            mt5.TRADE_RETCODE_DONE,
+            mt5.TRADE_RETCODE_DONE_PARTIAL,
+            mt5.TRADE_RETCODE_PLACED,
+        }
+        self.reintentar = {
+            mt5.TRADE_RETCODE_REQUOTE,
+            mt5.TRADE_RETCODE_PRICE_CHANGED,
+            mt5.TRADE_RETCODE_PRICE_OFF,
+            mt5.TRADE_RETCODE_INVALID_PRICE,
+        }
+        self.esperar = {
+            mt5.TRADE_RETCODE_REJECT,
+            mt5.TRADE_RETCODE_ERROR,
+            mt5.TRADE_RETCODE_TIMEOUT,
+            mt5.TRADE_RETCODE_CONNECTION,
+            mt5.TRADE_RETCODE_TOO_MANY_REQUESTS,
+            mt5.TRADE_RETCODE_LOCKED,
+            mt5.TRADE_RETCODE_FROZEN,
+        }
+        self.ambiguos = {
+            mt5.TRADE_RETCODE_TIMEOUT,
+            mt5.TRADE_RETCODE_CONNECTION,
+        }
+
+    def es_exito(self, result) -> bool:
+        return result is not None and result.retcode in self.exito
+
+    def clasificar(self, result) -> str:
+        """Group of a failed order_send result (None means the call itself failed)"""
+        if result is None:
+            return self.ESPERAR
+        if result.retcode in self.reintentar:
+            return self.REINTENTAR
+        if result.retcode in self.esperar:
+            return self.ESPERAR
+        return self.FATAL
+
+    def es_ambiguo(self, result) -> bool:
+        """Whether the broker may have executed the request despite the failure"""
+        return result is None or result.retcode in self.ambiguos
+
+    def enviar(self, construir, descripcion: str, presupuesto_ms: float = None, ya_enviada=None):
+        """
+        Send the request built by construir(fresco) until it succeeds, a
+        fatal retcode comes back or the latency budget is spent.
+
+        construir receives fresco=True on retries so it can rebuild the
+        request from a fresh tick. After an ambiguous failure ya_enviada()
+        (if given) returns the ticket the broker already holds for this
+        request, or None; a ticket stops the retries instead of sending the
+        request twice. Returns the last order_send result, or a
+        ResultadoRecuperado with that ticket.
+        """
+        presupuesto_ms = self.presupuesto_ms if presupuesto_ms is None else presupuesto_ms
+        inicio = time.monotonic()
+        espera_ms = self.espera_inicial_ms
+        fresco = False
+        intento = 0
+
+        while True:
+            intento += 1
+            result = mt5.order_send(construir(fresco))
+            if self.es_exito(result):
+                return result
+
+            grupo = self.clasificar(result)
+            motivo = describir_resultado(result)
+            if grupo == self.FATAL:
+                logger.error(f"{descripcion}: rejected ({motivo}), not retrying")
+                return result
+
+            pausa_ms = espera_ms if grupo == self.ESPERAR else 0
+            transcurrido_ms = (time.monotonic() - inicio) * 1000
+            agotado = transcurrido_ms + pausa_ms >= presupuesto_ms
+            if not agotado:
+                logger.warning(f"{descripcion}: attempt {intento} failed ({motivo}), retrying")
+                if pausa_ms:
+                    time.sleep(pausa_ms / 1000)
+                    espera_ms = min(espera_ms * 2, self.espera_maxima_ms)
+                    sesion.asegurar()
+
+            if ya_enviada is not None and self.es_ambiguo(result):
+                ticket = ya_enviada()
+                if ticket:
+                    logger.warning(f"{descripcion}: broker executed attempt {intento} despite "
+                                   f"{motivo} (ticket {ticket}), not resending")
+                    return ResultadoRecuperado(mt5.TRADE_RETCODE_DONE, ticket, "Found after ambiguous result")
+
+            if agotado:
+                logger.error(f"{descripcion}: giving up after {intento} attempts "
+                             f"in {transcurrido_ms:.0f} ms ({motivo})")
+                return result
+            fresco = True
+
+
+# Outcome of a request found executed after an ambiguous order_send result
+ResultadoRecuperado = namedtuple('ResultadoRecuperado', ['retcode', 'order', 'comment'])
+
+
+def validar_niveles(info, tick, compra: bool, sl: float = None, tp: float = None, ajustar: bool = True) -> tuple:
+    """
+    Check SL/TP against the symbol stops level before sending.
+
+    MT5 measures BUY stops from the Bid and SELL stops from the Ask. Levels
+    on the right side but too close are clamped to the minimum legal
+    distance (ajustar=True) or rejected; levels on the wrong side are
+    always rejected. Returns (sl, tp) normalized to the symbol digits.
+
+    Raises:
+        ValueError: If a level can't be sent as is
+    """
+    referencia = tick.bid if compra else tick.ask
+    minimo = info.distancia_minima
+    # Below the reference for BUY SL / SELL TP, above it for the other two
+    niveles = {"sl": (sl, compra), "tp": (tp, not compra)}
+    resultado = {}
+    for nombre, (precio, debajo) in niveles.items():
+        if precio is None or precio == 0:
+            resultado[nombre] = precio
+            continue
+        if (precio >= referencia) if debajo else (precio <= referencia):
+            raise ValueError(f"{nombre.upper()} {precio} on the wrong side of {referencia}")
+
+        limite = referencia - minimo if debajo else referencia + minimo
+        demasiado_cerca = precio > limite if debajo else precio < limite
+        if demasiado_cerca:
+            if not ajustar:
+                raise ValueError(f"{nombre.upper()} {precio} closer than {info.stops_level} points to {referencia}")
+            logger.warning(f"{info.nombre}: {nombre.upper()} {precio} clamped to stops level ({limite})")
+            precio = limite
+
+        normalizado = info.normalizar_precio(precio)
+        # Rounding must not bring the level back inside the forbidden band
+        if (normalizado > limite) if debajo else (normalizado < limite):
+            normalizado = info.normalizar_precio(normalizado - info.point if debajo else normalizado + info.point)
+        resultado[nombre] = normalizado
+    return resultado["sl"], resultado["tp"]
+
+def motivo_niveles_invalidos(symbol: str, order_type: str, sl: float = None, tp: float = None):
+    """
+    Why SL/TP can't be sent with a market order at the current price, or
+    None if they can (too-close levels are clamped, so only wrong-side
+    levels count). Used after a failed open to tell a dead signal from a
+    transient error.
+    """
+    info = registro_simbolos.obtener(symbol)
+    try:
+        validar_niveles(info, cache_ticks.refrescar(symbol), order_type == "BUY", sl, tp)
+    except ValueError as e:
+        return str(e)
+    return None
+
+def verificar_order_check(request: dict):
+    """
+    Ask the terminal whether request would be accepted (margin, volume,
+    stops) without sending it.
+
+    Raises:
+        ValueError: If order_check rejects the request
+    """
+    check = mt5.order_check(request)
+    if check is None:
+        raise ValueError(f"order_check failed: {mt5.last_error()}")
+    if check.retcode != 0:
+        raise ValueError(f"order_check rejected: {check.retcode} {check.comment}")
+
+
+def describir_resultado(result) -> str:
+    """Human readable reason of an order_send result"""
+    if result is None:
+        return f"order_send failed: {mt5.last_error()}"
+    return f"{result.retcode} {result.comment}"
+
+
+# Quote read from copy_ticks_from, same attributes readers use on symbol_info_tick
+TickLeido = namedtuple('TickLeido', ['time_msc', 'bid', 'ask'])
+
+
+class CursorTicks:
+    """
+    Incremental tick reader per symbol built on copy_ticks_from.
+
+    Remembers the time_msc of the last tick seen for each symbol and only
+    returns newer ones, so no price touch between two polls is missed and
+    each symbol costs one call per cycle. The newest tick also refreshes
+    cache_ticks.
+    """
+
+    def __init__(self, maximo=TICKS_POR_LECTURA, max_retraso_ms=TICKS_MAX_RETRASO_MS):
+        self.maximo = maximo
+        self.max_retraso_ms = max_retraso_ms
+        self._ultimo = {}  # symbol -> (time_msc of the last tick, monotonic time of the read)
+
+    def leer(self, symbol: str) -> list:
+        """Ticks of symbol newer than the previous read, oldest first"""
+        cursor = self._ultimo.get(symbol)
+        if cursor is None or (time.monotonic() - cursor[1]) * 1000 > self.max_retraso_ms:
+            # First read (or a stale cursor): start from the current quote
+            tick = cache_ticks.refrescar(symbol)
+            self._ultimo[symbol] = (tick.time_msc, time.monotonic())
+            return [TickLeido(tick.time_msc, tick.bid, tick.ask)]
+
+        ultimo = cursor[0]
+        # copy_ticks_from has second resolution, filter the rest by time_msc
+        desde = ultimo // 1000
+        cantidad = self.maximo
+        while True:
+            ticks = mt5.copy_ticks_from(symbol, desde, cantidad, mt5.COPY_TICKS_INFO)
+            if ticks is None:
+                raise Exception(f"Failed to copy ticks for {symbol}: {mt5.last_error()}")
+            if len(ticks) < cantidad or ticks[-1]['time_msc'] > ultimo:
+                break
+            # A full read with nothing newer than the cursor: the second of
+            # the cursor alone holds more ticks than requested
+            if cantidad < self.maximo * 16:
+                cantidad *= 2
+            else:
+                logger.warning(f"{symbol}: more than {cantidad} ticks in second {desde}, skipping to the next")
+                desde += 1
+                cantidad = self.maximo
+        if len(ticks) >= cantidad:
+            logger.warning(f"{symbol}: {cantidad} ticks in one read, the rest comes next cycle")
+
+        nuevos = [TickLeido(int(t['time_msc']), float(t['bid']), float(t['ask']))
+                  for t in ticks if t['time_msc'] > ultimo]
+        if nuevos:
+            ultimo = nuevos[-1].time_msc
+            cache_ticks.actualizar(symbol, nuevos[-1])
+        self._ultimo[symbol] = (ultimo, time.monotonic())
+        return nuevos
+
+    def olvidar(self, symbol: str = None):
+        """Drop the cursor of one symbol (or all of them)"""
+        if symbol is None:
+            self._ultimo.clear()
+        else:
+            self._ultimo.pop(symbol, None)
+
+
+# Shared session, every caller in main.py goes through it
+sesion = SesionMT5()
+
+# Symbol metadata, refreshed by the session on reconnect
+registro_simbolos = RegistroSimbolos()
+
+# Latest quotes, shared by every reader of prices
+cache_ticks = CacheTicks()
+
+# Incremental tick reads for the price monitor
+cursor_ticks = CursorTicks()
+
+# Our open positions, one positions_get() sweep per cycle
+indice_posiciones = IndicePosiciones()
+
+# How order_send failures are retried
+politica_reintentos = PoliticaReintentos()
+
+
+class EjecutorMT5:
+    """
+    Single-owner worker thread for MetaTrader5 calls.
+
+    The MT5 API blocks and is not thread-safe, so every call is queued on
+    one dedicated thread and awaited from asyncio. The event loop keeps
+    receiving Telegram updates while an order_send is in flight.
+
+    A timeout only stops waiting: the call already running on the worker
+    finishes on its own and later calls queue behind it.
+    """
+
+    def __init__(self, timeout=MT5_TIMEOUT):
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+
+    async def ejecutar(self, funcion, *args, timeout=None, **kwargs):
+        """Run funcion(*args, **kwargs) on the MT5 thread and await its result"""
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(self._pool, functools.partial(funcion, *args, **kwargs))
+        return await asyncio.wait_for(futuro, timeout or self.timeout)
+
+    def cerrar(self):
+        """Stop the worker thread once queued calls are done"""
+        self._pool.shutdown(wait=True)
+
+
+# Shared worker, the only thread allowed to talk to the terminal
+ejecutor = EjecutorMT5()
+
+
+def conectar():
+    """Ensure the shared MT5 session is connected"""
+    return sesion.asegurar()
 
 def cerrar():
-    """Shutdown MT5 connection"""
-    mt5.shutdown()
+    """Shutdown the shared MT5 session"""
+    sesion.cerrar()
 
-def abrir_orden(symbol: str, order_type: str, lotes: float, sl: float = None, tp: float = None, entrada: float = None) -> int:
+def abrir_orden(symbol: str, order_type: str, lotes: float, sl: float = None, tp: float = None, entrada: float = None, cronometro=None, comentario: str = None) -> int:
     """
     Open a new order in MT5
     Returns ticket number if successful
@@ -274,118 +931,382 @@ def abrir_orden(symbol: str, order_type: str, lotes: float, sl: float = None, tp
         sl: Stop Loss price or None
         tp: Take Profit price or None
         entrada: Original entry price (used to calculate SL/TP distances) or None
+        cronometro: Optional utils.metricas.Cronometro to time the MT5 stages
+        comentario: Unique comment for the position (one is generated if None);
+            lets the caller find the fill later with posiciones_con_comentario
     """
     try:
-        point = mt5.symbol_info(symbol).point
-        current_price = mt5.symbol_info_tick(symbol).ask if order_type == "BUY" else mt5.symbol_info_tick(symbol).bid
-        
-        # If we have an original entry price, calculate SL/TP based on distances
-        if entrada is not None and sl is not None and tp is not None:
-            sl_distance = abs(sl - entrada)
-            tp_distance = abs(tp - entrada)
-            
-            # Adjust SL and TP based on current price
-            if order_type == "BUY":
-                sl = current_price - sl_distance
-                tp = current_price + tp_distance
-            else:  # SELL
-                sl = current_price + sl_distance
-                tp = current_price - tp_distance
-        
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": lotes,
-            "type": mt5.ORDER_TYPE_BUY if order_type == "BUY" else mt5.ORDER_TYPE_SELL,
-            "price": current_price,
-            "deviation": 0,
-            "magic": 234000,
-            "comment": f"{order_type} order",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-        
-        if sl is not None:
-            request["sl"] = sl
-        if tp is not None:
-            request["tp"] = tp
-            
-        result = mt5.order_send(request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            raise Exception(f"Order failed: {result.comment}")
+        if cronometro:
+            cronometro.marcar('cola_mt5')  # Wait for the MT5 worker thread
+        info = registro_simbolos.obtener(symbol)
+        # Same comment on every attempt, so a fill behind a timeout can be found
+        comentario = comentario or f"{order_type} {time.time_ns() // 1000:x}"
+
+        def construir(fresco):
+            # One snapshot for the whole order, a new one on each retry
+            tick = cache_ticks.refrescar(symbol) if fresco else cache_ticks.obtener(symbol)
+            request = _request_apertura(info, tick, order_type, lotes, sl, tp, entrada, comentario)
+            if VALIDAR_CON_ORDER_CHECK and not fresco:
+                verificar_order_check(request)
+            return request
+
+        def ya_enviada():
+            posiciones = mt5.positions_get(symbol=symbol) or ()
+            for posicion in posiciones:
+                if posicion.magic == MAGIC_NUMBER and posicion.comment == comentario:
+                    return posicion.ticket
+            return None
+
+        result = politica_reintentos.enviar(construir, f"Open {order_type} {symbol}", ya_enviada=ya_enviada)
+        if cronometro:
+            cronometro.marcar('order_send')
+        if not politica_reintentos.es_exito(result):
+            raise Exception(f"Order failed: {describir_resultado(result)}")
             
+        indice_posiciones.invalidar()  # New position, next lookup sweeps again
         return result.order
         
     except Exception as e:
         logger.error(f"Error opening order: {str(e)}")
         return None
 
+def posiciones_con_comentario(comentarios) -> dict:
+    """
+    Our open positions carrying any of the given comments, with one
+    positions_get() sweep.
+    Returns {comment: ticket}
+    """
+    buscados = set(comentarios)
+    posiciones = mt5.positions_get()
+    if posiciones is None:
+        raise Exception(f"Failed to get positions: {mt5.last_error()}")
+    return {posicion.comment: posicion.ticket for posicion in posiciones
+            if posicion.magic == MAGIC_NUMBER and posicion.comment in buscados}
+
+def _request_apertura(info, tick, order_type, lotes, sl=None, tp=None, entrada=None, comentario=None) -> dict:
+    """Build a market deal priced at the given tick, with validated SL/TP and volume"""
+    current_price = tick.ask if order_type == "BUY" else tick.bid
+    
+    # If we have an original entry price, calculate SL/TP based on distances
+    if entrada is not None and sl is not None and tp is not None:
+        sl_distance = abs(sl - entrada)
+        tp_distance = abs(tp - entrada)
+        
+        # Adjust SL and TP based on current price
+        if order_type == "BUY":
+            sl = current_price - sl_distance
+            tp = current_price + tp_distance
+        else:  # SELL
+            sl = current_price + sl_distance
+            tp = current_price - tp_distance
+    
+    request = {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": info.nombre,
+        "volume": info.normalizar_volumen(lotes),
+        "type": mt5.ORDER_TYPE_BUY if order_type == "BUY" else mt5.ORDER_TYPE_SELL,
+        "price": current_price,
+        "deviation": 0,
+        "magic": MAGIC_NUMBER,
+        "comment": comentario or f"{order_type} order",
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": info.tipo_filling,
+    }
+    
+    sl, tp = validar_niveles(info, tick, order_type == "BUY", sl, tp)
+    if sl is not None:
+        request["sl"] = sl
+    if tp is not None:
+        request["tp"] = tp
+    return request
+
+def _request_cierre(position, tick) -> dict:
+    """Build the opposite deal that closes position at the given tick"""
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "position": position.ticket,
+        "symbol": position.symbol,
+        "volume": position.volume,
+        "type": mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,
+        "price": tick.bid if position.type == mt5.ORDER_TYPE_BUY else tick.ask,
+        "deviation": 20,
+        "magic": MAGIC_NUMBER,
+        "comment": "Close position",
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": registro_simbolos.obtener(position.symbol).tipo_filling,
+    }
+
+def _request_sltp(position, sl: float = None, tp: float = None) -> dict:
+    """Build a SL/TP modification, keeping the current value when None"""
+    return {
+        "action": mt5.TRADE_ACTION_SLTP,
+        "position": position.ticket,
+        "symbol": position.symbol,
+        "sl": position.sl if sl is None else sl,
+        "tp": position.tp if tp is None else tp
+    }
+
+def cerrar_ordenes(tickets) -> dict:
+    """
+    Close several positions back-to-back over the shared session.
+    
+    All requests are built up front from one position sweep and one tick
+    per symbol, then dispatched without reconnecting in between. A close
+    whose result is ambiguous or failed is checked with positions_get: a
+    position that is gone counts as closed instead of being resent.
+    Returns {ticket: True/False}
+    """
+    resultados = {}
+    posiciones = {}
+    ticks = {}
+    for ticket in tickets:
+        try:
+            position = indice_posiciones.obtener(ticket)
+            if not position:
+                logger.error(f"Position {ticket} not found")
+                resultados[ticket] = False
+                continue
+            if position.symbol not in ticks:
+                ticks[position.symbol] = cache_ticks.obtener(position.symbol)
+            posiciones[ticket] = position
+        except Exception as e:
+            logger.error(f"Error preparing close for {ticket}: {str(e)}")
+            resultados[ticket] = False
+
+    for ticket, position in posiciones.items():
+        def construir(fresco, position=position):
+            if fresco:
+                ticks[position.symbol] = cache_ticks.refrescar(position.symbol)
+            return _request_cierre(position, ticks[position.symbol])
+
+        def ya_cerrada(ticket=ticket):
+            abiertas = mt5.positions_get(ticket=ticket)
+            if abiertas is None:
+                return None  # Unknown, keep retrying
+            return ticket if not abiertas else None
+
+        try:
+            result = politica_reintentos.enviar(construir, f"Close position {ticket}", ya_enviada=ya_cerrada)
+            if not politica_reintentos.es_exito(result) and ya_cerrada():
+                # An earlier attempt closed it; the last one found nothing to close
+                logger.warning(f"Position {ticket} already closed despite {describir_resultado(result)}")
+                result = ResultadoRecuperado(mt5.TRADE_RETCODE_DONE, ticket, "Found closed after failed result")
+            if not politica_reintentos.es_exito(result):
+                logger.error(f"Failed to close position {ticket}: {describir_resultado(result)}")
+                resultados[ticket] = False
+                continue
+            indice_posiciones.descartar(ticket)
+            resultados[ticket] = True
+        except Exception as e:
+            logger.error(f"Error closing position {ticket}: {str(e)}")
+            resultados[ticket] = False
+
+    return resultados
+
+def modificar_posiciones(cambios: dict) -> dict:
+    """
+    Modify SL/TP of several positions back-to-back.
+    
+    Args:
+        cambios: {ticket: {"sl": price or None, "tp": price or None}},
+            None keeps the current value
+    Returns {ticket: True/False}
+    """
+    resultados = {}
+    requests = {}
+    for ticket, niveles in cambios.items():
+        try:
+            position = indice_posiciones.obtener(ticket)
+            if not position:
+                logger.error(f"Position {ticket} not found")
+                resultados[ticket] = False
+                continue
+            info = registro_simbolos.obtener(position.symbol)
+            # Reject locally what the broker would reject, without clamping:
+            # a moved SL must stay where the caller asked for it
+            sl, tp = validar_niveles(
+                info, cache_ticks.obtener(position.symbol), position.type == mt5.ORDER_TYPE_BUY,
+                niveles.get("sl"), niveles.get("tp"), ajustar=False
+            )
+            requests[ticket] = _request_sltp(position, sl=sl, tp=tp)
+        except Exception as e:
+            logger.error(f"Error preparing modification for {ticket}: {str(e)}")
+            resultados[ticket] = False
+
+    for ticket, request in requests.items():
+        try:
+            result = politica_reintentos.enviar(lambda fresco, request=request: request,
+                                                f"Modify position {ticket}")
+            if not politica_reintentos.es_exito(result):
+                logger.error(f"Failed to modify position {ticket}: {describir_resultado(result)}")
+                resultados[ticket] = False
+                continue
+            resultados[ticket] = True
+        except Exception as e:
+            logger.error(f"Error modifying position {ticket}: {str(e)}")
+            resultados[ticket] = False
+
+    if requests:
+        indice_posiciones.invalidar()  # SL/TP changed, next lookup sweeps again
+    return resultados
+
+def mover_sl_be_varios(tickets) -> dict:
+    """
+    Move stop loss to break even for several tickets in one batch.
+    Returns {ticket: True/False}
+    """
+    cambios = {}
+    resultados = {}
+    for ticket in tickets:
+        try:
+            position = indice_posiciones.obtener(ticket)
+        except Exception as e:
+            logger.error(f"Error moving SL to BE for {ticket}: {str(e)}")
+            position = None
+        if not position:
+            logger.error(f"Position {ticket} not found")
+            resultados[ticket] = False
+            continue
+        cambios[ticket] = {"sl": position.price_open}  # Keep existing TP
+
+    resultados.update(modificar_posiciones(cambios))
+    return resultados
+
 def cerrar_orden(ticket: int) -> bool:
     """
     Close an existing order by ticket number
     Returns True if successful
     """
-    try:
-        position = mt5.positions_get(ticket=ticket)
-        if not position:
-            logger.error(f"Position {ticket} not found")
-            return False
-            
-        position = position[0]
-        
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "position": ticket,
-            "symbol": position.symbol,
-            "volume": position.volume,
-            "type": mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,
-            "price": mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask,
-            "deviation": 20,
-            "magic": 234000,
-            "comment": "Close position",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-        
-        result = mt5.order_send(request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            logger.error(f"Failed to close position: {result.comment}")
-            return False
-            
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error closing position: {str(e)}")
-        return False
+    return cerrar_ordenes([ticket])[ticket]
 
 def mover_sl_be(ticket: int) -> bool:
     """
     Move stop loss to break even for given ticket
     Returns True if successful
     """
+    return mover_sl_be_varios([ticket])[ticket]
+
+def colocar_pendiente(symbol: str, order_type: str, lotes: float, entrada: float, sl: float = None, tp: float = None) -> int:
+    """
+    Place a broker-side LIMIT order at the signal entry
+    Returns the order ticket if successful
+    
+    Only entries not reached yet are placed: a BUY below the Ask or a SELL
+    above the Bid, farther than the stops level. Anything else returns None
+    and stays with the client-side monitor, which fires it at once.
+    """
     try:
-        position = mt5.positions_get(ticket=ticket)
-        if not position:
-            logger.error(f"Position {ticket} not found")
-            return False
-            
-        position = position[0]
-        
-        request = {
-            "action": mt5.TRADE_ACTION_SLTP,
-            "position": ticket,
-            "symbol": position.symbol,
-            "sl": position.price_open,  # Move SL to entry price
-            "tp": position.tp  # Keep existing TP
-        }
-        
-        result = mt5.order_send(request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            logger.error(f"Failed to modify SL: {result.comment}")
-            return False
-            
-        return True
-        
+        info = registro_simbolos.obtener(symbol)
+        # Same comment on every attempt, so an order placed behind a timeout can be found
+        comentario = f"{order_type} limit {time.time_ns() // 1000:x}"
+
+        def construir(fresco):
+            tick = cache_ticks.refrescar(symbol) if fresco else cache_ticks.obtener(symbol)
+            return _request_pendiente(info, tick, order_type, lotes, entrada, sl, tp, comentario)
+
+        def ya_enviada():
+            # Still pending, or already filled into a position
+            ordenes = mt5.orders_get(symbol=symbol) or ()
+            posiciones = mt5.positions_get(symbol=symbol) or ()
+            for orden in (*ordenes, *posiciones):
+                if orden.magic == MAGIC_NUMBER and orden.comment == comentario:
+                    return orden.ticket
+            return None
+
+        result = politica_reintentos.enviar(construir, f"Place {order_type} LIMIT {symbol} @ {entrada}",
+                                            ya_enviada=ya_enviada)
+        if not politica_reintentos.es_exito(result):
+            raise Exception(f"Order failed: {describir_resultado(result)}")
+        return result.order
+
+    except ValueError as e:
+        logger.warning(f"Pending order for {symbol} not placed: {str(e)}")
+        return None
     except Exception as e:
-        logger.error(f"Error moving SL to BE: {str(e)}")
-        return False
+        logger.error(f"Error placing pending order: {str(e)}")
+        return None
+
+def _request_pendiente(info, tick, order_type, lotes, entrada, sl=None, tp=None, comentario=None) -> dict:
+    """Build a BUY_LIMIT/SELL_LIMIT at entrada, with SL/TP validated against it"""
+    compra = order_type == "BUY"
+    precio = info.normalizar_precio(entrada)
+    # Room between the entry and the market: below the Ask for BUY, above the Bid for SELL
+    margen = (tick.ask - precio) if compra else (precio - tick.bid)
+    if margen <= 0:
+        raise ValueError(f"entry {precio} already reached")
+    if margen < info.distancia_minima:
+        raise ValueError(f"entry {precio} closer than {info.stops_level} points to the market")
+
+    request = {
+        "action": mt5.TRADE_ACTION_PENDING,
+        "symbol": info.nombre,
+        "volume": info.normalizar_volumen(lotes),
+        "type": mt5.ORDER_TYPE_BUY_LIMIT if compra else mt5.ORDER_TYPE_SELL_LIMIT,
+        "price": precio,
+        "magic": MAGIC_NUMBER,
+        "comment": comentario or f"{order_type} limit",
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": mt5.ORDER_FILLING_RETURN,
+    }
+
+    # Stops of a pending order are measured from its own price
+    sl, tp = validar_niveles(info, TickLeido(tick.time_msc, precio, precio), compra, sl, tp)
+    if sl is not None:
+        request["sl"] = sl
+    if tp is not None:
+        request["tp"] = tp
+    return request
+
+def cancelar_pendientes(tickets) -> dict:
+    """
+    Remove several broker-side pending orders back-to-back.
+    Returns {ticket: True/False}; False also when the order already filled
+    """
+    resultados = {}
+    for ticket in tickets:
+        request = {"action": mt5.TRADE_ACTION_REMOVE, "order": ticket}
+        try:
+            result = politica_reintentos.enviar(lambda fresco, request=request: request,
+                                                f"Remove order {ticket}")
+            resultados[ticket] = politica_reintentos.es_exito(result)
+            if not resultados[ticket]:
+                logger.error(f"Failed to remove order {ticket}: {describir_resultado(result)}")
+        except Exception as e:
+            logger.error(f"Error removing order {ticket}: {str(e)}")
+            resultados[ticket] = False
+    return resultados
+
+def cancelar_pendiente(ticket: int) -> bool:
+    """
+    Remove a broker-side pending order
+    Returns True if successful
+    """
+    return cancelar_pendientes([ticket])[ticket]
+
+def estado_pendientes(tickets) -> dict:
+    """
+    State of broker-side pending orders with one orders_get() and, only if
+    some are gone, one position sweep.
+    
+    Returns {ticket: 'pendiente' | 'ejecutada' | 'desaparecida'}: filled
+    orders are found as positions with the same ticket; 'desaparecida'
+    covers orders cancelled or expired outside the bot and positions
+    already closed.
+    """
+    ordenes = mt5.orders_get()
+    if ordenes is None:
+        raise Exception(f"Failed to get orders: {mt5.last_error()}")
+    vivas = {orden.ticket for orden in ordenes}
+
+    faltan = [ticket for ticket in tickets if ticket not in vivas]
+    if faltan:
+        indice_posiciones.refrescar()
+    estados = {}
+    for ticket in tickets:
+        if ticket in vivas:
+            estados[ticket] = 'pendiente'
+        elif indice_posiciones.obtener(ticket):
+            estados[ticket] = 'ejecutada'
+        else:
+            estados[ticket] = 'desaparecida'
+    return estados
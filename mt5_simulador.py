@@ -0,0 +1,701 @@
+"""
+Simulador de MetaTrader 5
+========================
+
+Reemplazo en proceso del paquete `MetaTrader5` para ejecutar y medir el
+sistema en Linux, sin terminal ni cuenta real.
+
+Expone el subconjunto de la API que usa `mt5_client`:
+`initialize`, `login`, `shutdown`, `last_error`, `terminal_info`,
+`symbol_select`, `symbol_info`, `symbol_info_tick`, `copy_ticks_from`,
+`order_send`, `order_check`, `positions_get`, `orders_get` y las constantes
+de retcodes, tipos de orden y filling.
+
+Selección
+---------
+`mt5_client` lo usa en lugar del paquete real cuando la variable de entorno
+`MT5_BACKEND` vale `simulador`:
+```
+MT5_BACKEND=simulador python3 main.py
+```
+
+Configuración
+------------
+```python
+import mt5_simulador as sim
+
+# Latencia por llamada (ms) y ruido aleatorio
+sim.configurar(latencia_ms=2, jitter_ms=1, latencias={'order_send': 40})
+
+# Rechazos inyectados: 10% de los order_send devuelven REQUOTE
+sim.configurar(tasa_fallos=0.1, retcode_fallo=sim.TRADE_RETCODE_REQUOTE)
+
+# Ruta de precios guionada (bid), un precio cada 100 ms
+sim.definir_ruta("XAUUSD", [2000.0, 2000.5, 2001.2, 2000.8], intervalo_ms=100)
+
+# Ruta aleatoria reproducible
+sim.definir_ruta("EURUSD", sim.ruta_aleatoria(1.0800, 10000, 0.0002, semilla=1))
+
+# Contadores de llamadas para medir round-trips
+sim.estadisticas()  # {'symbol_info_tick': 12, 'order_send': 3, ...}
+```
+
+Notas Importantes
+---------------
+- El precio avanza con el tiempo real según `intervalo_ms` y se queda en el
+  último valor al terminar la ruta
+- Un DEAL cuyo precio se aleja del actual más que `deviation` puntos se
+  rechaza con REQUOTE, igual que en un broker real
+- Las órdenes pendientes (LIMIT/STOP) se ejecutan al precio de la orden
+  cuando la ruta la cruza; se revisan en cada `order_send`, `positions_get` y
+  `orders_get` contra todos los precios recorridos desde la revisión anterior
+- `desconectar()` simula la caída del enlace con el terminal
+- El estado es global al módulo, `reiniciar()` lo devuelve al inicial
+"""
+
+import random
+import threading
+import time
+from collections import namedtuple
+
+# =============================================================================
+# Constantes (mismos valores que el paquete MetaTrader5)
+# =============================================================================
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_INTERNAL_FAIL_CONNECT = -10004
+RES_E_AUTH_FAILED = -6
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+TRADE_ACTION_MODIFY = 7
+TRADE_ACTION_REMOVE = 8
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TYPE_BUY_LIMIT = 2
+ORDER_TYPE_SELL_LIMIT = 3
+ORDER_TYPE_BUY_STOP = 4
+ORDER_TYPE_SELL_STOP = 5
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+ORDER_TIME_GTC = 0
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_CANCEL = 10007
+TRADE_RETCODE_PLACED = 10008
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+TRADE_RETCODE_ERROR = 10011
+TRADE_RETCODE_TIMEOUT = 10012
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_TRADE_DISABLED = 10017
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_INVALID_EXPIRATION = 10022
+TRADE_RETCODE_ORDER_CHANGED = 10023
+TRADE_RETCODE_TOO_MANY_REQUESTS = 10024
+TRADE_RETCODE_NO_CHANGES = 10025
+TRADE_RETCODE_LOCKED = 10028
+TRADE_RETCODE_FROZEN = 10029
+TRADE_RETCODE_INVALID_FILL = 10030
+TRADE_RETCODE_CONNECTION = 10031
+
+# =============================================================================
+# Estructuras devueltas (mismos campos que usa mt5_client)
+# =============================================================================
+
+TerminalInfo = namedtuple('TerminalInfo', ['connected', 'trade_allowed', 'name'])
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'visible', 'point', 'digits', 'volume_min', 'volume_max',
+    'volume_step', 'trade_stops_level', 'filling_mode', 'bid', 'ask'
+])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc', 'flags'])
+TradePosition = namedtuple('TradePosition', [
+    'ticket', 'time', 'type', 'magic', 'volume', 'price_open', 'sl', 'tp',
+    'price_current', 'symbol', 'comment'
+])
+TradeOrder = namedtuple('TradeOrder', [
+    'ticket', 'time_setup', 'type', 'magic', 'volume_initial', 'volume_current',
+    'price_open', 'sl', 'tp', 'price_current', 'symbol', 'comment'
+])
+OrderSendResult = namedtuple('OrderSendResult', [
+    'retcode', 'deal', 'order', 'volume', 'price', 'bid', 'ask', 'comment', 'request'
+])
+OrderCheckResult = namedtuple('OrderCheckResult', [
+    'retcode', 'balance', 'equity', 'margin', 'margin_free', 'comment', 'request'
+])
+
+# Símbolos disponibles: point, digits, precio inicial (bid), spread en puntos
+SIMBOLOS = {
+    "XAUUSD": {"point": 0.01, "digits": 2, "precio": 2000.0, "spread": 20},
+    "EURUSD": {"point": 0.00001, "digits": 5, "precio": 1.08, "spread": 10},
+    "GBPUSD": {"point": 0.00001, "digits": 5, "precio": 1.27, "spread": 12},
+    "USDJPY": {"point": 0.001, "digits": 3, "precio": 150.0, "spread": 12},
+}
+
+# =============================================================================
+# Estado del simulador
+# =============================================================================
+
+_lock = threading.RLock()
+
+
+def _estado_inicial():
+    return {
+        'inicializado': False,
+        'conectado': False,
+        'error': (RES_S_OK, 'Success'),
+        'seleccionados': set(),
+        'rutas': {},        # symbol -> {'precios', 'intervalo_ms', 'inicio'}
+        'posiciones': {},   # ticket -> TradePosition
+        'ordenes': {},      # ticket -> TradeOrder pendiente
+        'revisadas': {},    # ticket -> instante hasta el que se revisó la orden
+        'siguiente_ticket': 100000,
+        'contadores': {},
+        'config': {
+            'latencia_ms': 0.0,
+            'jitter_ms': 0.0,
+            'latencias': {},
+            'tasa_fallos': 0.0,
+            'retcode_fallo': TRADE_RETCODE_REQUOTE,
+            'stops_level': 10,
+            'volume_min': 0.01,
+            'volume_max': 100.0,
+            'volume_step': 0.01,
+        },
+    }
+
+
+_estado = _estado_inicial()
+_azar = random.Random()
+
+
+def reiniciar():
+    """Devuelve el simulador a su estado inicial (posiciones, rutas, config)"""
+    global _estado
+    with _lock:
+        _estado = _estado_inicial()
+
+
+def configurar(latencia_ms=None, jitter_ms=None, latencias=None, tasa_fallos=None,
+               retcode_fallo=None, stops_level=None, semilla=None):
+    """
+    Ajusta la latencia inyectada y la tasa de fallos.
+
+    Args:
+        latencia_ms: Latencia base de cada llamada
+        jitter_ms: Ruido uniforme [0, jitter_ms] sumado a cada llamada
+        latencias: Latencia específica por función, ej {'order_send': 40}
+        tasa_fallos: Probabilidad (0-1) de que un order_send sea rechazado
+        retcode_fallo: Retcode de los rechazos inyectados
+        stops_level: Distancia mínima de SL/TP en puntos
+        semilla: Semilla del generador aleatorio para runs reproducibles
+    """
+    with _lock:
+        config = _estado['config']
+        for clave, valor in (('latencia_ms', latencia_ms), ('jitter_ms', jitter_ms),
+                             ('tasa_fallos', tasa_fallos), ('retcode_fallo', retcode_fallo),
+                             ('stops_level', stops_level)):
+            if valor is not None:
+                config[clave] = valor
+        if latencias is not None:
+            config['latencias'] = dict(latencias)
+        if semilla is not None:
+            _azar.seed(semilla)
+
+
+def definir_ruta(symbol, precios, intervalo_ms=100):
+    """
+    Guiona la ruta de precios (bid) de un símbolo.
+
+    El precio i rige desde inicio + i * intervalo_ms; al terminar la ruta el
+    último precio se mantiene.
+    """
+    with _lock:
+        _estado['rutas'][symbol] = {
+            'precios': list(precios),
+            'intervalo_ms': intervalo_ms,
+            'inicio': time.time(),
+        }
+
+
+def ruta_aleatoria(inicio, pasos, volatilidad, semilla=None):
+    """Genera un paseo aleatorio gaussiano de `pasos` precios"""
+    azar = random.Random(semilla)
+    precios = [inicio]
+    for _ in range(pasos - 1):
+        precios.append(precios[-1] + azar.gauss(0, volatilidad))
+    return precios
+
+
+def desconectar():
+    """Simula la caída del enlace con el terminal"""
+    with _lock:
+        _estado['conectado'] = False
+        _estado['error'] = (RES_E_INTERNAL_FAIL_CONNECT, 'IPC connection lost')
+
+
+def estadisticas():
+    """Número de llamadas por función desde el último reiniciar()"""
+    with _lock:
+        return dict(_estado['contadores'])
+
+
+# =============================================================================
+# Utilidades internas
+# =============================================================================
+
+def _llamada(nombre):
+    """Cuenta la llamada y aplica la latencia configurada"""
+    with _lock:
+        _estado['contadores'][nombre] = _estado['contadores'].get(nombre, 0) + 1
+        config = _estado['config']
+        demora = config['latencias'].get(nombre, config['latencia_ms'])
+        if config['jitter_ms']:
+            demora += _azar.uniform(0, config['jitter_ms'])
+    if demora > 0:
+        time.sleep(demora / 1000)
+
+
+def _error(codigo, descripcion):
+    _estado['error'] = (codigo, descripcion)
+
+
+def _precio(symbol, ahora=None):
+    """Bid vigente de un símbolo según su ruta"""
+    datos = SIMBOLOS[symbol]
+    ruta = _estado['rutas'].get(symbol)
+    if not ruta:
+        return datos['precio']
+    ahora = time.time() if ahora is None else ahora
+    indice = int((ahora - ruta['inicio']) * 1000 // ruta['intervalo_ms'])
+    return ruta['precios'][min(max(indice, 0), len(ruta['precios']) - 1)]
+
+
+def _tick(symbol, ahora=None, precio=None):
+    ahora = time.time() if ahora is None else ahora
+    datos = SIMBOLOS[symbol]
+    bid = round(_precio(symbol, ahora) if precio is None else precio, datos['digits'])
+    ask = round(bid + datos['spread'] * datos['point'], datos['digits'])
+    return Tick(int(ahora), bid, ask, 0.0, 0, int(ahora * 1000), 6)
+
+
+def _precios_entre(symbol, desde, hasta):
+    """Bids de la ruta vigentes en algún momento de [desde, hasta]"""
+    ruta = _estado['rutas'].get(symbol)
+    if not ruta:
+        return [_precio(symbol, hasta)]
+    intervalo = ruta['intervalo_ms'] / 1000
+    ultimo_indice = len(ruta['precios']) - 1
+    primero = min(max(int((desde - ruta['inicio']) // intervalo), 0), ultimo_indice)
+    ultimo = min(max(int((hasta - ruta['inicio']) // intervalo), 0), ultimo_indice)
+    return ruta['precios'][primero:ultimo + 1]
+
+
+def _ejecutar_pendientes():
+    """Convierte en posición toda orden pendiente cruzada desde su última revisión"""
+    ahora = time.time()
+    for orden in list(_estado['ordenes'].values()):
+        desde = _estado['revisadas'].get(orden.ticket, ahora)
+        _estado['revisadas'][orden.ticket] = ahora
+        datos = SIMBOLOS[orden.symbol]
+        spread = datos['spread'] * datos['point']
+        for bid in _precios_entre(orden.symbol, desde, ahora):
+            ask = bid + spread
+            if ((orden.type == ORDER_TYPE_BUY_LIMIT and ask <= orden.price_open) or
+                    (orden.type == ORDER_TYPE_SELL_LIMIT and bid >= orden.price_open) or
+                    (orden.type == ORDER_TYPE_BUY_STOP and ask >= orden.price_open) or
+                    (orden.type == ORDER_TYPE_SELL_STOP and bid <= orden.price_open)):
+                break
+        else:
+            continue
+        del _estado['ordenes'][orden.ticket]
+        del _estado['revisadas'][orden.ticket]
+        compra = orden.type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+        # La posición conserva el ticket de la orden que la abrió, como en MT5
+        _estado['posiciones'][orden.ticket] = TradePosition(
+            ticket=orden.ticket, time=int(ahora), type=ORDER_TYPE_BUY if compra else ORDER_TYPE_SELL,
+            magic=orden.magic, volume=orden.volume_initial, price_open=orden.price_open,
+            sl=orden.sl, tp=orden.tp, price_current=orden.price_open,
+            symbol=orden.symbol, comment=orden.comment
+        )
+
+
+def _disponible():
+    if not _estado['conectado']:
+        _error(RES_E_INTERNAL_FAIL_CONNECT, 'Terminal not connected')
+        return False
+    return True
+
+
+def _resultado(retcode, request, comment, order=0, deal=0, price=0.0, tick=None):
+    return OrderSendResult(
+        retcode=retcode, deal=deal, order=order,
+        volume=request.get('volume', 0.0), price=price,
+        bid=tick.bid if tick else 0.0, ask=tick.ask if tick else 0.0,
+        comment=comment, request=request
+    )
+
+
+def _nuevo_ticket():
+    _estado['siguiente_ticket'] += 1
+    return _estado['siguiente_ticket']
+
+
+def _validar_volumen(volumen):
+    config = _estado['config']
+    if volumen < config['volume_min'] or volumen > config['volume_max']:
+        return False
+    pasos = volumen / config['volume_step']
+    return abs(pasos - round(pasos)) < 1e-6
+
+
+def _validar_stops(symbol, tipo_compra, tick, sl, tp):
+    """True si SL/TP respetan el stops level (BUY contra el bid, SELL contra el ask)"""
+    minimo = _estado['config']['stops_level'] * SIMBOLOS[symbol]['point'] - 1e-9
+    precio = tick.bid if tipo_compra else tick.ask
+    if sl:
+        distancia = precio - sl if tipo_compra else sl - precio
+        if distancia < minimo:
+            return False
+    if tp:
+        distancia = tp - precio if tipo_compra else precio - tp
+        if distancia < minimo:
+            return False
+    return True
+
+
+# =============================================================================
+# API compatible con MetaTrader5
+# =============================================================================
+
+def initialize(*args, **kwargs):
+    _llamada('initialize')
+    with _lock:
+        _estado['inicializado'] = True
+        _estado['conectado'] = True
+        _error(RES_S_OK, 'Success')
+        return True
+
+
+def login(login=None, password=None, server=None, **kwargs):
+    _llamada('login')
+    with _lock:
+        if not _estado['inicializado']:
+            _error(RES_E_INTERNAL_FAIL_CONNECT, 'Terminal not initialized')
+            return False
+        _error(RES_S_OK, 'Success')
+        return True
+
+
+def shutdown():
+    _llamada('shutdown')
+    with _lock:
+        _estado['inicializado'] = False
+        _estado['conectado'] = False
+        return True
+
+
+def last_error():
+    with _lock:
+        return _estado['error']
+
+
+def terminal_info():
+    _llamada('terminal_info')
+    with _lock:
+        if not _estado['inicializado']:
+            return None
+        return TerminalInfo(connected=_estado['conectado'], trade_allowed=True, name='Simulador')
+
+
+def symbol_select(symbol, enable=True):
+    _llamada('symbol_select')
+    with _lock:
+        if not _disponible():
+            return False
+        if symbol not in SIMBOLOS:
+            _error(RES_E_NOT_FOUND, f'Unknown symbol {symbol}')
+            return False
+        if enable:
+            _estado['seleccionados'].add(symbol)
+        else:
+            _estado['seleccionados'].discard(symbol)
+        return True
+
+
+def symbol_info(symbol):
+    _llamada('symbol_info')
+    with _lock:
+        if not _disponible():
+            return None
+        if symbol not in SIMBOLOS:
+            _error(RES_E_NOT_FOUND, f'Unknown symbol {symbol}')
+            return None
+        datos = SIMBOLOS[symbol]
+        config = _estado['config']
+        tick = _tick(symbol)
+        return SymbolInfo(
+            name=symbol,
+            visible=symbol in _estado['seleccionados'],
+            point=datos['point'],
+            digits=datos['digits'],
+            volume_min=config['volume_min'],
+            volume_max=config['volume_max'],
+            volume_step=config['volume_step'],
+            trade_stops_level=config['stops_level'],
+            filling_mode=SYMBOL_FILLING_FOK | SYMBOL_FILLING_IOC,
+            bid=tick.bid,
+            ask=tick.ask
+        )
+
+
+def symbol_info_tick(symbol):
+    _llamada('symbol_info_tick')
+    with _lock:
+        if not _disponible():
+            return None
+        if symbol not in SIMBOLOS:
+            _error(RES_E_NOT_FOUND, f'Unknown symbol {symbol}')
+            return None
+        return _tick(symbol)
+
+
+def copy_ticks_from(symbol, date_from, count, flags):
+    """
+    Ticks de la ruta desde date_from (datetime o segundos epoch) hasta ahora.
+
+    El paquete real devuelve un array estructurado de numpy; aquí una tupla
+    de dicts con los mismos campos, que se indexan igual (t['bid']).
+    """
+    _llamada('copy_ticks_from')
+    with _lock:
+        if not _disponible():
+            return None
+        if symbol not in SIMBOLOS:
+            _error(RES_E_NOT_FOUND, f'Unknown symbol {symbol}')
+            return None
+
+        desde = date_from.timestamp() if hasattr(date_from, 'timestamp') else float(date_from)
+        ahora = time.time()
+        ruta = _estado['rutas'].get(symbol)
+        if not ruta:
+            puntos = [(ahora, None)]  # Precio fijo: un tick por lectura
+        else:
+            intervalo = ruta['intervalo_ms'] / 1000
+            primero = max(0, int((desde - ruta['inicio']) // intervalo))
+            ultimo = min(int((ahora - ruta['inicio']) // intervalo), len(ruta['precios']) - 1)
+            puntos = [(ruta['inicio'] + i * intervalo, ruta['precios'][i]) for i in range(primero, ultimo + 1)]
+
+        ticks = []
+        for instante, precio in puntos:
+            if instante < desde:
+                continue
+            tick = _tick(symbol, instante, precio)
+            ticks.append({'time': tick.time, 'bid': tick.bid, 'ask': tick.ask, 'last': tick.last,
+                          'volume': tick.volume, 'time_msc': tick.time_msc, 'flags': tick.flags})
+            if len(ticks) >= count:
+                break
+        return tuple(ticks)
+
+
+def positions_get(symbol=None, ticket=None, group=None):
+    _llamada('positions_get')
+    with _lock:
+        if not _disponible():
+            return None
+        _ejecutar_pendientes()
+        posiciones = []
+        for posicion in _estado['posiciones'].values():
+            if ticket is not None and posicion.ticket != ticket:
+                continue
+            if symbol is not None and posicion.symbol != symbol:
+                continue
+            tick = _tick(posicion.symbol)
+            actual = tick.bid if posicion.type == ORDER_TYPE_BUY else tick.ask
+            posiciones.append(posicion._replace(price_current=actual))
+        return tuple(posiciones)
+
+
+def orders_get(symbol=None, ticket=None, group=None):
+    _llamada('orders_get')
+    with _lock:
+        if not _disponible():
+            return None
+        _ejecutar_pendientes()
+        ordenes = []
+        for orden in _estado['ordenes'].values():
+            if ticket is not None and orden.ticket != ticket:
+                continue
+            if symbol is not None and orden.symbol != symbol:
+                continue
+            tick = _tick(orden.symbol)
+            compra = orden.type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+            ordenes.append(orden._replace(price_current=tick.ask if compra else tick.bid))
+        return tuple(ordenes)
+
+
+def order_send(request):
+    _llamada('order_send')
+    with _lock:
+        if not _disponible():
+            return None
+        _ejecutar_pendientes()
+
+        accion = request.get('action')
+        if accion == TRADE_ACTION_REMOVE:
+            # Solo requiere el ticket de la orden
+            if request.get('order') not in _estado['ordenes']:
+                return _resultado(TRADE_RETCODE_INVALID, request, 'Order not found')
+            del _estado['ordenes'][request['order']]
+            _estado['revisadas'].pop(request['order'], None)
+            return _resultado(TRADE_RETCODE_DONE, request, 'Request executed', order=request['order'])
+
+        symbol = request.get('symbol')
+        if symbol not in SIMBOLOS:
+            return _resultado(TRADE_RETCODE_INVALID, request, 'Invalid symbol')
+        tick = _tick(symbol)
+
+        config = _estado['config']
+        if config['tasa_fallos'] and _azar.random() < config['tasa_fallos']:
+            return _resultado(config['retcode_fallo'], request, 'Injected failure', tick=tick)
+
+        if accion == TRADE_ACTION_DEAL:
+            return _ejecutar_deal(request, tick)
+        if accion == TRADE_ACTION_PENDING:
+            return _colocar_pendiente(request, tick)
+        if accion == TRADE_ACTION_SLTP:
+            return _modificar_sltp(request, tick)
+        return _resultado(TRADE_RETCODE_INVALID, request, 'Unsupported action', tick=tick)
+
+
+def _ejecutar_deal(request, tick):
+    symbol = request['symbol']
+    tipo = request.get('type')
+    compra = tipo == ORDER_TYPE_BUY
+    actual = tick.ask if compra else tick.bid
+
+    desvio_maximo = request.get('deviation', 0) * SIMBOLOS[symbol]['point']
+    if abs(request.get('price', actual) - actual) > desvio_maximo + 1e-12:
+        return _resultado(TRADE_RETCODE_REQUOTE, request, 'Requote', tick=tick)
+    if not _validar_volumen(request.get('volume', 0.0)):
+        return _resultado(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume', tick=tick)
+
+    ticket_posicion = request.get('position')
+    if ticket_posicion:
+        posicion = _estado['posiciones'].get(ticket_posicion)
+        if posicion is None:
+            return _resultado(TRADE_RETCODE_INVALID, request, 'Position not found', tick=tick)
+        del _estado['posiciones'][ticket_posicion]
+        return _resultado(TRADE_RETCODE_DONE, request, 'Request executed',
+                          order=_nuevo_ticket(), deal=_nuevo_ticket(), price=actual, tick=tick)
+
+    sl = request.get('sl', 0.0)
+    tp = request.get('tp', 0.0)
+    if not _validar_stops(symbol, compra, tick, sl, tp):
+        return _resultado(TRADE_RETCODE_INVALID_STOPS, request, 'Invalid stops', tick=tick)
+
+    ticket = _nuevo_ticket()
+    _estado['posiciones'][ticket] = TradePosition(
+        ticket=ticket, time=tick.time, type=tipo, magic=request.get('magic', 0),
+        volume=request['volume'], price_open=actual, sl=sl, tp=tp,
+        price_current=actual, symbol=symbol, comment=request.get('comment', '')
+    )
+    return _resultado(TRADE_RETCODE_DONE, request, 'Request executed',
+                      order=ticket, deal=_nuevo_ticket(), price=actual, tick=tick)
+
+
+def _colocar_pendiente(request, tick):
+    symbol = request['symbol']
+    tipo = request.get('type')
+    precio = request.get('price', 0.0)
+    minimo = _estado['config']['stops_level'] * SIMBOLOS[symbol]['point'] - 1e-9
+    # Distancia al mercado exigida según el tipo: LIMIT del lado favorable, STOP del otro
+    distancias = {
+        ORDER_TYPE_BUY_LIMIT: tick.ask - precio,
+        ORDER_TYPE_SELL_LIMIT: precio - tick.bid,
+        ORDER_TYPE_BUY_STOP: precio - tick.ask,
+        ORDER_TYPE_SELL_STOP: tick.bid - precio,
+    }
+    if tipo not in distancias:
+        return _resultado(TRADE_RETCODE_INVALID, request, 'Invalid order type', tick=tick)
+    if distancias[tipo] < minimo:
+        return _resultado(TRADE_RETCODE_INVALID_PRICE, request, 'Invalid price', tick=tick)
+    if not _validar_volumen(request.get('volume', 0.0)):
+        return _resultado(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume', tick=tick)
+
+    compra = tipo in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+    sl = request.get('sl', 0.0)
+    tp = request.get('tp', 0.0)
+    # Los stops de una pendiente se miden desde su propio precio
+    if not _validar_stops(symbol, compra, tick._replace(bid=precio, ask=precio), sl, tp):
+        return _resultado(TRADE_RETCODE_INVALID_STOPS, request, 'Invalid stops', tick=tick)
+
+    ticket = _nuevo_ticket()
+    _estado['ordenes'][ticket] = TradeOrder(
+        ticket=ticket, time_setup=tick.time, type=tipo, magic=request.get('magic', 0),
+        volume_initial=request['volume'], volume_current=request['volume'],
+        price_open=precio, sl=sl, tp=tp, price_current=tick.ask if compra else tick.bid,
+        symbol=symbol, comment=request.get('comment', '')
+    )
+    _estado['revisadas'][ticket] = time.time()
+    return _resultado(TRADE_RETCODE_PLACED, request, 'Request placed', order=ticket, tick=tick)
+
+
+def _modificar_sltp(request, tick):
+    posicion = _estado['posiciones'].get(request.get('position'))
+    if posicion is None:
+        return _resultado(TRADE_RETCODE_INVALID, request, 'Position not found', tick=tick)
+
+    sl = request.get('sl', 0.0)
+    tp = request.get('tp', 0.0)
+    if sl == posicion.sl and tp == posicion.tp:
+        return _resultado(TRADE_RETCODE_NO_CHANGES, request, 'No changes', tick=tick)
+
+    compra = posicion.type == ORDER_TYPE_BUY
+    if not _validar_stops(posicion.symbol, compra, tick, sl, tp):
+        return _resultado(TRADE_RETCODE_INVALID_STOPS, request, 'Invalid stops', tick=tick)
+
+    _estado['posiciones'][posicion.ticket] = posicion._replace(sl=sl, tp=tp)
+    return _resultado(TRADE_RETCODE_DONE, request, 'Request executed', order=posicion.ticket, tick=tick)
+
+
+def order_check(request):
+    _llamada('order_check')
+    with _lock:
+        if not _disponible():
+            return None
+
+        def resultado(retcode, comment):
+            return OrderCheckResult(retcode, 10000.0, 10000.0, 0.0, 10000.0, comment, request)
+
+        symbol = request.get('symbol')
+        if symbol not in SIMBOLOS:
+            return resultado(TRADE_RETCODE_INVALID, 'Invalid symbol')
+        if not _validar_volumen(request.get('volume', 0.0)):
+            return resultado(TRADE_RETCODE_INVALID_VOLUME, 'Invalid volume')
+        compra = request.get('type') == ORDER_TYPE_BUY
+        if not _validar_stops(symbol, compra, _tick(symbol), request.get('sl'), request.get('tp')):
+            return resultado(TRADE_RETCODE_INVALID_STOPS, 'Invalid stops')
+        return resultado(0, 'Done')
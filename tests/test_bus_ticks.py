@@ -0,0 +1,36 @@
+import asyncio
+from collections import namedtuple
+
+from utils.bus_ticks import BusTicks
+from utils.monitor import PlanificadorSondeo
+
+Tick = namedtuple('Tick', ['bid', 'ask'])
+
+
+async def _leer(simbolo):
+    return [Tick(2000.0, 2000.2)]
+
+
+async def _recibir_un_tick(bus):
+    suscripcion = bus.suscribir('prueba', lambda: ['XAUUSD'], distancia=lambda s, bid, ask: 1.0)
+    await bus.iniciar()
+    try:
+        actualizacion = await asyncio.wait_for(suscripcion.obtener(), timeout=2)
+        # Un aviso también debe llegar al productor ya en marcha
+        bus.despertar('XAUUSD')
+        await asyncio.wait_for(suscripcion.obtener(), timeout=2)
+    finally:
+        bus.desuscribir(suscripcion)
+        await bus.detener()
+    return actualizacion
+
+
+def test_bus_creado_sin_loop_funciona_en_cada_asyncio_run():
+    # Como en main.py: el bus se construye al importar, antes de asyncio.run
+    bus = BusTicks(leer=_leer, planificador=PlanificadorSondeo(0.01, 0.05))
+    bus.despertar('XAUUSD')
+
+    for _ in range(2):
+        actualizacion = asyncio.run(_recibir_un_tick(bus))
+        assert actualizacion.simbolo == 'XAUUSD'
+        assert actualizacion.ultimo.bid == 2000.0
@@ -0,0 +1,22 @@
+from collections import namedtuple
+
+from utils.monitor import PlanificadorSondeo
+
+Tick = namedtuple('Tick', ['bid', 'ask'])
+
+
+def test_mercado_quieto_cerca_del_trigger_sondea_rapido():
+    planificador = PlanificadorSondeo(minimo=0.05, maximo=5.0)
+    quieto = [Tick(2000.0, 2000.2)]
+    planificador.programar('XAUUSD', quieto, 10.0, ahora=0.0)
+    # Segunda lectura sin cambios: velocidad medida exactamente 0
+    intervalo = planificador.programar('XAUUSD', quieto, 0.01, ahora=1.0)
+    assert intervalo == 0.05
+
+
+def test_mercado_quieto_lejos_del_trigger_sondea_lento():
+    planificador = PlanificadorSondeo(minimo=0.05, maximo=5.0)
+    quieto = [Tick(2000.0, 2000.2)]
+    planificador.programar('XAUUSD', quieto, 10.0, ahora=0.0)
+    intervalo = planificador.programar('XAUUSD', quieto, 50.0, ahora=1.0)
+    assert intervalo == 5.0
@@ -0,0 +1,324 @@
+"""
+Bus de Ticks
+===========
+
+Publicación/suscripción de precios dentro del proceso: una única tarea
+productora lee los ticks de MT5 y los reparte entre todos los componentes
+que los necesitan (monitor de órdenes, break-even, trailing, estadísticas),
+de modo que la carga sobre el terminal no crece con los consumidores.
+
+Componentes
+----------
+1. BusTicks
+   Productor único. En cada ciclo une los símbolos de interés de todas las
+   suscripciones, lee los que venció su sondeo (PlanificadorSondeo) y
+   publica el lote a cada suscriptor interesado.
+
+   ```python
+   bus = BusTicks(
+       leer=lambda symbol: ejecutor.ejecutar(cursor_ticks.leer, symbol),
+       preparar=lambda: ejecutor.ejecutar(sesion.asegurar)
+   )
+   suscripcion = bus.suscribir('monitor', libros.simbolos, distancia=libros.distancia)
+   await bus.iniciar()
+
+   actualizacion = await suscripcion.obtener()
+   actualizacion.bid_maximo, actualizacion.ask_minimo, actualizacion.ultimo
+   ```
+
+2. Suscripcion
+   Cola acotada de un consumidor. Guarda como máximo una actualización
+   pendiente por símbolo: si llegan ticks nuevos antes de que el consumidor
+   lea, se fusionan con la pendiente (coalescencia).
+
+3. ActualizacionTicks
+   Ticks de un símbolo aún no consumidos. Conserva solo los `max_ticks` más
+   recientes, pero el bid máximo y el ask mínimo cubren todos los recibidos,
+   para que ningún trigger tocado entre lecturas se pierda.
+
+Notas Importantes
+---------------
+- Un consumidor lento nunca frena al productor ni a otros consumidores: sus
+  ticks viejos se descartan y recibe el estado más reciente
+- La cadencia de cada símbolo la define la suscripción más urgente: la menor
+  distancia informada por las callbacks `distancia(simbolo, bid, ask)`
+- Las suscripciones sin callback de distancia se leen al intervalo máximo
+- Con `grabar` cada tick leído queda registrado, aunque luego se descarte
+  por coalescencia
+- BusTicks puede construirse sin loop corriendo (al importar): lo que
+  depende del loop se crea en `iniciar()`
+"""
+
+import asyncio
+import logging
+import time
+
+from utils.monitor import PlanificadorSondeo
+
+logger = logging.getLogger(__name__)
+
+
+class ActualizacionTicks:
+    """
+    Ticks pendientes de entrega de un símbolo.
+
+    Attributes:
+        simbolo (str): Símbolo de los ticks
+        ticks (list): Ticks más recientes, en orden (como máximo max_ticks)
+        bid_maximo (float): Bid máximo de todos los ticks recibidos
+        ask_minimo (float): Ask mínimo de todos los ticks recibidos
+        descartados (int): Ticks viejos descartados al fusionar
+    """
+
+    __slots__ = ('simbolo', 'ticks', 'bid_maximo', 'ask_minimo', 'descartados', 'max_ticks')
+
+    def __init__(self, simbolo, ticks, max_ticks):
+        self.simbolo = simbolo
+        self.max_ticks = max_ticks
+        self.ticks = []
+        self.bid_maximo = float('-inf')
+        self.ask_minimo = float('inf')
+        self.descartados = 0
+        self.fusionar(ticks)
+
+    @property
+    def ultimo(self):
+        return self.ticks[-1]
+
+    def fusionar(self, ticks):
+        """Agrega ticks nuevos descartando los más viejos que excedan max_ticks"""
+        self.bid_maximo = max(self.bid_maximo, max(t.bid for t in ticks))
+        self.ask_minimo = min(self.ask_minimo, min(t.ask for t in ticks))
+        self.ticks.extend(ticks)
+        sobrantes = len(self.ticks) - self.max_ticks
+        if sobrantes > 0:
+            del self.ticks[:sobrantes]
+            self.descartados += sobrantes
+
+
+class Suscripcion:
+    """
+    Consumidor del bus.
+
+    Attributes:
+        nombre (str): Nombre del consumidor, para logs y estadísticas
+        simbolos: Callable sin argumentos que devuelve los símbolos de interés
+        distancia: Callable (simbolo, bid, ask) -> distancia de precio al
+            próximo evento del consumidor, o None si no le urge el símbolo
+    """
+
+    def __init__(self, nombre, simbolos, distancia=None, max_simbolos=64, max_ticks=256):
+        self.nombre = nombre
+        self.simbolos = simbolos
+        self.distancia = distancia
+        self.max_ticks = max_ticks
+        self._cola = asyncio.Queue(maxsize=max_simbolos)
+        self._pendientes = {}  # simbolo -> ActualizacionTicks
+        self.entregadas = 0
+        self.coalescidas = 0
+        self.descartados = 0
+
+    def publicar(self, simbolo, ticks):
+        """Encola (o fusiona) los ticks de `simbolo` sin bloquear al productor"""
+        pendiente = self._pendientes.get(simbolo)
+        if pendiente is not None:
+            antes = pendiente.descartados
+            pendiente.fusionar(ticks)
+            self.descartados += pendiente.descartados - antes
+            self.coalescidas += 1
+            return
+        if self._cola.full():
+            # Más símbolos que capacidad: se pierde la actualización más vieja
+            viejo = self._cola.get_nowait()
+            perdida = self._pendientes.pop(viejo)
+            self.descartados += len(perdida.ticks)
+            logger.warning(f"Suscripción {self.nombre}: cola llena, descartada actualización de {viejo}")
+        self._pendientes[simbolo] = ActualizacionTicks(simbolo, ticks, self.max_ticks)
+        self._cola.put_nowait(simbolo)
+
+    async def obtener(self):
+        """Espera y devuelve la próxima ActualizacionTicks"""
+        simbolo = await self._cola.get()
+        self.entregadas += 1
+        return self._pendientes.pop(simbolo)
+
+    def obtener_pendientes(self):
+        """Todas las actualizaciones ya disponibles, sin esperar"""
+        actualizaciones = []
+        while not self._cola.empty():
+            actualizaciones.append(self._pendientes.pop(self._cola.get_nowait()))
+        self.entregadas += len(actualizaciones)
+        return actualizaciones
+
+    def estadisticas(self):
+        return {
+            'pendientes': self._cola.qsize(),
+            'entregadas': self.entregadas,
+            'coalescidas': self.coalescidas,
+            'ticks_descartados': self.descartados
+        }
+
+
+class BusTicks:
+    """
+    Productor único de ticks para todas las suscripciones.
+
+    Attributes:
+        leer: Corrutina (simbolo) -> lista de ticks nuevos (atributos bid, ask)
+        preparar: Corrutina opcional ejecutada antes de cada ciclo con lecturas
+        planificador (PlanificadorSondeo): Próximo sondeo de cada símbolo
+        grabar: Callable opcional (simbolo, ticks) que recibe cada lectura
+            antes de publicarla (p. ej. GrabadorTicks.grabar)
+        medir_ciclo: Callable opcional (ms) que recibe la duración de cada
+            ciclo con lecturas (preparar, leer y publicar)
+    """
+
+    def __init__(self, leer, preparar=None, planificador=None, grabar=None, medir_ciclo=None):
+        self.leer = leer
+        self.preparar = preparar
+        self.grabar = grabar
+        self.medir_ciclo = medir_ciclo
+        self.planificador = planificador or PlanificadorSondeo()
+        self.task = None
+        self.lecturas = 0
+        self._suscripciones = []
+        self._ultimos = {}      # simbolo -> último tick publicado
+        self._recibidos = {}    # simbolo -> monotonic de la última lectura con ticks nuevos
+        self.duracion_ciclo_ms = None
+        self._conocidos = set()
+        # Se crea en iniciar(): hasta Python 3.9 un Event queda atado al loop
+        # existente al crearlo, y el bus se construye al importar main.py
+        self._despertar = None
+
+    def suscribir(self, nombre, simbolos, distancia=None, **opciones):
+        """Registra un consumidor y devuelve su Suscripcion"""
+        suscripcion = Suscripcion(nombre, simbolos, distancia, **opciones)
+        self._suscripciones.append(suscripcion)
+        if self._despertar is not None:
+            self._despertar.set()
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        if suscripcion in self._suscripciones:
+            self._suscripciones.remove(suscripcion)
+
+    def despertar(self, simbolo=None):
+        """Fuerza la lectura de `simbolo` (o solo un ciclo nuevo) cuanto antes"""
+        if simbolo is not None:
+            self.planificador.adelantar(simbolo)
+        if self._despertar is not None:
+            self._despertar.set()
+
+    def ultimo(self, simbolo):
+        """Último tick publicado de `simbolo`, o None"""
+        return self._ultimos.get(simbolo)
+
+    def edades_ms(self):
+        """Ms desde el último tick nuevo de cada símbolo vigilado (None si nunca llegó)"""
+        ahora = time.monotonic()
+        return {simbolo: (ahora - self._recibidos[simbolo]) * 1000 if simbolo in self._recibidos else None
+                for simbolo in self._conocidos}
+
+    def simbolos(self):
+        """Unión de los símbolos de interés de todas las suscripciones"""
+        simbolos = set()
+        for suscripcion in self._suscripciones:
+            simbolos.update(suscripcion.simbolos())
+        return simbolos
+
+    def _distancia(self, interesadas, simbolo, tick):
+        distancias = []
+        for suscripcion in interesadas:
+            if suscripcion.distancia is not None:
+                distancia = suscripcion.distancia(simbolo, tick.bid, tick.ask)
+                if distancia is not None:
+                    distancias.append(distancia)
+        return min(distancias) if distancias else None
+
+    async def ciclo(self):
+        """
+        Lee los símbolos vencidos y publica sus ticks.
+
+        Returns:
+            float: Segundos hasta el próximo símbolo a leer
+        """
+        inicio = time.monotonic()
+        intereses = [(s, set(s.simbolos())) for s in list(self._suscripciones)]
+        simbolos = set().union(*(i for _, i in intereses)) if intereses else set()
+        for simbolo in self._conocidos - simbolos:
+            self.planificador.olvidar(simbolo)
+            self._ultimos.pop(simbolo, None)
+            self._recibidos.pop(simbolo, None)
+        self._conocidos = simbolos
+
+        vencidos = self.planificador.vencidos(simbolos)
+        if vencidos and self.preparar is not None:
+            await self.preparar()
+        for simbolo in vencidos:
+            try:
+                ticks = await self.leer(simbolo)
+            except Exception as e:
+                logger.error(f"Error obteniendo precio de {simbolo}: {e}")
+                self.planificador.reprogramar(simbolo)
+                continue
+            if not ticks:
+                self.planificador.reprogramar(simbolo)
+                continue
+            self.lecturas += 1
+            self._ultimos[simbolo] = ticks[-1]
+            self._recibidos[simbolo] = time.monotonic()
+            if self.grabar is not None:
+                try:
+                    self.grabar(simbolo, ticks)
+                except Exception as e:
+                    logger.error(f"Error grabando ticks de {simbolo}: {e}")
+            interesadas = [s for s, i in intereses if simbolo in i]
+            for suscripcion in interesadas:
+                suscripcion.publicar(simbolo, ticks)
+            distancia = self._distancia(interesadas, simbolo, ticks[-1])
+            self.planificador.programar(simbolo, ticks, distancia)
+        if vencidos:
+            self.duracion_ciclo_ms = (time.monotonic() - inicio) * 1000
+            if self.medir_ciclo is not None:
+                self.medir_ciclo(self.duracion_ciclo_ms)
+        return self.planificador.espera(simbolos)
+
+    async def _producir(self):
+        while True:
+            # Limpiar antes del ciclo: un aviso durante la lectura no se pierde
+            self._despertar.clear()
+            try:
+                espera = await self.ciclo()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error en bus de ticks: {e}")
+                espera = 5  # Esperar antes de reintentar
+            if espera > 0:
+                try:
+                    await asyncio.wait_for(self._despertar.wait(), timeout=espera)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def iniciar(self):
+        """Inicia la tarea productora en el loop actual (idempotente)"""
+        if self.task is None or self.task.done():
+            self._despertar = asyncio.Event()
+            self.task = asyncio.create_task(self._producir())
+
+    async def detener(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def estadisticas(self):
+        return {
+            'lecturas': self.lecturas,
+            'duracion_ciclo_ms': self.duracion_ciclo_ms,
+            'simbolos': sorted(self._conocidos),
+            'suscripciones': {s.nombre: s.estadisticas() for s in self._suscripciones}
+        }
@@ -26,8 +26,14 @@ Componentes del Sistema
    TP: 1.0550-1.0600-1.0650
    ```
 
-   Proceso de parsing:
-   a) Extrae el símbolo (ej: EURUSD)
+   Cada canal puede tener su propio formato (perfil): expresiones de tipo,
+   zona, SL y TP, regla de entrada y TP elegido. Los perfiles se definen en
+   config/perfiles_parser.json, se compilan una vez (cargar_perfiles) y se
+   eligen por chat_id: parse_senal(texto, chat_id=event.chat_id).
+
+   Proceso de parsing del perfil por defecto (GramaticaSenal):
+   a) Extrae el símbolo (ej: EURUSD); si falta o no está en el universo
+      configurado (configurar_simbolos) la señal se descarta
    b) Identifica tipo (BUY/SELL) y zona de entrada
    c) Calcula precio de entrada óptimo:
       - Para SELL: mínimo de zona + 0.5
@@ -46,7 +52,11 @@ Componentes del Sistema
    ```
 
 2. Detector de Acciones (detectar_accion_mensaje)
-   Identifica comandos y acciones en mensajes de respuesta.
+   Identifica comandos y acciones en mensajes de respuesta. Todas las
+   frases de ACCIONES_MENSAJE se buscan juntas con un autómata de
+   Aho-Corasick (AutomataPalabras) en una sola pasada; si aparecen frases
+   de varias acciones gana la de mayor prioridad:
+   buy_now > sell_now > round > cerrar > be > cancel > perdida > hit_entry
 
    Acciones Soportadas:
    ```
@@ -166,6 +176,11 @@ Ejemplos de Uso Completo
 Notas Importantes
 ---------------
 - Las señales deben seguir el formato especificado
+- Un símbolo fuera del universo nunca se reemplaza por otro: la señal se
+  descarta con un aviso en el log
+- parse_many reparte historiales grandes entre procesos y no usa el caché
+- Los resultados se guardan en cache_parseo (LRU de CACHE_PARSEO_MAXIMO
+  textos): un repost o una edición idéntica no se vuelve a parsear
 - Las acciones son case-insensitive
 - El sistema maneja múltiples variantes de cada comando
 - Se implementa protección contra loops infinitos
@@ -176,107 +191,558 @@ Autor: Fran
 Última actualización: 2024-01-01
 """
 
+import json
 import re
 import logging
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
-def parse_senal(texto):
+# Resultados guardados por CacheParseo (parse, acción e info por texto)
+CACHE_PARSEO_MAXIMO = 4096
+
+
+class CacheParseo:
+    """
+    Caché LRU acotado de resultados de parseo.
+
+    La clave es (función, blake2b del texto normalizado con strip y lower):
+    reposts y ediciones con el mismo texto no vuelven a evaluar ninguna
+    expresión. Los resultados dict se guardan y entregan como copias, para
+    que quien los modifique no altere el caché.
+
+    ```python
+    cache_parseo.obtener('parse_senal:por_defecto', texto, perfiles_parser.por_defecto.parse)
+    cache_parseo.estadisticas()
+    # {'entradas': 120, 'maximo': 4096, 'aciertos': 80, 'fallos': 120, 'tasa_aciertos': 0.4}
+    ```
+    """
+
+    def __init__(self, maximo=CACHE_PARSEO_MAXIMO):
+        self.maximo = maximo
+        self._entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @staticmethod
+    def clave(nombre, texto):
+        normalizado = texto.strip().lower().encode('utf-8', 'surrogatepass')
+        return nombre, blake2b(normalizado, digest_size=16).digest()
+
+    def obtener(self, nombre, texto, funcion):
+        """Resultado de funcion(texto), del caché si el texto ya se vio"""
+        clave = self.clave(nombre, texto)
+        try:
+            resultado = self._entradas[clave]
+        except KeyError:
+            self.fallos += 1
+            resultado = funcion(texto)
+            self._entradas[clave] = dict(resultado) if isinstance(resultado, dict) else resultado
+            if len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+            return resultado
+        self.aciertos += 1
+        self._entradas.move_to_end(clave)
+        return dict(resultado) if isinstance(resultado, dict) else resultado
+
+    def limpiar(self):
+        self._entradas.clear()
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._entradas),
+            'maximo': self.maximo,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas, 3) if consultas else None
+        }
+
+
+# Caché compartido por parse_senal, detectar_accion_mensaje y extract_trade_info
+cache_parseo = CacheParseo()
+
+# Universo de símbolos aceptados por defecto (ver configurar_simbolos)
+SIMBOLOS_SENALES = ("XAUUSD", "EURUSD", "GBPUSD", "USDJPY")
+
+# Códigos que forman un par: "GBPJPY" se reconoce como símbolo (y se
+# rechaza si no está en el universo) en lugar de ignorarse
+CODIGOS_PARES = frozenset(("XAU", "XAG", "EUR", "USD", "GBP", "JPY", "AUD", "NZD", "CAD", "CHF"))
+
+NUMERO = r'\d+\.?\d*'
+
+# Perfil del formato original; los perfiles de config/perfiles_parser.json
+# se completan con estos valores. Las expresiones se aplican al texto en
+# mayúsculas y "{numero}" se reemplaza por NUMERO
+PERFIL_POR_DEFECTO = {
+    'nombre': 'por_defecto',
+    'chats': [],                     # chat_id de los canales que usan el perfil
+    'simbolos': None,                # None: universo global (configurar_simbolos)
+    'requiere': 'ZONE',              # Texto obligatorio (descarte rápido); None sin filtro
+    'compra': 'BUY',                 # Alternativas que indican compra
+    'venta': 'SELL',                 # Alternativas que indican venta
+    'zona': r'ZONE\s*(?P<min>{numero})\s*-\s*(?P<max>{numero})',  # En la línea del tipo; max opcional
+    'sl': r'SL[:\s]+(?P<sl>{numero})',
+    'tp': r'TP[:\s]+(?P<tps>[\d\-.]+)',
+    'separador_tp': '-',
+    'indice_tp': 1,                  # TP elegido de la lista (negativos desde el final; si no existe, el extremo más cercano)
+    'entrada': {'BUY': ['max', -1], 'SELL': ['min', 0.5]},  # Extremo (min/max/medio) + desplazamiento
+}
+
+_REFERENCIAS_ENTRADA = ('min', 'max', 'medio')
+
+# Tipos aceptados para cada clave de un perfil
+_TIPOS_PERFIL = {
+    'nombre': (str,),
+    'chats': (list,),
+    'simbolos': (list, type(None)),
+    'requiere': (str, type(None)),
+    'compra': (str,),
+    'venta': (str,),
+    'zona': (str,),
+    'sl': (str, type(None)),
+    'tp': (str, type(None)),
+    'separador_tp': (str,),
+    'indice_tp': (int,),
+    'entrada': (dict,),
+}
+
+
+class GramaticaSenal:
+    """
+    Gramática precompilada de señales para un perfil y un universo de símbolos.
+
+    Todas las expresiones del perfil se compilan una vez al crear la
+    gramática; cada mensaje se pasa a mayúsculas una vez y los que no tienen
+    el texto `requiere` se descartan sin evaluar ninguna expresión (la
+    mayoría: respuestas y comentarios del canal).
+
+    El símbolo es el primero que menciona el texto: un símbolo del universo
+    o una palabra de seis letras formada por dos CODIGOS_PARES. Si no hay
+    ninguno o no está en el universo la señal se descarta.
+
+    Attributes:
+        nombre (str): Nombre del perfil
+        simbolos (frozenset): Símbolos aceptados, en mayúsculas
+
+    Raises:
+        ValueError: Si el perfil tiene claves desconocidas, valores del
+            tipo equivocado, expresiones inválidas o sin los grupos necesarios
+    """
+
+    def __init__(self, simbolos=SIMBOLOS_SENALES, perfil=None):
+        if perfil is not None and not isinstance(perfil, dict):
+            raise ValueError(f"Perfil inválido {perfil!r}: debe ser un objeto")
+        desconocidas = set(perfil or {}) - set(PERFIL_POR_DEFECTO)
+        perfil = {**PERFIL_POR_DEFECTO, **(perfil or {})}
+        self.perfil = perfil
+        self.nombre = perfil['nombre']
+        if desconocidas:
+            raise ValueError(f"Perfil {self.nombre}: claves desconocidas {sorted(desconocidas)}")
+        self._validar_tipos(perfil)
+
+        self.simbolos = frozenset(s.upper() for s in (perfil['simbolos'] or simbolos))
+        # Los más largos primero: "XAUUSD.M" antes que "XAUUSD"
+        universo = '|'.join(re.escape(s) for s in sorted(self.simbolos, key=len, reverse=True))
+        self._candidatos = re.compile(rf'\b(?:{universo}|[A-Z]{{6}})\b')
+
+        self._requiere = perfil['requiere'].upper() if perfil['requiere'] else None
+        self._orden = self._compilar(
+            rf"\b(?:(?P<compra>{perfil['compra']})|(?P<venta>{perfil['venta']}))\b.*?{perfil['zona']}",
+            ('min',)
+        )
+        self._sl = self._compilar(perfil['sl'], ('sl',)) if perfil['sl'] else None
+        self._tp = self._compilar(perfil['tp'], ('tps',)) if perfil['tp'] else None
+        self._separador_tp = perfil['separador_tp']
+        self._indice_tp = int(perfil['indice_tp'])
+
+        # Un lado que el perfil no define usa la regla por defecto
+        entradas = {**PERFIL_POR_DEFECTO['entrada'], **perfil['entrada']}
+        self._entrada = {}
+        for tipo in ('BUY', 'SELL'):
+            regla = entradas[tipo]
+            if (not isinstance(regla, (list, tuple)) or len(regla) != 2 or regla[0] not in _REFERENCIAS_ENTRADA
+                    or isinstance(regla[1], bool) or not isinstance(regla[1], (int, float))):
+                raise ValueError(f"Perfil {self.nombre}: entrada {tipo} debe ser [{'|'.join(_REFERENCIAS_ENTRADA)}, desplazamiento]")
+            self._entrada[tipo] = (regla[0], float(regla[1]))
+
+    def _validar_tipos(self, perfil):
+        for clave, tipos in _TIPOS_PERFIL.items():
+            valor = perfil[clave]
+            if not isinstance(valor, tipos) or isinstance(valor, bool):
+                nombres = ' o '.join('null' if t is type(None) else t.__name__ for t in tipos)
+                raise ValueError(f"Perfil {self.nombre}: {clave} debe ser {nombres}, no {valor!r}")
+        if not all(isinstance(c, int) and not isinstance(c, bool) for c in perfil['chats']):
+            raise ValueError(f"Perfil {self.nombre}: chats debe ser una lista de chat_id enteros")
+        if perfil['simbolos'] is not None and not all(isinstance(s, str) for s in perfil['simbolos']):
+            raise ValueError(f"Perfil {self.nombre}: simbolos debe ser una lista de textos")
+        if not perfil['separador_tp']:
+            raise ValueError(f"Perfil {self.nombre}: separador_tp no puede estar vacío")
+
+    def _compilar(self, expresion, grupos):
+        try:
+            patron = re.compile(expresion.replace('{numero}', NUMERO))
+        except re.error as e:
+            raise ValueError(f"Perfil {self.nombre}: expresión inválida {expresion!r}: {e}") from e
+        faltantes = [g for g in grupos if g not in patron.groupindex]
+        if faltantes:
+            raise ValueError(f"Perfil {self.nombre}: a {expresion!r} le faltan los grupos {faltantes}")
+        return patron
+
+    def _simbolo(self, texto):
+        """Primer símbolo mencionado en `texto`, o None"""
+        for candidato in self._candidatos.finditer(texto):
+            palabra = candidato.group()
+            if palabra in self.simbolos or (palabra[:3] in CODIGOS_PARES and palabra[3:] in CODIGOS_PARES):
+                return palabra
+        return None
+
+    def parse(self, texto, avisar=True):
+        """
+        Extrae la señal de `texto` (ver parse_senal).
+
+        Args:
+            avisar (bool): Registrar en el log las señales descartadas
+
+        Returns:
+            dict o None: None si no hay orden, o si el símbolo falta o no
+            está en el universo
+        """
+        texto = texto.upper()
+        if self._requiere is not None and self._requiere not in texto:
+            return None
+
+        # Extraer tipo y rango (BUY/SELL ZONE min-max)
+        orden = self._orden.search(texto)
+        if not orden:
+            return None
+        tipo = 'BUY' if orden.group('compra') is not None else 'SELL'
+
+        simbolo = self._simbolo(texto)
+        if simbolo is None:
+            if avisar:
+                logger.warning(f"Señal {tipo} descartada ({self.nombre}): sin símbolo")
+            return None
+        if simbolo not in self.simbolos:
+            if avisar:
+                logger.warning(f"Señal {tipo} descartada ({self.nombre}): símbolo {simbolo} fuera del universo configurado")
+            return None
+
+        rango_min = float(orden.group('min'))
+        rango_max = float(orden.group('max')) if orden.re.groupindex.get('max') and orden.group('max') else rango_min
+
+        # Entrada modificada según tipo
+        referencia, desplazamiento = self._entrada[tipo]
+        if referencia == 'min':
+            entrada = rango_min + desplazamiento
+        elif referencia == 'max':
+            entrada = rango_max + desplazamiento
+        else:  # medio
+            entrada = (rango_min + rango_max) / 2 + desplazamiento
+
+        # Extraer SL
+        sl_match = self._sl.search(texto) if self._sl else None
+        sl = float(sl_match.group('sl')) if sl_match else None
+
+        # Extraer TPs separados por guiones
+        tp_match = self._tp.search(texto) if self._tp else None
+        primer_tp = None
+        if tp_match:
+            tps = [float(x) for x in tp_match.group('tps').split(self._separador_tp) if x]
+            if tps:
+                # Con menos TPs que indice_tp se usa el más cercano a él
+                # (TP 2 de una señal con un solo TP: ese TP)
+                primer_tp = tps[max(-len(tps), min(self._indice_tp, len(tps) - 1))]
+
+        return {
+            'simbolo': simbolo,
+            'tipo': tipo,
+            'entrada': entrada,
+            'sl': sl,
+            'tp': primer_tp
+        }
+
+
+class PerfilesParser:
+    """
+    Gramáticas compiladas de todos los perfiles, seleccionadas por chat_id.
+
+    ```python
+    perfiles = PerfilesParser.desde_archivo('config/perfiles_parser.json')
+    perfiles.para_chat(-1001234567890).parse(texto)
+    ```
+
+    Un chat sin perfil usa el perfil "por_defecto" (el de
+    PERFIL_POR_DEFECTO, o el que el archivo defina con ese nombre).
+    """
+
+    def __init__(self, perfiles=(), simbolos=SIMBOLOS_SENALES):
+        if not isinstance(perfiles, (list, tuple)):
+            raise ValueError(f"perfiles debe ser una lista, no {perfiles!r}")
+        for definicion in perfiles:
+            if not isinstance(definicion, dict):
+                raise ValueError(f"Perfil inválido {definicion!r}: debe ser un objeto")
+        self.definiciones = [dict(p) for p in perfiles]
+        self.simbolos = tuple(simbolos)
+        self.gramaticas = {}
+        self._por_chat = {}
+        for definicion in [PERFIL_POR_DEFECTO] + self.definiciones:
+            gramatica = GramaticaSenal(self.simbolos, definicion)
+            self.gramaticas[gramatica.nombre] = gramatica
+        for gramatica in self.gramaticas.values():
+            for chat_id in gramatica.perfil['chats']:
+                if chat_id in self._por_chat:
+                    raise ValueError(f"Chat {chat_id} asignado a los perfiles {self._por_chat[chat_id].nombre} y {gramatica.nombre}")
+                self._por_chat[chat_id] = gramatica
+        self.por_defecto = self.gramaticas[PERFIL_POR_DEFECTO['nombre']]
+
+    @classmethod
+    def desde_archivo(cls, ruta, simbolos=SIMBOLOS_SENALES):
+        """Carga {"perfiles": [...]} de un JSON"""
+        with open(ruta, encoding='utf-8') as archivo:
+            datos = json.load(archivo)  # JSONDecodeError es un ValueError
+        if not isinstance(datos, dict):
+            raise ValueError(f"{ruta}: se esperaba un objeto {{\"perfiles\": [...]}}")
+        return cls(datos.get('perfiles', []), simbolos)
+
+    def con_simbolos(self, simbolos):
+        """Mismos perfiles con otro universo global"""
+        return PerfilesParser(self.definiciones, simbolos)
+
+    def para_chat(self, chat_id):
+        """Gramática del chat (la por defecto si no tiene perfil)"""
+        return self._por_chat.get(chat_id, self.por_defecto)
+
+
+# Perfiles usados por parse_senal
+perfiles_parser = PerfilesParser()
+
+
+def configurar_simbolos(simbolos):
+    """Reemplaza el universo de símbolos aceptados por parse_senal"""
+    global perfiles_parser
+    perfiles_parser = perfiles_parser.con_simbolos(simbolos)
+    cache_parseo.limpiar()  # Los resultados dependen del universo
+
+
+def cargar_perfiles(ruta):
+    """
+    Compila los perfiles de `ruta` y los usa en parse_senal y parse_many.
+
+    Raises:
+        ValueError: Si algún perfil es inválido (se conservan los anteriores)
+    """
+    global perfiles_parser
+    perfiles_parser = PerfilesParser.desde_archivo(ruta, perfiles_parser.simbolos)
+    cache_parseo.limpiar()
+    logger.info(f"Perfiles de parser cargados: {', '.join(perfiles_parser.gramaticas)}")
+    return perfiles_parser
+
+
+def parse_senal(texto, chat_id=None):
     """
     Extrae información de una señal de trading y devuelve:
     símbolo, tipo, entrada, sl, y solo el primer tp.
+    Las señales sin símbolo o con un símbolo fuera del universo
+    configurado se descartan (None).
+    Con `chat_id` se usa el perfil de ese canal (ver cargar_perfiles).
+    """
+    gramatica = perfiles_parser.para_chat(chat_id)
+    return cache_parseo.obtener(f'parse_senal:{gramatica.nombre}', texto, gramatica.parse)
+
+# Textos por tarea de parse_many
+PARSE_MANY_LOTE = 2000
+
+
+def _parsear_lote(gramatica, textos):
+    # Los descartes de un backfill no son avisos operativos
+    return [gramatica.parse(texto, avisar=False) for texto in textos]
+
+
+def parse_many(textos, procesos=None, lote=PARSE_MANY_LOTE, en_vuelo=None, chat_id=None):
     """
-    texto = texto.upper()
+    Parsea muchos textos en un pool de procesos (backfill de historial).
 
-    # Extraer símbolo (ej: XAUUSD)
-    simbolo_match = re.search(r'\b(XAUUSD|EURUSD|GBPUSD|USDJPY)\b', texto)
-    simbolo = simbolo_match.group(1) if simbolo_match else "XAUUSD"
+    Los textos se consumen de a `lote` a medida que se necesitan y cada
+    lote se parsea en un proceso; los resultados se entregan en el orden
+    de entrada. Como mucho hay `en_vuelo` lotes enviados sin consumir, así
+    la memoria no crece con el tamaño del historial.
+
+    Args:
+        textos: Iterable de textos (puede ser un generador)
+        procesos (int): Procesos del pool (default: os.cpu_count());
+            1 parsea en este proceso
+        lote (int): Textos por tarea
+        en_vuelo (int): Lotes pendientes como máximo (default: 2 por proceso)
+        chat_id: Canal de los textos, elige el perfil (default: por_defecto)
+
+    Yields:
+        dict o None: Resultado de parse_senal de cada texto, en orden
+
+    Ejemplo:
+    ```python
+    for texto, senal in zip(textos, parse_many(textos)):
+        ...
+    ```
+    """
+    procesos = procesos or os.cpu_count() or 1
+    gramatica = perfiles_parser.para_chat(chat_id)
+    iterador = iter(textos)
+    lotes = iter(lambda: list(islice(iterador, lote)), [])
+
+    if procesos == 1:
+        for textos_lote in lotes:
+            yield from _parsear_lote(gramatica, textos_lote)
+        return
+
+    en_vuelo = en_vuelo or 2 * procesos
+    with ProcessPoolExecutor(procesos) as pool:
+        pendientes = deque()
+        for textos_lote in lotes:
+            pendientes.append(pool.submit(_parsear_lote, gramatica, textos_lote))
+            if len(pendientes) >= en_vuelo:
+                yield from pendientes.popleft().result()
+        while pendientes:
+            yield from pendientes.popleft().result()
+
+
+# Vocabulario de acciones: (acción, prioridad, frases). Si un mensaje
+# contiene frases de varias acciones gana la de mayor prioridad, es decir
+# el número más bajo (1 = buy_now)
+ACCIONES_MENSAJE = (
+    ('buy_now', 1, ('buy now',)),
+    ('sell_now', 2, ('sell now',)),
+    ('round', 3, ('round', 'ronda')),
+    ('cerrar', 4, ('close', 'closing', 'closed', 'exit now', 'exit trade')),
+    ('be', 5, ('break even', 'move to be', 'move stop', 'stop to entry',
+               'stop loss to entry', 'set breakeven now move', 'locked')),
+    ('cancel', 6, ('cancel', 'cancelar', 'cancelled')),
+    ('perdida', 7, ('hit risk', 'stop hit', 'sl hit')),
+    ('hit_entry', 8, ('hit entry', 'entry now', 'enter now', 'execute now',
+                      'take entry', 'now:')),
+)
+
+# Con "round" en el texto, cualquiera de estas frases anula el mensaje
+# (no es una orden de nueva ronda: "don't round", "round sl", "vip round"...)
+INVALIDAN_ROUND = ("don't", "dont", "sl", "tp", "vip")
+
+
+class AutomataPalabras:
+    """
+    Autómata de Aho-Corasick sobre un conjunto fijo de frases.
+
+    Se compila una vez como autómata determinista completo (cada estado ya
+    incluye las transiciones de su enlace de falla), así la búsqueda es una
+    sola pasada por el texto con una consulta de diccionario por carácter,
+    sin importar cuántas frases haya.
+
+    ```python
+    automata = AutomataPalabras(['move to be', 'be', 'close'])
+    automata.buscar('pls move to be now')   # {'move to be', 'be'}
+    ```
+    """
+
+    def __init__(self, frases):
+        self.frases = tuple(dict.fromkeys(frases))
+        # Trie
+        transiciones = [{}]
+        salidas = [set()]
+        for frase in self.frases:
+            estado = 0
+            for caracter in frase:
+                siguiente = transiciones[estado].get(caracter)
+                if siguiente is None:
+                    siguiente = len(transiciones)
+                    transiciones[estado][caracter] = siguiente
+                    transiciones.append({})
+                    salidas.append(set())
+                estado = siguiente
+            salidas[estado].add(frase)
+
+        # Enlaces de falla en anchura; cada estado hereda las transiciones y
+        # salidas de su falla, que ya está completa por el orden del recorrido
+        completas = [None] * len(transiciones)
+        completas[0] = dict(transiciones[0])
+        cola = []
+        for siguiente in transiciones[0].values():
+            cola.append((siguiente, 0))
+        for estado, falla in cola:
+            salidas[estado] |= salidas[falla]
+            completas[estado] = {**completas[falla], **transiciones[estado]}
+            for caracter, siguiente in transiciones[estado].items():
+                cola.append((siguiente, completas[falla].get(caracter, 0)))
+
+        self._transiciones = completas
+        self._salidas = [frozenset(salida) if salida else None for salida in salidas]
+
+    def buscar(self, texto):
+        """Frases que aparecen en `texto` (en cualquier posición)"""
+        transiciones = self._transiciones
+        salidas = self._salidas
+        encontradas = set()
+        estado = 0
+        for caracter in texto:
+            estado = transiciones[estado].get(caracter, 0)
+            if salidas[estado] is not None:
+                encontradas |= salidas[estado]
+        return encontradas
+
+
+class DetectorAcciones:
+    """
+    Detecta la acción de un mensaje con un único AutomataPalabras.
+
+    Attributes:
+        acciones (tuple): Tabla (acción, prioridad, frases), ver ACCIONES_MENSAJE
+        invalidan_round (tuple): Frases que anulan un mensaje con "round"
+    """
+
+    def __init__(self, acciones=ACCIONES_MENSAJE, invalidan_round=INVALIDAN_ROUND):
+        self.acciones = tuple(acciones)
+        self.invalidan_round = frozenset(invalidan_round)
+        self._accion = {}  # frase -> (prioridad, acción)
+        for accion, prioridad, frases in self.acciones:
+            for frase in frases:
+                anterior = self._accion.get(frase)
+                if anterior is None or prioridad < anterior[0]:
+                    self._accion[frase] = (prioridad, accion)
+        self.automata = AutomataPalabras(list(self._accion) + ['round'] + list(self.invalidan_round))
+
+    def detectar(self, texto):
+        """Ver detectar_accion_mensaje"""
+        texto = texto.lower().strip()
+        encontradas = self.automata.buscar(texto)
+
+        # Primero verificar si contiene palabras que invalidan Round
+        if 'round' in encontradas and not self.invalidan_round.isdisjoint(encontradas):
+            return None
+
+        candidatas = [self._accion[frase] for frase in encontradas if frase in self._accion]
+        if candidatas:
+            return min(candidatas)[1]
+
+        # Revisar TP específicamente
+        if texto.startswith('tp'):
+            return texto  # Retorna el texto completo del TP
 
-    # Extraer tipo y rango (BUY/SELL ZONE min-max)
-    orden = re.search(r'\b(BUY|SELL)\b.*?ZONE\s*(\d+\.?\d*)\s*-\s*(\d+\.?\d*)', texto)
-    if not orden:
         return None
 
-    tipo = orden.group(1)
-    rango_min = float(orden.group(2))
-    rango_max = float(orden.group(3))
-
-    # Entrada modificada según tipo
-    if tipo == "SELL":
-        entrada = rango_min + 0.5
-    else:  # BUY
-        entrada = rango_max - 1
-
-    # Extraer SL
-    sl_match = re.search(r'SL[:\s]+(\d+\.?\d*)', texto)
-    sl = float(sl_match.group(1)) if sl_match else None
-
-    # Extraer TPs separados por guiones
-    tp_match = re.search(r'TP[:\s]+([\d\-.]+)', texto)
-    primer_tp = None
-    if tp_match:
-        tps = [float(x) for x in tp_match.group(1).split('-') if x]
-        if tps:
-            primer_tp = tps[1]
-
-    return {
-        'simbolo': simbolo,
-        'tipo': tipo,
-        'entrada': entrada,
-        'sl': sl,
-        'tp': primer_tp
-    }
+
+# Detector usado por detectar_accion_mensaje
+detector_acciones = DetectorAcciones()
+
 
 def detectar_accion_mensaje(texto):
     """
     Detecta el tipo de acción en el mensaje.
     Retorna: 'cerrar', 'be', 'cancel', 'hit_entry', 'round', 'tp', 'perdida', 'buy_now', 'sell_now' o None
+    Con frases de varias acciones gana la de mayor prioridad (ACCIONES_MENSAJE).
     """
-    texto = texto.lower().strip()
-    
-    # Primero verificar si contiene palabras que invalidan Round
-    palabras_invalidas = ["don't", "dont", "sl", "tp", "vip"]
-    if any(palabra in texto for palabra in palabras_invalidas) and "round" in texto:
-        return None
-        
-    # Verificar comandos de ejecución inmediata
-    if "buy now" in texto:
-        return "buy_now"
-    if "sell now" in texto:
-        return "sell_now"
-        
-    # Verificar Round antes que otras acciones
-    if "round" in texto or "ronda" in texto:
-        return "round"
-    
-    # Acciones básicas con múltiples variantes
-    acciones = {
-        'cerrar': [
-            'close', 'closing', 'closed', 'exit now', 'exit trade'
-        ],
-        'be': [
-            'break even', 'move to be', 'move stop', 'stop to entry',
-            'stop loss to entry', 'set breakeven now move', 'locked'
-        ],
-        'cancel': ['cancel', 'cancelar', 'cancelled'],
-        'perdida': ['hit risk', 'stop hit', 'sl hit'],
-        'hit_entry': [
-            'hit entry', 'entry now', 'enter now', 'execute now', 
-            'take entry', 'NOW:'
-        ]
-    }
-
-    # Revisar acciones básicas
-    for accion, palabras_clave in acciones.items():
-        for palabra in palabras_clave:
-            if palabra in texto:
-                return accion
-
-    # Revisar TP específicamente
-    if texto.startswith('tp'):
-        return texto  # Retorna el texto completo del TP
-
-    return None
+    return cache_parseo.obtener('detectar_accion_mensaje', texto, detector_acciones.detectar)
 
 async def encontrar_senal_original(mensaje_actual, client, mensajes_senales, ordenes_pendientes, senales_activas, senales_canceladas):
     """
@@ -346,6 +812,9 @@ def extract_trade_info(texto):
     """
     Función auxiliar para extraer información adicional de trading
     """
+    return cache_parseo.obtener('extract_trade_info', texto, _extract_trade_info)
+
+def _extract_trade_info(texto):
     info = {}
     
     # Extraer información de lotes si existe
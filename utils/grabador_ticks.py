@@ -0,0 +1,293 @@
+"""
+Grabador de Ticks
+================
+
+Registro de todos los ticks leídos de MT5 en archivos mapeados en memoria,
+uno por símbolo y por día, para auditar entradas mal disparadas y
+reproducir el mercado tal como lo vio el monitor.
+
+Componentes
+----------
+1. GrabadorTicks
+   Recibe los ticks de cada lectura y los agrega al archivo del símbolo y
+   día del tick (rota solo al cambiar de día).
+
+   ```python
+   grabador = GrabadorTicks('data/ticks')
+   grabador.grabar('XAUUSD', ticks)     # Ticks con time_msc, bid y ask
+   grabador.cerrar()
+   # data/ticks/XAUUSD/2024-01-01.ticks
+   ```
+
+2. ArchivoTicks
+   Un archivo abierto para escritura. Crece en bloques preasignados y cada
+   registro se escribe con `struct.pack_into` directamente sobre el mmap:
+   agregar un tick no crea objetos nuevos.
+
+3. LectorTicks
+   Lectura sin copias: los rangos son vistas (memoryview o array de NumPy)
+   sobre el mismo mmap.
+
+   ```python
+   lector = LectorTicks('data/ticks/XAUUSD/2024-01-01.ticks')
+   desde, hasta = lector.rango(inicio_msc, fin_msc)
+   for time_msc, bid, ask in lector.iterar(desde, hasta):
+       ...
+   ticks = lector.como_array()[desde:hasta]   # Requiere NumPy
+   ticks['bid'].max()
+   ```
+
+Formato
+------
+```
+Cabecera (16 bytes): b'TICK' | versión u16 | tamaño de registro u16 | cantidad i64
+Registro (24 bytes): time_msc i64 | bid f64 | ask f64   (little-endian)
+```
+
+Notas Importantes
+---------------
+- La cantidad de la cabecera se actualiza después de escribir el registro:
+  tras un corte solo puede perderse el último tick, nunca leerse uno a medias
+- El día de cada archivo sale del time_msc del tick (hora del servidor)
+- Un archivo tiene un solo escritor: con monitor multi-proceso cada proceso
+  graba los símbolos de su shard
+- Mientras existan vistas de un LectorTicks (memoryview o arrays de NumPy)
+  el archivo no puede cerrarse
+"""
+
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:  # La lectura como array es opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAGICO = b'TICK'
+VERSION = 1
+CABECERA = struct.Struct('<4sHHq')
+REGISTRO = struct.Struct('<qdd')
+CANTIDAD = struct.Struct('<q')
+OFFSET_CANTIDAD = 8
+
+# Registros preasignados cada vez que un archivo se llena (~384 KB)
+REGISTROS_POR_BLOQUE = 16384
+
+MS_POR_DIA = 86_400_000
+
+if np is not None:
+    DTYPE_TICK = np.dtype([('time_msc', '<i8'), ('bid', '<f8'), ('ask', '<f8')])
+
+
+def _leer_cabecera(mapa, ruta):
+    magico, version, tamano, cantidad = CABECERA.unpack_from(mapa, 0)
+    if magico != MAGICO or version != VERSION or tamano != REGISTRO.size:
+        raise ValueError(f"{ruta} no es un archivo de ticks válido")
+    return cantidad
+
+
+class ArchivoTicks:
+    """
+    Archivo de ticks abierto para agregar registros.
+
+    Attributes:
+        ruta (str): Ruta del archivo
+        cantidad (int): Registros escritos
+        capacidad (int): Registros que entran sin agrandar el archivo
+    """
+
+    def __init__(self, ruta, bloque=REGISTROS_POR_BLOQUE):
+        self.ruta = ruta
+        self.bloque = bloque
+        nuevo = not os.path.exists(ruta)
+        self._archivo = open(ruta, 'w+b' if nuevo else 'r+b')
+        if nuevo:
+            self._archivo.truncate(CABECERA.size + bloque * REGISTRO.size)
+        self._mapear()
+        if nuevo:
+            CABECERA.pack_into(self._mapa, 0, MAGICO, VERSION, REGISTRO.size, 0)
+            self.cantidad = 0
+        else:
+            self.cantidad = min(_leer_cabecera(self._mapa, ruta), self.capacidad)
+
+    def _mapear(self):
+        self._mapa = mmap.mmap(self._archivo.fileno(), 0)
+        self.capacidad = (len(self._mapa) - CABECERA.size) // REGISTRO.size
+
+    def _crecer(self):
+        self._mapa.close()
+        self._archivo.truncate(CABECERA.size + (self.capacidad + self.bloque) * REGISTRO.size)
+        self._mapear()
+
+    def agregar(self, time_msc, bid, ask):
+        """Escribe un registro al final del archivo"""
+        if self.cantidad == self.capacidad:
+            self._crecer()
+        REGISTRO.pack_into(self._mapa, CABECERA.size + self.cantidad * REGISTRO.size, time_msc, bid, ask)
+        self.cantidad += 1
+        CANTIDAD.pack_into(self._mapa, OFFSET_CANTIDAD, self.cantidad)
+
+    def flush(self):
+        self._mapa.flush()
+
+    def cerrar(self):
+        if not self._mapa.closed:
+            self._mapa.flush()
+            self._mapa.close()
+        self._archivo.close()
+
+
+class GrabadorTicks:
+    """
+    Graba los ticks de cada símbolo en archivos por día.
+
+    Attributes:
+        directorio (str): Carpeta raíz, con una subcarpeta por símbolo
+        grabados (int): Ticks grabados desde el inicio
+    """
+
+    def __init__(self, directorio, bloque=REGISTROS_POR_BLOQUE):
+        self.directorio = directorio
+        self.bloque = bloque
+        self.grabados = 0
+        self._abiertos = {}  # simbolo -> (día, ArchivoTicks)
+
+    def ruta(self, simbolo, dia):
+        """Ruta del archivo de `simbolo` para el día (días desde epoch)"""
+        fecha = datetime.fromtimestamp(dia * 86400, timezone.utc).strftime('%Y-%m-%d')
+        return os.path.join(self.directorio, simbolo, f"{fecha}.ticks")
+
+    def _archivo(self, simbolo, dia):
+        abierto = self._abiertos.get(simbolo)
+        if abierto is not None:
+            if abierto[0] == dia:
+                return abierto[1]
+            abierto[1].cerrar()
+        ruta = self.ruta(simbolo, dia)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        archivo = ArchivoTicks(ruta, self.bloque)
+        self._abiertos[simbolo] = (dia, archivo)
+        return archivo
+
+    def grabar(self, simbolo, ticks):
+        """
+        Agrega `ticks` (con time_msc, bid y ask, en orden) al archivo del día.
+        """
+        if not ticks:
+            return
+        dia = ticks[0].time_msc // MS_POR_DIA
+        archivo = self._archivo(simbolo, dia)
+        limite = (dia + 1) * MS_POR_DIA
+        for tick in ticks:
+            if tick.time_msc >= limite:
+                dia = tick.time_msc // MS_POR_DIA
+                archivo = self._archivo(simbolo, dia)
+                limite = (dia + 1) * MS_POR_DIA
+            archivo.agregar(tick.time_msc, tick.bid, tick.ask)
+        self.grabados += len(ticks)
+
+    def flush(self):
+        for _, archivo in self._abiertos.values():
+            archivo.flush()
+
+    def cerrar(self):
+        for _, archivo in self._abiertos.values():
+            try:
+                archivo.cerrar()
+            except Exception as e:
+                logger.error(f"Error cerrando {archivo.ruta}: {e}")
+        self._abiertos.clear()
+
+    def estadisticas(self):
+        return {
+            'grabados': self.grabados,
+            'archivos': {s: a.ruta for s, (_, a) in self._abiertos.items()}
+        }
+
+
+class LectorTicks:
+    """
+    Lectura de un archivo de ticks sin copiar los registros.
+
+    Ve los registros escritos hasta el momento de abrirlo (o del último
+    `actualizar`), aunque el grabador siga agregando.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, 'rb')
+        self._mapa = None
+        self.actualizar()
+
+    def actualizar(self):
+        """Vuelve a mapear el archivo para ver los registros nuevos"""
+        self._liberar()
+        self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        capacidad = (len(self._mapa) - CABECERA.size) // REGISTRO.size
+        self.cantidad = min(_leer_cabecera(self._mapa, self.ruta), capacidad)
+        self._vista = memoryview(self._mapa)[CABECERA.size:CABECERA.size + self.cantidad * REGISTRO.size]
+
+    def __len__(self):
+        return self.cantidad
+
+    def __getitem__(self, indice):
+        """(time_msc, bid, ask) del registro `indice`"""
+        if indice < 0:
+            indice += self.cantidad
+        if not 0 <= indice < self.cantidad:
+            raise IndexError(indice)
+        return REGISTRO.unpack_from(self._vista, indice * REGISTRO.size)
+
+    def tiempo(self, indice):
+        return CANTIDAD.unpack_from(self._vista, indice * REGISTRO.size)[0]
+
+    def registros(self, desde=0, hasta=None):
+        """memoryview de los registros [desde, hasta) sin copiar"""
+        hasta = self.cantidad if hasta is None else hasta
+        return self._vista[desde * REGISTRO.size:hasta * REGISTRO.size]
+
+    def iterar(self, desde=0, hasta=None):
+        """Itera (time_msc, bid, ask) de los registros [desde, hasta)"""
+        return REGISTRO.iter_unpack(self.registros(desde, hasta))
+
+    def rango(self, desde_msc=None, hasta_msc=None):
+        """
+        Índices [desde, hasta) de los ticks con desde_msc <= time_msc < hasta_msc.
+
+        Búsqueda binaria: los ticks se graban en orden de tiempo.
+        """
+        desde = 0 if desde_msc is None else self._buscar(desde_msc)
+        hasta = self.cantidad if hasta_msc is None else self._buscar(hasta_msc)
+        return desde, hasta
+
+    def _buscar(self, time_msc):
+        """Primer índice con tiempo >= time_msc"""
+        bajo, alto = 0, self.cantidad
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self.tiempo(medio) < time_msc:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo
+
+    def como_array(self):
+        """Array estructurado de NumPy (time_msc, bid, ask) sobre el mmap, sin copiar"""
+        if np is None:
+            raise RuntimeError("NumPy no está instalado")
+        return np.frombuffer(self._vista, dtype=DTYPE_TICK)
+
+    def _liberar(self):
+        if self._mapa is not None:
+            self._vista.release()
+            self._mapa.close()
+
+    def cerrar(self):
+        self._liberar()
+        self._mapa = None
+        self._archivo.close()
@@ -0,0 +1,277 @@
+"""
+Métricas de Latencia
+===================
+
+Cronómetros por etapa e histogramas para medir el camino completo
+mensaje de Telegram -> fill en MT5.
+
+Componentes
+----------
+1. Cronometro
+   Mide etapas consecutivas de un mensaje con `time.perf_counter_ns()`.
+
+   ```python
+   cronometro = Cronometro(origen=msg.date)   # Timestamp del mensaje en Telegram
+   resultado = parse_senal(texto)
+   cronometro.marcar('parse')                 # Tiempo desde la marca anterior
+   ...
+   cronometro.marcar_fill()                   # Orden confirmada por MT5
+   cronometro.resumen()
+   # {'etapas': {'parse': 0.04, ...}, 'total_ms': 38.2,
+   #  'telegram_ms': 410.5, 'senal_a_fill_ms': 448.7}
+   ```
+
+2. RegistroLatencias
+   Acumula un histograma por etapa y exporta percentiles aproximados.
+
+   ```python
+   metricas.registrar(cronometro)
+   metricas.exportar()
+   # {'parse': {'cantidad': 120, 'p50_ms': 0.05, 'p99_ms': 0.25, ...}, ...}
+   ```
+
+3. SaludMonitor
+   Contadores y medidores del monitor de precios, con alarmas por umbral
+   (avisos en el log, como mucho uno por minuto y por causa).
+
+   ```python
+   salud_monitor.registrar('lag_loop', 12.5)        # Retraso del event loop
+   salud_monitor.registrar('ciclo', 3.1)            # Ciclo de lectura del bus o de un proceso
+   salud_monitor.registrar('disparo_a_envio', 85)   # Trigger detectado -> order_send
+   salud_monitor.revisar_ticks({'XAUUSD': 900.0})   # Edad del último tick por símbolo
+   salud_monitor.resumen()
+   # 'lag_loop p99 2.5 ms | ciclo p99 5 ms | ... | edad XAUUSD 0.9 s | alarmas 0'
+   ```
+
+Notas Importantes
+---------------
+- Las etapas se miden como vueltas: cada marca cuenta desde la anterior
+- `telegram_ms` es el retraso entre la publicación del mensaje y su
+  recepción, depende de la sincronización del reloj local
+- Los percentiles se estiman con el límite superior de cada bucket
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (ms) de los buckets de los histogramas
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Cronometro:
+    """
+    Cronómetro de etapas de un mensaje.
+
+    Attributes:
+        etapas (dict): Duración en ms de cada etapa marcada
+        origen (float): Timestamp (epoch) del mensaje en Telegram, si se conoce
+    """
+
+    def __init__(self, origen=None):
+        """
+        Args:
+            origen: datetime o timestamp epoch del mensaje original
+        """
+        if origen is not None and hasattr(origen, 'timestamp'):
+            origen = origen.timestamp()
+        self.origen = origen
+        self.recibido = time.time()
+        self.etapas = {}
+        self.fill = None
+        self._inicio = time.perf_counter_ns()
+        self._ultimo = self._inicio
+
+    def marcar(self, etapa):
+        """Registra el tiempo transcurrido desde la marca anterior como `etapa`"""
+        ahora = time.perf_counter_ns()
+        self.etapas[etapa] = self.etapas.get(etapa, 0.0) + (ahora - self._ultimo) / 1e6
+        self._ultimo = ahora
+
+    def marcar_fill(self):
+        """Registra el momento en que MT5 confirmó la orden"""
+        self.fill = self.recibido + (time.perf_counter_ns() - self._inicio) / 1e9
+
+    def total_ms(self):
+        """Tiempo desde la recepción del mensaje hasta la última marca"""
+        return (self._ultimo - self._inicio) / 1e6
+
+    def resumen(self):
+        """Diccionario serializable con etapas y totales, para log_accion"""
+        datos = {
+            'etapas': {etapa: round(ms, 3) for etapa, ms in self.etapas.items()},
+            'total_ms': round(self.total_ms(), 3)
+        }
+        if self.origen is not None:
+            datos['telegram_ms'] = round((self.recibido - self.origen) * 1000, 3)
+            if self.fill is not None:
+                datos['senal_a_fill_ms'] = round((self.fill - self.origen) * 1000, 3)
+        return datos
+
+
+class Histograma:
+    """Histograma de latencias con buckets fijos"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)  # Último bucket: > máximo
+        self.cantidad = 0
+        self.suma = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def agregar(self, ms):
+        self.conteos[bisect.bisect_left(self.buckets, ms)] += 1
+        self.cantidad += 1
+        self.suma += ms
+        self.minimo = ms if self.minimo is None else min(self.minimo, ms)
+        self.maximo = ms if self.maximo is None else max(self.maximo, ms)
+
+    def percentil(self, p):
+        """Límite superior del bucket que contiene el percentil p (0-100)"""
+        if not self.cantidad:
+            return None
+        objetivo = self.cantidad * p / 100
+        acumulado = 0
+        for i, conteo in enumerate(self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return self.buckets[i] if i < len(self.buckets) else self.maximo
+        return self.maximo
+
+    def exportar(self):
+        return {
+            'cantidad': self.cantidad,
+            'promedio_ms': round(self.suma / self.cantidad, 3) if self.cantidad else None,
+            'min_ms': self.minimo,
+            'max_ms': self.maximo,
+            'p50_ms': self.percentil(50),
+            'p90_ms': self.percentil(90),
+            'p99_ms': self.percentil(99),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['inf'], self.conteos))
+        }
+
+
+class RegistroLatencias:
+    """Histogramas por etapa de todos los mensajes procesados"""
+
+    def __init__(self):
+        self._histogramas = {}
+        self._lock = threading.Lock()
+
+    def agregar(self, etapa, ms):
+        with self._lock:
+            histograma = self._histogramas.get(etapa)
+            if histograma is None:
+                histograma = self._histogramas[etapa] = Histograma()
+            histograma.agregar(ms)
+
+    def registrar(self, cronometro):
+        """Agrega todas las etapas y totales de un cronómetro"""
+        resumen = cronometro.resumen()
+        for etapa, ms in resumen['etapas'].items():
+            self.agregar(etapa, ms)
+        for total in ('total_ms', 'telegram_ms', 'senal_a_fill_ms'):
+            if total in resumen:
+                self.agregar(total[:-3], resumen[total])
+
+    def exportar(self):
+        with self._lock:
+            return {etapa: h.exportar() for etapa, h in self._histogramas.items()}
+
+
+# Umbrales (ms) a partir de los cuales SaludMonitor emite una alarma
+UMBRALES_SALUD_MS = {
+    'lag_loop': 100,
+    'ciclo': 250,
+    'disparo_a_envio': 1000,
+    'edad_tick': 15000,
+}
+
+
+class SaludMonitor:
+    """
+    Salud del monitor de precios.
+
+    Attributes:
+        umbrales (dict): Umbral en ms de cada medida (ver UMBRALES_SALUD_MS)
+        ultimos (dict): Último valor de cada medida (medidores)
+        contadores (dict): Muestras por medida y alarmas emitidas
+        edades_tick (dict): Edad en ms del último tick de cada símbolo
+    """
+
+    def __init__(self, umbrales=None, intervalo_alarma=60):
+        """
+        Args:
+            umbrales (dict): Umbrales que reemplazan a los de UMBRALES_SALUD_MS
+            intervalo_alarma (float): Segundos mínimos entre alarmas de una misma causa
+        """
+        self.umbrales = {**UMBRALES_SALUD_MS, **(umbrales or {})}
+        self.intervalo_alarma = intervalo_alarma
+        self.histogramas = {}
+        self.ultimos = {}
+        self.contadores = {'alarmas': 0}
+        self.edades_tick = {}
+        self._ultima_alarma = {}  # causa -> monotonic de la última alarma
+
+    def registrar(self, medida, ms):
+        """Agrega una muestra y alarma si supera el umbral de la medida"""
+        histograma = self.histogramas.get(medida)
+        if histograma is None:
+            histograma = self.histogramas[medida] = Histograma()
+        histograma.agregar(ms)
+        self.ultimos[medida] = ms
+        self.contadores[medida] = self.contadores.get(medida, 0) + 1
+        umbral = self.umbrales.get(medida)
+        if umbral is not None and ms > umbral:
+            self._alarma(medida, f"{medida} = {ms:.1f} ms supera el umbral de {umbral} ms")
+
+    def revisar_ticks(self, edades):
+        """
+        Actualiza la edad del último tick de cada símbolo vigilado.
+
+        Args:
+            edades (dict): simbolo -> ms desde el último tick nuevo (None si nunca llegó)
+        """
+        self.edades_tick = dict(edades)
+        umbral = self.umbrales['edad_tick']
+        for simbolo, edad in edades.items():
+            if edad is not None and edad > umbral:
+                self._alarma(f"edad_tick:{simbolo}",
+                             f"Sin ticks nuevos de {simbolo} hace {edad / 1000:.1f} s (umbral {umbral / 1000:.1f} s)")
+
+    def _alarma(self, causa, mensaje):
+        ahora = time.monotonic()
+        ultima = self._ultima_alarma.get(causa)
+        if ultima is not None and ahora - ultima < self.intervalo_alarma:
+            return
+        self._ultima_alarma[causa] = ahora
+        self.contadores['alarmas'] += 1
+        logger.warning(f"⚠️ Salud del monitor: {mensaje}")
+
+    def exportar(self):
+        return {
+            'medidas': {medida: h.exportar() for medida, h in self.histogramas.items()},
+            'ultimos_ms': dict(self.ultimos),
+            'edad_tick_ms': dict(self.edades_tick),
+            'contadores': dict(self.contadores),
+            'umbrales_ms': dict(self.umbrales)
+        }
+
+    def resumen(self):
+        """Una línea legible para el mensaje de estado del monitor"""
+        partes = [f"{medida} p99 {h.percentil(99)} ms" for medida, h in self.histogramas.items()]
+        partes += [f"edad {simbolo} {edad / 1000:.1f} s" if edad is not None else f"edad {simbolo} -"
+                   for simbolo, edad in self.edades_tick.items()]
+        partes.append(f"alarmas {self.contadores['alarmas']}")
+        return " | ".join(partes)
+
+
+# Registro global usado por main.py
+metricas = RegistroLatencias()
+
+# Salud del monitor de precios
+salud_monitor = SaludMonitor()
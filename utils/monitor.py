@@ -0,0 +1,455 @@
+"""
+Estructuras del Monitor de Precios
+=================================
+
+Soporte para `MonitorTask`: índices de órdenes pendientes que permiten
+evaluar cada tick sin recorrer todas las órdenes.
+
+Componentes
+----------
+1. DiccionarioObservado
+   dict que avisa de cada alta y baja, para mantener índices sincronizados
+   con `ordenes_pendientes` sin reconstruirlos.
+
+2. LibrosTriggers
+   Por símbolo, las entradas BUY y SELL ordenadas por precio. Un tick
+   encuentra todas las órdenes cruzadas con una búsqueda binaria:
+   ```
+   BUY  se activa con ask <= entrada -> entradas >= ask  (cola de la lista)
+   SELL se activa con bid >= entrada -> entradas <= bid  (cabeza de la lista)
+   ```
+
+   Ejemplo de Uso:
+   ```python
+   libros = LibrosTriggers()
+   ordenes_pendientes = DiccionarioObservado()
+   ordenes_pendientes.observar(libros.agregar, libros.quitar)
+
+   ordenes_pendientes[1001] = {'simbolo': 'XAUUSD', 'tipo': 'BUY', 'entrada': 2000.0}
+   libros.disparados('XAUUSD', bid=1999.6, ask=1999.8)  # [1001]
+   ```
+
+3. TriggersVectorizados
+   Misma interfaz que LibrosTriggers, pero con todas las órdenes en arrays
+   NumPy (entrada, lado, índice de símbolo y máscara de activas). Un lote de
+   ticks de varios símbolos se evalúa con una sola comparación vectorizada:
+   ```python
+   libros.disparados_lote({'XAUUSD': (bid_maximo, ask_minimo), ...})
+   ```
+   Requiere numpy (dependencia del paquete MetaTrader5); sin él se usa
+   LibrosTriggers.
+
+4. PlanificadorSondeo
+   Elige cuándo volver a leer cada símbolo según la distancia al trigger más
+   cercano y la volatilidad reciente: rápido cerca de una zona, espaciado
+   cuando el precio está lejos.
+   ```
+   intervalo = fraccion * distancia / velocidad, acotado a [minimo, maximo]
+   ```
+
+Notas Importantes
+---------------
+- El costo por tick es O(log n + k), k = órdenes disparadas
+- Altas y bajas cuestan O(n) por el desplazamiento de la lista, pero solo
+  ocurren cuando cambia ordenes_pendientes, no en cada tick
+- TriggersVectorizados reutiliza los huecos de las órdenes quitadas: las
+  altas y bajas son O(1) y los arrays solo crecen (duplicando) al llenarse
+"""
+
+import bisect
+import logging
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # TriggersVectorizados no disponible, usar LibrosTriggers
+
+logger = logging.getLogger(__name__)
+
+
+class DiccionarioObservado(dict):
+    """
+    dict que notifica altas y bajas a sus observadores.
+
+    Cada observador es un par (al_agregar(clave, valor), al_quitar(clave, valor)).
+    Reemplazar una clave existente notifica la baja del valor anterior y el
+    alta del nuevo.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._observadores = []
+
+    def observar(self, al_agregar, al_quitar):
+        """Registra un observador y le notifica el contenido actual"""
+        self._observadores.append((al_agregar, al_quitar))
+        for clave, valor in self.items():
+            al_agregar(clave, valor)
+
+    def _agregado(self, clave, valor):
+        for al_agregar, _ in self._observadores:
+            al_agregar(clave, valor)
+
+    def _quitado(self, clave, valor):
+        for _, al_quitar in self._observadores:
+            al_quitar(clave, valor)
+
+    def __setitem__(self, clave, valor):
+        if clave in self:
+            self._quitado(clave, self[clave])
+        super().__setitem__(clave, valor)
+        self._agregado(clave, valor)
+
+    def __delitem__(self, clave):
+        valor = self[clave]
+        super().__delitem__(clave)
+        self._quitado(clave, valor)
+
+    def pop(self, clave, *default):
+        if clave not in self:
+            return super().pop(clave, *default)
+        valor = super().pop(clave)
+        self._quitado(clave, valor)
+        return valor
+
+    def popitem(self):
+        clave, valor = super().popitem()
+        self._quitado(clave, valor)
+        return clave, valor
+
+    def setdefault(self, clave, default=None):
+        if clave not in self:
+            self[clave] = default
+        return self[clave]
+
+    def update(self, *args, **kwargs):
+        for clave, valor in dict(*args, **kwargs).items():
+            self[clave] = valor
+
+    def clear(self):
+        for clave in list(self):
+            del self[clave]
+
+
+class LibroTriggers:
+    """Entradas BUY y SELL de un símbolo, ordenadas por precio"""
+
+    def __init__(self):
+        self.precios = {'BUY': [], 'SELL': []}
+        self.ids = {'BUY': [], 'SELL': []}
+
+    def __len__(self):
+        return len(self.ids['BUY']) + len(self.ids['SELL'])
+
+    def agregar(self, msg_id, tipo, entrada):
+        precios = self.precios[tipo]
+        i = bisect.bisect_right(precios, entrada)
+        precios.insert(i, entrada)
+        self.ids[tipo].insert(i, msg_id)
+
+    def quitar(self, msg_id, tipo, entrada):
+        precios = self.precios[tipo]
+        ids = self.ids[tipo]
+        i = bisect.bisect_left(precios, entrada)
+        # Puede haber varias órdenes al mismo precio
+        while i < len(ids) and precios[i] == entrada:
+            if ids[i] == msg_id:
+                del precios[i]
+                del ids[i]
+                return
+            i += 1
+
+    def disparados(self, bid, ask):
+        """IDs de las órdenes cuyo precio de entrada fue alcanzado"""
+        compras = self.ids['BUY'][bisect.bisect_left(self.precios['BUY'], ask):]
+        ventas = self.ids['SELL'][:bisect.bisect_right(self.precios['SELL'], bid)]
+        return ventas + compras
+
+    def distancia(self, bid, ask):
+        """Distancia de precio hasta la entrada sin disparar más cercana, o None"""
+        compras = self.precios['BUY']
+        ventas = self.precios['SELL']
+        i = bisect.bisect_left(compras, ask)
+        j = bisect.bisect_right(ventas, bid)
+        distancias = []
+        if i > 0:
+            distancias.append(ask - compras[i - 1])
+        if j < len(ventas):
+            distancias.append(ventas[j] - bid)
+        return min(distancias) if distancias else None
+
+
+class LibrosTriggers:
+    """
+    Un LibroTriggers por símbolo, sincronizado con ordenes_pendientes.
+
+    `agregar` y `quitar` tienen la firma de observador de DiccionarioObservado.
+    """
+
+    def __init__(self):
+        self.libros = {}
+        self._ubicacion = {}  # msg_id -> (simbolo, tipo, entrada) al momento del alta
+
+    def agregar(self, msg_id, datos):
+        try:
+            simbolo, tipo, entrada = datos['simbolo'], datos['tipo'], float(datos['entrada'])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Orden {msg_id} sin datos de trigger válidos: {e}")
+            return
+        libro = self.libros.get(simbolo)
+        if libro is None:
+            libro = self.libros[simbolo] = LibroTriggers()
+        libro.agregar(msg_id, tipo, entrada)
+        self._ubicacion[msg_id] = (simbolo, tipo, entrada)
+
+    def quitar(self, msg_id, datos=None):
+        ubicacion = self._ubicacion.pop(msg_id, None)
+        if ubicacion is None:
+            return
+        simbolo, tipo, entrada = ubicacion
+        libro = self.libros[simbolo]
+        libro.quitar(msg_id, tipo, entrada)
+        if not len(libro):
+            del self.libros[simbolo]
+
+    def simbolos(self):
+        """Símbolos con al menos una orden pendiente"""
+        return list(self.libros)
+
+    def disparados(self, simbolo, bid, ask):
+        """IDs de las órdenes de `simbolo` alcanzadas por el tick (bid, ask)"""
+        libro = self.libros.get(simbolo)
+        return libro.disparados(bid, ask) if libro else []
+
+    def disparados_lote(self, extremos):
+        """
+        IDs alcanzados en varios símbolos.
+
+        Args:
+            extremos (dict): simbolo -> (bid máximo, ask mínimo) del lote de ticks
+        """
+        ids = []
+        for simbolo, (bid, ask) in extremos.items():
+            ids.extend(self.disparados(simbolo, bid, ask))
+        return ids
+
+    def distancia(self, simbolo, bid, ask):
+        """Distancia de precio hasta el trigger más cercano de `simbolo`, o None"""
+        libro = self.libros.get(simbolo)
+        return libro.distancia(bid, ask) if libro else None
+
+
+class TriggersVectorizados:
+    """
+    Órdenes pendientes de todos los símbolos en arrays NumPy.
+
+    Cada orden ocupa un hueco de los arrays; al quitarla el hueco se marca
+    inactivo y se reutiliza en la próxima alta. `agregar` y `quitar` tienen
+    la firma de observador de DiccionarioObservado.
+    """
+
+    LADOS = {'BUY': 1, 'SELL': -1}
+
+    def __init__(self, capacidad=256):
+        self.entrada = np.zeros(capacidad, dtype=np.float64)
+        self.lado = np.zeros(capacidad, dtype=np.int8)
+        self.simbolo_idx = np.zeros(capacidad, dtype=np.int32)
+        self.activo = np.zeros(capacidad, dtype=bool)
+        self.ids = [None] * capacidad
+        self._huecos = list(range(capacidad - 1, -1, -1))
+        self._hueco = {}            # msg_id -> hueco
+        self._indices_simbolo = {}  # simbolo -> índice
+        self._nombres = []          # índice -> simbolo
+        self._cantidad = []         # índice -> órdenes activas
+
+    def _crecer(self):
+        capacidad = len(self.ids)
+        self.entrada = np.concatenate([self.entrada, np.zeros(capacidad, dtype=np.float64)])
+        self.lado = np.concatenate([self.lado, np.zeros(capacidad, dtype=np.int8)])
+        self.simbolo_idx = np.concatenate([self.simbolo_idx, np.zeros(capacidad, dtype=np.int32)])
+        self.activo = np.concatenate([self.activo, np.zeros(capacidad, dtype=bool)])
+        self.ids.extend([None] * capacidad)
+        self._huecos.extend(range(2 * capacidad - 1, capacidad - 1, -1))
+
+    def _indice(self, simbolo):
+        indice = self._indices_simbolo.get(simbolo)
+        if indice is None:
+            indice = self._indices_simbolo[simbolo] = len(self._nombres)
+            self._nombres.append(simbolo)
+            self._cantidad.append(0)
+        return indice
+
+    def agregar(self, msg_id, datos):
+        try:
+            simbolo, lado, entrada = datos['simbolo'], self.LADOS[datos['tipo']], float(datos['entrada'])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Orden {msg_id} sin datos de trigger válidos: {e}")
+            return
+        if not self._huecos:
+            self._crecer()
+        hueco = self._huecos.pop()
+        indice = self._indice(simbolo)
+        self.entrada[hueco] = entrada
+        self.lado[hueco] = lado
+        self.simbolo_idx[hueco] = indice
+        self.activo[hueco] = True
+        self.ids[hueco] = msg_id
+        self._hueco[msg_id] = hueco
+        self._cantidad[indice] += 1
+
+    def quitar(self, msg_id, datos=None):
+        hueco = self._hueco.pop(msg_id, None)
+        if hueco is None:
+            return
+        self.activo[hueco] = False
+        self.ids[hueco] = None
+        self._cantidad[self.simbolo_idx[hueco]] -= 1
+        self._huecos.append(hueco)
+
+    def simbolos(self):
+        """Símbolos con al menos una orden pendiente"""
+        return [s for s, n in zip(self._nombres, self._cantidad) if n]
+
+    def disparados_lote(self, extremos):
+        """
+        IDs alcanzados en varios símbolos, en una sola comparación vectorizada.
+
+        Args:
+            extremos (dict): simbolo -> (bid máximo, ask mínimo) del lote de ticks
+        """
+        if not self._nombres:
+            return []
+        # Símbolos sin lectura quedan en NaN: toda comparación da False
+        bids = np.full(len(self._nombres), np.nan)
+        asks = np.full(len(self._nombres), np.nan)
+        for simbolo, (bid, ask) in extremos.items():
+            indice = self._indices_simbolo.get(simbolo)
+            if indice is not None:
+                bids[indice] = bid
+                asks[indice] = ask
+        bid = bids[self.simbolo_idx]
+        ask = asks[self.simbolo_idx]
+        alcanzados = self.activo & (
+            ((self.lado == 1) & (ask <= self.entrada)) |
+            ((self.lado == -1) & (bid >= self.entrada))
+        )
+        return [self.ids[i] for i in np.flatnonzero(alcanzados)]
+
+    def disparados(self, simbolo, bid, ask):
+        """IDs de las órdenes de `simbolo` alcanzadas por el tick (bid, ask)"""
+        return self.disparados_lote({simbolo: (bid, ask)})
+
+    def distancia(self, simbolo, bid, ask):
+        """Distancia de precio hasta el trigger más cercano de `simbolo`, o None"""
+        indice = self._indices_simbolo.get(simbolo)
+        if indice is None or not self._cantidad[indice]:
+            return None
+        del_simbolo = self.activo & (self.simbolo_idx == indice)
+        # BUY sin disparar: entrada < ask; SELL sin disparar: entrada > bid
+        distancias = np.concatenate([
+            ask - self.entrada[del_simbolo & (self.lado == 1) & (self.entrada < ask)],
+            self.entrada[del_simbolo & (self.lado == -1) & (self.entrada > bid)] - bid
+        ])
+        return float(distancias.min()) if distancias.size else None
+
+
+class PlanificadorSondeo:
+    """
+    Decide cuándo volver a leer cada símbolo.
+
+    El próximo sondeo se programa a una fracción del tiempo estimado para que
+    el precio recorra la distancia hasta el trigger más cercano, según la
+    velocidad reciente del precio (promedio exponencial de |Δ precio| / s),
+    acotado entre `minimo` y `maximo` segundos. La velocidad nunca se toma
+    menor a un spread por segundo: un mercado quieto (velocidad medida 0)
+    no deja dormido `maximo` segundos a un símbolo pegado a su trigger.
+    """
+
+    def __init__(self, minimo=0.05, maximo=5.0, fraccion=0.25, alfa=0.3):
+        """
+        Args:
+            minimo (float): Intervalo mínimo entre sondeos de un símbolo (s)
+            maximo (float): Intervalo máximo entre sondeos de un símbolo (s)
+            fraccion (float): Fracción del tiempo estimado al trigger a esperar
+            alfa (float): Peso de la última lectura en la velocidad promedio
+        """
+        self.minimo = minimo
+        self.maximo = maximo
+        self.fraccion = fraccion
+        self.alfa = alfa
+        self._proximo = {}    # simbolo -> instante (monotonic) del próximo sondeo
+        self._velocidad = {}  # simbolo -> velocidad promedio del precio
+        self._anterior = {}   # simbolo -> (instante, precio medio) de la última lectura
+        self._distancia = {}  # simbolo -> última distancia al trigger más cercano
+        self._spread = {}     # simbolo -> spread de la última lectura
+
+    def vencidos(self, simbolos, ahora=None):
+        """Símbolos que ya deben leerse (los nunca programados siempre vencen)"""
+        ahora = time.monotonic() if ahora is None else ahora
+        return [s for s in simbolos if self._proximo.get(s, 0) <= ahora]
+
+    def programar(self, simbolo, ticks, distancia, ahora=None):
+        """
+        Actualiza la volatilidad con los ticks leídos y programa el próximo sondeo.
+
+        Args:
+            ticks: Ticks leídos en este sondeo (atributos bid y ask), en orden
+            distancia: Distancia al trigger más cercano (None si no hay)
+
+        Returns:
+            float: Segundos hasta el próximo sondeo de `simbolo`
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        if ticks:
+            medios = [(t.bid + t.ask) / 2 for t in ticks]
+            anterior = self._anterior.get(simbolo)
+            if anterior is not None and ahora > anterior[0]:
+                recorrido = abs(medios[0] - anterior[1])
+                recorrido += sum(abs(b - a) for a, b in zip(medios, medios[1:]))
+                velocidad = recorrido / (ahora - anterior[0])
+                previa = self._velocidad.get(simbolo)
+                self._velocidad[simbolo] = velocidad if previa is None else (
+                    self.alfa * velocidad + (1 - self.alfa) * previa)
+            self._anterior[simbolo] = (ahora, medios[-1])
+            self._spread[simbolo] = ticks[-1].ask - ticks[-1].bid
+
+        self._distancia[simbolo] = distancia
+        velocidad = self._velocidad.get(simbolo)
+        if distancia is None:
+            intervalo = self.maximo
+        elif distancia <= 0:
+            intervalo = self.minimo
+        elif velocidad is None:
+            # Sin volatilidad medida todavía: cerca de un trigger, sondear rápido
+            intervalo = self.minimo
+        else:
+            velocidad = max(velocidad, self._spread.get(simbolo, 0))
+            intervalo = self.fraccion * distancia / velocidad if velocidad else self.minimo
+        intervalo = min(max(intervalo, self.minimo), self.maximo)
+        self._proximo[simbolo] = ahora + intervalo
+        return intervalo
+
+    def reprogramar(self, simbolo, ahora=None):
+        """Programa un sondeo sin ticks nuevos, con la última distancia conocida"""
+        return self.programar(simbolo, None, self._distancia.get(simbolo, 0), ahora)
+
+    def adelantar(self, simbolo):
+        """Fuerza la lectura de `simbolo` en el próximo ciclo (ej: nueva orden)"""
+        self._proximo.pop(simbolo, None)
+
+    def olvidar(self, simbolo):
+        """Descarta todo el estado de un símbolo sin órdenes"""
+        self._proximo.pop(simbolo, None)
+        self._velocidad.pop(simbolo, None)
+        self._anterior.pop(simbolo, None)
+        self._distancia.pop(simbolo, None)
+        self._spread.pop(simbolo, None)
+
+    def espera(self, simbolos, ahora=None):
+        """Segundos hasta que venza el próximo de `simbolos` (maximo si no hay)"""
+        if not simbolos:
+            return self.maximo
+        ahora = time.monotonic() if ahora is None else ahora
+        proximo = min(self._proximo.get(s, 0) for s in simbolos)
+        return min(max(proximo - ahora, 0), self.maximo)
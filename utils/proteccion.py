@@ -0,0 +1,258 @@
+"""
+Motor de Protección de Posiciones
+================================
+
+Break-even y trailing stop automáticos sobre todas las señales activas,
+evaluados con cada lote de ticks del bus en lugar de esperar el mensaje
+"move to be" del canal.
+
+Componentes
+----------
+1. MotorProteccion
+   Guarda el estado de cada posición en arrays compactos (un hueco por
+   posición) agrupados por símbolo. Con cada tick calcula el nuevo SL de
+   las posiciones del símbolo y devuelve todas las modificaciones juntas,
+   listas para un único `modificar_posiciones` por ciclo.
+
+   ```python
+   motor = MotorProteccion(REGLAS_PROTECCION)
+   senales_activas.observar(motor.agregar, motor.quitar)
+
+   motor.sincronizar(posiciones, simbolos)       # Datos frescos de MT5
+   cambios = motor.evaluar('XAUUSD', bid, ask)   # {ticket: {'sl': 2001.1}}
+   motor.confirmar(modificar_posiciones(cambios))
+   ```
+
+Reglas (en puntos del símbolo)
+-----------------------------
+```python
+{
+    'be_puntos': 300,                # SL a la entrada tras 300 puntos a favor (0 = desactivado)
+    'be_margen_puntos': 10,          # SL a entrada + 10 puntos (cubre spread/comisión)
+    'trailing_inicio_puntos': 500,   # Trailing activo tras 500 puntos a favor (0 = desactivado)
+    'trailing_distancia_puntos': 200,# SL a 200 puntos del precio
+    'trailing_paso_puntos': 20,      # Mover solo si el SL avanza al menos 20 puntos
+    'espera_reintento': 5.0          # Segundos sin reintentar una posición rechazada
+}
+```
+
+Notas Importantes
+---------------
+- El SL solo avanza: nunca se propone un SL peor que el actual
+- BUY se evalúa contra el bid y SELL contra el ask (precio de cierre)
+- Niveles más cerca del precio que el stops level se posponen al próximo
+  tick en lugar de enviarse para ser rechazados; si break-even y trailing
+  están activos se envía el mejor de los que sí pueden colocarse
+- Tras enviar, el SL se da por aplicado; si MT5 lo rechaza `confirmar`
+  restaura el anterior y la posición espera `espera_reintento` segundos
+"""
+
+import logging
+import time
+from array import array
+
+logger = logging.getLogger(__name__)
+
+REGLAS_POR_DEFECTO = {
+    'be_puntos': 0,
+    'be_margen_puntos': 0,
+    'trailing_inicio_puntos': 0,
+    'trailing_distancia_puntos': 0,
+    'trailing_paso_puntos': 0,
+    'espera_reintento': 5.0,
+}
+
+
+class MotorProteccion:
+    """
+    Reglas de break-even y trailing por posición.
+
+    `agregar` y `quitar` tienen la firma de observador de
+    DiccionarioObservado (senales_activas): solo necesitan 'ticket' y
+    'simbolo'; el resto de los datos llega con `sincronizar`.
+    """
+
+    def __init__(self, reglas=None, capacidad=64):
+        self.reglas = {**REGLAS_POR_DEFECTO, **(reglas or {})}
+        # Arrays por hueco
+        self.ticket = array('q', [0] * capacidad)
+        self.compra = array('b', [0] * capacidad)
+        self.entrada = array('d', [0.0] * capacidad)
+        self.sl = array('d', [0.0] * capacidad)
+        self.point = array('d', [0.0] * capacidad)
+        self.minimo = array('d', [0.0] * capacidad)          # Stops level en precio
+        self.sincronizado = array('b', [0] * capacidad)     # 0 nueva, 1 abierta, -1 cerrada
+        self.bloqueado_hasta = array('d', [0.0] * capacidad)
+        self._huecos = list(range(capacidad - 1, -1, -1))
+        self._hueco = {}        # ticket -> hueco
+        self._por_simbolo = {}  # simbolo -> set de huecos
+        self._enviados = {}     # ticket -> SL anterior, hasta confirmar
+
+    def _crecer(self):
+        capacidad = len(self.ticket)
+        for nombre in ('ticket', 'compra', 'sincronizado'):
+            getattr(self, nombre).extend([0] * capacidad)
+        for nombre in ('entrada', 'sl', 'point', 'minimo', 'bloqueado_hasta'):
+            getattr(self, nombre).extend([0.0] * capacidad)
+        self._huecos.extend(range(2 * capacidad - 1, capacidad - 1, -1))
+
+    def agregar(self, msg_id, datos):
+        ticket = datos.get('ticket')
+        simbolo = datos.get('simbolo')
+        if not ticket or not simbolo or ticket in self._hueco:
+            return
+        if not self._huecos:
+            self._crecer()
+        hueco = self._huecos.pop()
+        self.ticket[hueco] = ticket
+        self.sincronizado[hueco] = 0
+        self.bloqueado_hasta[hueco] = 0.0
+        self._hueco[ticket] = hueco
+        self._por_simbolo.setdefault(simbolo, set()).add(hueco)
+
+    def quitar(self, msg_id, datos=None):
+        ticket = (datos or {}).get('ticket')
+        hueco = self._hueco.pop(ticket, None)
+        if hueco is None:
+            return
+        for simbolo, huecos in list(self._por_simbolo.items()):
+            if hueco in huecos:
+                huecos.discard(hueco)
+                if not huecos:
+                    del self._por_simbolo[simbolo]
+                break
+        self._enviados.pop(ticket, None)
+        self.ticket[hueco] = 0
+        self._huecos.append(hueco)
+
+    def tickets(self):
+        """Tickets protegidos"""
+        return list(self._hueco)
+
+    def simbolos(self):
+        """Símbolos con posiciones protegidas"""
+        return list(self._por_simbolo)
+
+    def sincronizar(self, posiciones, simbolos):
+        """
+        Actualiza entrada, dirección y SL con datos de MT5.
+
+        Args:
+            posiciones (dict): ticket -> posición (price_open, type, sl) o None si ya no está abierta
+            simbolos (dict): simbolo -> (point, distancia mínima de stops en precio)
+        """
+        for ticket, posicion in posiciones.items():
+            hueco = self._hueco.get(ticket)
+            if hueco is None:
+                continue
+            if posicion is None:
+                self.sincronizado[hueco] = -1
+                continue
+            point, minimo = simbolos[posicion.symbol]
+            self.compra[hueco] = 1 if posicion.type == 0 else 0  # ORDER_TYPE_BUY
+            self.entrada[hueco] = posicion.price_open
+            if ticket not in self._enviados:
+                self.sl[hueco] = posicion.sl
+            self.point[hueco] = point
+            self.minimo[hueco] = minimo
+            self.sincronizado[hueco] = 1
+
+    def evaluar(self, simbolo, bid, ask, ahora=None):
+        """
+        Nuevos SL de las posiciones de `simbolo` para el tick (bid, ask).
+
+        Returns:
+            dict: ticket -> {'sl': nuevo SL}, solo las que avanzan
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        reglas = self.reglas
+        cambios = {}
+        for hueco in self._por_simbolo.get(simbolo, ()):
+            if self.sincronizado[hueco] != 1 or self.bloqueado_hasta[hueco] > ahora:
+                continue
+            point = self.point[hueco]
+            entrada = self.entrada[hueco]
+            actual = self.sl[hueco]
+            # Del lado de la posición todo se expresa como "más alto = mejor"
+            signo = 1 if self.compra[hueco] else -1
+            precio = bid if signo == 1 else ask
+            ganancia = (precio - entrada) * signo
+            sl = actual * signo if actual else float('-inf')
+            candidatos = []
+
+            if reglas['be_puntos'] and ganancia >= reglas['be_puntos'] * point:
+                candidatos.append((entrada + signo * reglas['be_margen_puntos'] * point) * signo)
+            if reglas['trailing_inicio_puntos'] and ganancia >= reglas['trailing_inicio_puntos'] * point:
+                trailing = (precio - signo * reglas['trailing_distancia_puntos'] * point) * signo
+                if trailing >= sl + reglas['trailing_paso_puntos'] * point:
+                    candidatos.append(trailing)
+
+            # Cada regla por separado: la que quede más cerca del precio que
+            # el stops level no tapa a otra que sí puede colocarse
+            limite = precio * signo - self.minimo[hueco]
+            colocables = [c for c in candidatos if sl < c <= limite]
+            if not colocables:
+                continue
+            objetivo = max(colocables)
+            ticket = self.ticket[hueco]
+            nuevo = objetivo * signo
+            cambios[ticket] = {'sl': nuevo}
+            self._enviados.setdefault(ticket, actual)
+            self.sl[hueco] = nuevo
+        return cambios
+
+    def confirmar(self, resultados, ahora=None):
+        """
+        Registra el resultado de modificar_posiciones.
+
+        Args:
+            resultados (dict): ticket -> True/False
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        for ticket, exito in resultados.items():
+            anterior = self._enviados.pop(ticket, None)
+            hueco = self._hueco.get(ticket)
+            if exito or hueco is None:
+                continue
+            if anterior is not None:
+                self.sl[hueco] = anterior
+            self.bloqueado_hasta[hueco] = ahora + self.reglas['espera_reintento']
+
+    def distancia(self, simbolo, bid, ask, ahora=None):
+        """
+        Distancia de precio hasta la próxima regla que se activaría en `simbolo`.
+
+        Solo cuentan los niveles que podrían enviarse: las posiciones en
+        espera de reintento se ignoran y un nivel que el stops level aún no
+        deja colocar se mide hasta el precio que sí lo permite.
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        reglas = self.reglas
+        distancias = []
+        for hueco in self._por_simbolo.get(simbolo, ()):
+            if self.sincronizado[hueco] == 0:
+                return 0  # Posición nueva: leer pronto para sincronizarla
+            if self.sincronizado[hueco] == -1 or self.bloqueado_hasta[hueco] > ahora:
+                continue
+            point = self.point[hueco]
+            minimo = self.minimo[hueco]
+            signo = 1 if self.compra[hueco] else -1
+            precio = bid if signo == 1 else ask
+            ganancia = (precio - self.entrada[hueco]) * signo
+            actual = self.sl[hueco]
+            if reglas['be_puntos']:
+                be = self.entrada[hueco] + signo * reglas['be_margen_puntos'] * point
+                if not actual or (be - actual) * signo > 0:
+                    # El SL en `be` debe quedar a `minimo` del precio
+                    activacion = max(reglas['be_puntos'] * point, reglas['be_margen_puntos'] * point + minimo)
+                    distancias.append(activacion - ganancia)
+            # Un trailing más cerca que el stops level nunca puede colocarse
+            if reglas['trailing_inicio_puntos'] and reglas['trailing_distancia_puntos'] * point >= minimo:
+                if ganancia < reglas['trailing_inicio_puntos'] * point or not actual:
+                    distancias.append(reglas['trailing_inicio_puntos'] * point - ganancia)
+                else:
+                    # Precio al que el trailing avanzaría un paso
+                    siguiente = (actual * signo + (reglas['trailing_distancia_puntos'] +
+                                                   reglas['trailing_paso_puntos']) * point)
+                    distancias.append(siguiente - precio * signo)
+        return max(min(distancias), 0) if distancias else None